@@ -1,24 +1,116 @@
+import atexit
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from config import config
+from config import DEFAULT_SECRET_KEY, config
 
 db = SQLAlchemy()
 
 
-def create_app(config_name='default'):
+def create_app(config_name='default', config_overrides=None):
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    if app.config['STATELESS_QUOTES'] and app.config['SECRET_KEY'] == DEFAULT_SECRET_KEY:
+        raise ValueError("STATELESS_QUOTES needs SECRET_KEY set; the built-in key is public")
+
+    from app.utils.json_provider import FXJSONProvider
+    app.json = FXJSONProvider(app)
 
     # Initialize extensions
     db.init_app(app)
 
+    from app.models.types import configure_id_storage
+    with app.app_context():
+        configure_id_storage(db.engine, app.config)
+
+    if app.config['METRICS_ENABLED']:
+        from app.utils.instrumentation import init_metrics
+        init_metrics(app)
+
+    if app.config['SQL_PROFILING_ENABLED']:
+        from app.utils.sql_profiler import init_sql_profiler
+        init_sql_profiler(app)
+
+    if app.config['TRACING_ENABLED']:
+        from app.utils.tracing import init_tracing
+        init_tracing(app)
+
+    from app.services.rate_cache import RateCache
+    app.extensions['rate_cache'] = RateCache(
+        app.config['RATE_CACHE_MAX_AGE_SECONDS'],
+        pivots=app.config['CROSS_RATE_PIVOTS']
+    )
+
+    from app.utils.ttl_cache import TTLCache
+    app.extensions['idempotency_cache'] = TTLCache(
+        app.config['IDEMPOTENCY_CACHE_SIZE'],
+        app.config['IDEMPOTENCY_KEY_TTL_SECONDS']
+    )
+
+    from app.utils.quote_tokens import ExecutedTokenStore
+    app.extensions['executed_tokens'] = ExecutedTokenStore()
+
+    from app.services.pricing import create_pricer
+    app.extensions['pricer'] = create_pricer(app.config)
+
+    from app.services.quote_buffer import QuoteBuffer
+    app.extensions['quote_buffer'] = QuoteBuffer(
+        app.config['QUOTE_BUFFER_FLUSH_SIZE'],
+        app.config['QUOTE_BUFFER_MAX_SIZE']
+    )
+
+    from app.utils.segment_store import SegmentStore
+    app.extensions['archive_store'] = SegmentStore(
+        app.config['ARCHIVE_DIR'],
+        app.config['ARCHIVE_SEGMENT_MAX_BYTES']
+    )
+
+    from app.utils.http import create_http_session
+    app.extensions['http_session'] = create_http_session(app.config['RATE_API_POOL_SIZE'])
+
     # Register blueprints
     from app.routes.fx_routes import fx_bp
     app.register_blueprint(fx_bp, url_prefix='/api/v1')
 
+    if app.config['METRICS_ENABLED']:
+        from app.routes.metrics_routes import metrics_bp
+        app.register_blueprint(metrics_bp)
+
     # Create tables
     with app.app_context():
         db.create_all()
 
+    # Start background jobs
+    from app.services.idempotency_service import IdempotencyService
+    from app.utils.background import start_periodic_task
+    start_periodic_task(app, 'idempotency-sweeper',
+                        app.config['IDEMPOTENCY_SWEEP_INTERVAL_SECONDS'],
+                        IdempotencyService.sweep_expired)
+
+    from app.services.archive_service import ArchiveService
+    start_periodic_task(app, 'quote-sweeper',
+                        app.config['QUOTE_SWEEP_INTERVAL_SECONDS'],
+                        ArchiveService.sweep)
+
+    if app.config['QUOTE_WRITE_MODE'] == 'write_behind':
+        quote_buffer = app.extensions['quote_buffer']
+        quote_buffer.task = start_periodic_task(app, 'quote-flusher',
+                                                app.config['QUOTE_FLUSH_INTERVAL_SECONDS'],
+                                                quote_buffer.flush, run_on_stop=True)
+        atexit.register(quote_buffer.close, app)
+
+    from app.services.rate_refresher import RateRefresher
+    refresher = RateRefresher(
+        app,
+        app.config['RATE_REFRESH_BASE_CURRENCIES'],
+        app.config['RATE_REFRESH_INTERVAL_SECONDS'],
+        app.config['RATE_REFRESH_MIN_INTERVAL_SECONDS']
+    )
+    app.extensions['rate_refresher'] = refresher
+    app.extensions.setdefault('background_tasks', {})['rate-refresher'] = refresher.task
+    refresher.start()
+
     return app
\ No newline at end of file
@@ -0,0 +1,18 @@
+from datetime import datetime
+from app import db
+from app.models.types import Identifier
+
+
+class ArchiveIndex(db.Model):
+    """Where an archived quote or transaction lives in the segment files"""
+    __tablename__ = 'archive_index'
+
+    record_id = db.Column(Identifier, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)
+    segment = db.Column(db.String(64), nullable=False)
+    offset = db.Column(db.BigInteger, nullable=False)
+    length = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchiveIndex {self.kind} {self.record_id}: {self.segment}@{self.offset}>'
@@ -13,9 +13,9 @@ class ExchangeRate(db.Model):
     rate = db.Column(db.Numeric(precision=18, scale=8), nullable=False)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-    # Add composite index for efficient lookups
+    # One row per pair; also serves pair lookups
     __table_args__ = (
-        Index('idx_currency_pair', 'base_currency', 'target_currency'),
+        Index('idx_currency_pair', 'base_currency', 'target_currency', unique=True),
     )
 
     def __repr__(self):
@@ -28,4 +28,21 @@ class ExchangeRate(db.Model):
             'target_currency': self.target_currency,
             'rate': str(self.rate),
             'updated_at': self.updated_at.isoformat()
+        }
+
+    @classmethod
+    def dict_columns(cls):
+        """Columns read by row_to_dict, so list queries can skip loading ExchangeRate objects"""
+        return cls.id, cls.base_currency, cls.target_currency, cls.rate, cls.updated_at
+
+    @staticmethod
+    def row_to_dict(row):
+        """Build to_dict() from a row of dict_columns()"""
+        rate_id, base_currency, target_currency, rate, updated_at = row
+        return {
+            'id': rate_id,
+            'base_currency': base_currency,
+            'target_currency': target_currency,
+            'rate': str(rate),
+            'updated_at': updated_at.isoformat()
         }
\ No newline at end of file
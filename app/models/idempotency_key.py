@@ -0,0 +1,22 @@
+from datetime import datetime
+from app import db
+from app.models.types import Identifier
+
+
+class IdempotencyKey(db.Model):
+    """Client-supplied idempotency keys and the transaction they produced"""
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False, unique=True)
+    quote_id = db.Column(Identifier, nullable=False)
+    transaction_id = db.Column(Identifier, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def is_expired(self):
+        """Check if the key has outlived its TTL"""
+        return datetime.utcnow() >= self.expires_at
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}: {self.transaction_id}>'
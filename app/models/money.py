@@ -0,0 +1,101 @@
+from decimal import Decimal
+from flask import current_app, has_app_context
+from sqlalchemy import Numeric, cast, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from app import db
+from app.utils.decimal_utils import to_decimal
+from app.utils.fixed_point import from_minor_units, to_minor_units
+
+CURRENCY_PLACES = 2
+RATE_PLACES = 8
+
+# Hybrid attribute -> (Numeric column attribute, scaled integer column attribute, places)
+MONEY_FIELDS = {
+    'from_amount': ('from_amount_numeric', 'from_amount_minor', CURRENCY_PLACES),
+    'to_amount': ('to_amount_numeric', 'to_amount_minor', CURRENCY_PLACES),
+    'exchange_rate': ('exchange_rate_numeric', 'exchange_rate_scaled', RATE_PLACES),
+}
+
+
+def money_storage_mode():
+    """Return the configured MONEY_STORAGE_MODE ('numeric' or 'minor_units')"""
+    if has_app_context():
+        return current_app.config['MONEY_STORAGE_MODE']
+    return 'numeric'
+
+
+def money_value(numeric, scaled, places):
+    """Return the Decimal held by a Numeric column and scaled integer column pair"""
+    if scaled is not None:
+        return from_minor_units(scaled, places)
+    return numeric
+
+
+def _money_property(numeric_attr, scaled_attr, places):
+    """
+    Build a hybrid attribute over a Numeric column and a scaled integer column
+
+    Reads prefer the integer column, so rows written in either mode (or
+    half-way through a migration) load the same Decimal. Writes go to the
+    column selected by MONEY_STORAGE_MODE and clear the other one.
+    """
+    def fget(self):
+        return money_value(getattr(self, numeric_attr), getattr(self, scaled_attr), places)
+
+    def fset(self, value):
+        if value is not None and money_storage_mode() == 'minor_units':
+            setattr(self, scaled_attr, to_minor_units(to_decimal(value), places))
+            setattr(self, numeric_attr, None)
+        else:
+            setattr(self, numeric_attr, value)
+            setattr(self, scaled_attr, None)
+
+    def expr(cls):
+        return cast(func.coalesce(
+            getattr(cls, numeric_attr),
+            getattr(cls, scaled_attr) * Decimal(1).scaleb(-places)
+        ), Numeric(18, places))
+
+    return hybrid_property(fget, fset, expr=expr)
+
+
+class MoneyColumnsMixin:
+    """
+    Amount and rate columns of quotes and transactions
+
+    With MONEY_STORAGE_MODE = 'numeric' values are stored in the Numeric
+    columns; with 'minor_units' amounts are stored as BigInteger minor units
+    and rates as BigInteger scaled by 10**8. The from_amount, to_amount and
+    exchange_rate attributes hide the difference and always hold Decimals.
+    """
+
+    from_amount_numeric = db.Column('from_amount', db.Numeric(precision=18, scale=2), nullable=True)
+    to_amount_numeric = db.Column('to_amount', db.Numeric(precision=18, scale=2), nullable=True)
+    exchange_rate_numeric = db.Column('exchange_rate', db.Numeric(precision=18, scale=8), nullable=True)
+    from_amount_minor = db.Column(db.BigInteger, nullable=True)
+    to_amount_minor = db.Column(db.BigInteger, nullable=True)
+    exchange_rate_scaled = db.Column(db.BigInteger, nullable=True)
+
+    from_amount = _money_property('from_amount_numeric', 'from_amount_minor', CURRENCY_PLACES)
+    to_amount = _money_property('to_amount_numeric', 'to_amount_minor', CURRENCY_PLACES)
+    exchange_rate = _money_property('exchange_rate_numeric', 'exchange_rate_scaled', RATE_PLACES)
+
+    @classmethod
+    def storage_row(cls, row):
+        """
+        Map a dict of attribute values to column attributes for a bulk insert
+
+        Bulk inserts bypass the hybrid setters, so the money fields are
+        routed to the storage columns here.
+        """
+        minor_units = money_storage_mode() == 'minor_units'
+        stored = {k: v for k, v in row.items() if k not in MONEY_FIELDS}
+        for field, (numeric_attr, scaled_attr, places) in MONEY_FIELDS.items():
+            value = row.get(field)
+            if minor_units and value is not None:
+                stored[numeric_attr] = None
+                stored[scaled_attr] = to_minor_units(to_decimal(value), places)
+            else:
+                stored[numeric_attr] = value
+                stored[scaled_attr] = None
+        return stored
@@ -1,24 +1,26 @@
-import uuid
 from datetime import datetime, timedelta
 from app import db
+from app.models.types import Identifier
+from app.models.money import MoneyColumnsMixin
+from app.utils.ids import generate_id
 from flask import current_app
 
 
-class Quote(db.Model):
+class Quote(MoneyColumnsMixin, db.Model):
     """Store FX quotes with expiration"""
     __tablename__ = 'quotes'
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(Identifier, primary_key=True, default=generate_id)
     from_currency = db.Column(db.String(3), nullable=False)
     to_currency = db.Column(db.String(3), nullable=False)
-    from_amount = db.Column(db.Numeric(precision=18, scale=2), nullable=False)
-    to_amount = db.Column(db.Numeric(precision=18, scale=2), nullable=False)
-    exchange_rate = db.Column(db.Numeric(precision=18, scale=8), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     is_executed = db.Column(db.Boolean, default=False, nullable=False)
     executed_at = db.Column(db.DateTime, nullable=True)
 
+    # Signed token of a stateless quote; not persisted
+    token = None
+
     def __init__(self, **kwargs):
         super(Quote, self).__init__(**kwargs)
         if not self.expires_at:
@@ -34,7 +36,7 @@ class Quote(db.Model):
         return datetime.utcnow() >= self.expires_at
 
     def to_dict(self):
-        return {
+        data = {
             'quote_id': self.id,
             'from_currency': self.from_currency,
             'to_currency': self.to_currency,
@@ -46,6 +48,9 @@ class Quote(db.Model):
             'is_executed': self.is_executed,
             'executed_at': self.executed_at.isoformat() if self.executed_at else None
         }
+        if self.token:
+            data['quote_token'] = self.token
+        return data
 
     def __repr__(self):
         return f'<Quote {self.id}: {self.from_currency}->{self.to_currency}>'
\ No newline at end of file
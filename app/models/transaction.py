@@ -1,25 +1,34 @@
-import uuid
 from datetime import datetime
 from app import db
+from app.models.types import Identifier
+from sqlalchemy import Index
+from app.models.money import CURRENCY_PLACES, RATE_PLACES, MoneyColumnsMixin, money_value
+from app.utils.ids import generate_id
 
 
-class Transaction(db.Model):
+class Transaction(MoneyColumnsMixin, db.Model):
     """Store executed FX transactions for audit trail"""
     __tablename__ = 'transactions'
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    quote_id = db.Column(db.String(36), db.ForeignKey('quotes.id'), nullable=False)
+    id = db.Column(Identifier, primary_key=True, default=generate_id)
+    quote_id = db.Column(Identifier, db.ForeignKey('quotes.id'), nullable=False,
+                         unique=True, index=True)
     from_currency = db.Column(db.String(3), nullable=False)
     to_currency = db.Column(db.String(3), nullable=False)
-    from_amount = db.Column(db.Numeric(precision=18, scale=2), nullable=False)
-    to_amount = db.Column(db.Numeric(precision=18, scale=2), nullable=False)
-    exchange_rate = db.Column(db.Numeric(precision=18, scale=8), nullable=False)
     status = db.Column(db.String(20), nullable=False, default='completed')
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     # Relationship
     quote = db.relationship('Quote', backref='transaction', lazy=True)
 
+    # Keyset pagination over history walks this index newest first; volume
+    # totals per pair are answered from the covering index alone
+    __table_args__ = (
+        Index('idx_transactions_created_at_id', 'created_at', 'id'),
+        Index('idx_transactions_volume', 'from_currency', 'to_currency',
+              'from_amount_minor', 'to_amount_minor', 'from_amount', 'to_amount'),
+    )
+
     def to_dict(self):
         return {
             'transaction_id': self.id,
@@ -33,5 +42,31 @@ class Transaction(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+    @classmethod
+    def dict_columns(cls):
+        """Columns read by row_to_dict, so list queries can skip loading Transaction objects"""
+        return (cls.id, cls.quote_id, cls.from_currency, cls.to_currency,
+                cls.from_amount_numeric, cls.from_amount_minor,
+                cls.to_amount_numeric, cls.to_amount_minor,
+                cls.exchange_rate_numeric, cls.exchange_rate_scaled,
+                cls.status, cls.created_at)
+
+    @staticmethod
+    def row_to_dict(row):
+        """Build to_dict() from a row of dict_columns()"""
+        (transaction_id, quote_id, from_currency, to_currency, from_amount, from_amount_minor,
+         to_amount, to_amount_minor, exchange_rate, exchange_rate_scaled, status, created_at) = row
+        return {
+            'transaction_id': transaction_id,
+            'quote_id': quote_id,
+            'from_currency': from_currency,
+            'to_currency': to_currency,
+            'from_amount': str(money_value(from_amount, from_amount_minor, CURRENCY_PLACES)),
+            'to_amount': str(money_value(to_amount, to_amount_minor, CURRENCY_PLACES)),
+            'exchange_rate': str(money_value(exchange_rate, exchange_rate_scaled, RATE_PLACES)),
+            'status': status,
+            'created_at': created_at.isoformat()
+        }
+
     def __repr__(self):
         return f'<Transaction {self.id}: {self.from_currency}->{self.to_currency}>'
\ No newline at end of file
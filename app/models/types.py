@@ -0,0 +1,50 @@
+import uuid
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.types import TypeDecorator
+from app.utils.ids import id_to_int, ulid_to_str
+
+
+def configure_id_storage(engine, config):
+    """
+    Record on an engine's dialect how Identifier columns are stored
+
+    Every app has its own engine, so the setting is per app. It must be set
+    before the engine first compiles or binds an Identifier.
+    """
+    engine.dialect.binary_ids = config['ID_STORAGE'] == 'binary'
+    engine.dialect.id_format = 'ulid' if config['ID_STRATEGY'] == 'ulid' else 'uuid'
+
+
+class Identifier(TypeDecorator):
+    """
+    Textual id column (UUID or ULID)
+
+    Stored as String(36), or as the 16 raw bytes when ID_STORAGE is
+    'binary'. Python code always sees the text form; binary values are
+    rendered in the form of the configured ID_STRATEGY. A malformed id
+    binds as NULL, so lookups by it simply find nothing.
+    """
+
+    impl = String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if getattr(dialect, 'binary_ids', False):
+            return dialect.type_descriptor(LargeBinary(16))
+        return dialect.type_descriptor(String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not getattr(dialect, 'binary_ids', False):
+            return value
+        try:
+            return id_to_int(value).to_bytes(16, 'big')
+        except ValueError:
+            return None
+
+    def process_result_value(self, value, dialect):
+        if value is None or not getattr(dialect, 'binary_ids', False):
+            return value
+        number = int.from_bytes(value, 'big')
+        if dialect.id_format == 'ulid':
+            return ulid_to_str(number)
+        return str(uuid.UUID(int=number))
@@ -1,17 +1,32 @@
-from flask import Blueprint, request, jsonify
+import hmac
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from app.services.fx_service import FXService
 from app.services.rate_service import RateService
+from app.utils.http_cache import (
+    IMMUTABLE, REVALIDATE, cacheable, compress_response, matching_etag, not_modified
+)
+from app.utils.profiling import StackSampler, allocation_diff, profile_lock
+from app.utils.sql_profiler import statement_budget
+from app.utils.validators import validate_currency
 
 fx_bp = Blueprint('fx', __name__)
 
 
+@fx_bp.after_request
+def compress_large_response(response):
+    return compress_response(response)
+
+
 @fx_bp.route('/health', methods=['GET'])
+@statement_budget(0)
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'service': 'FX Engine'}), 200
 
 
 @fx_bp.route('/quotes', methods=['POST'])
+@statement_budget(3)
 def create_quote():
     """
     Generate FX quote
@@ -51,7 +66,64 @@ def create_quote():
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@fx_bp.route('/quotes/batch', methods=['POST'])
+@statement_budget(2)
+def create_quotes_batch():
+    """
+    Generate many FX quotes in one request
+
+    Request body:
+    {
+        "quotes": [
+            {"from_currency": "USD", "to_currency": "KES", "amount": "100.00"},
+            {"from_currency": "EUR", "to_currency": "NGN", "amount": "250.00"}
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+
+        quote_requests = data.get('quotes')
+
+        if not isinstance(quote_requests, list) or not quote_requests:
+            return jsonify({'error': 'Missing required field: quotes (non-empty list)'}), 400
+
+        max_batch_size = current_app.config['MAX_BATCH_SIZE']
+        if len(quote_requests) > max_batch_size:
+            return jsonify({
+                'error': f'Batch size {len(quote_requests)} exceeds maximum of {max_batch_size}'
+            }), 400
+
+        results = FXService.generate_quotes(quote_requests)
+
+        items = []
+        for result in results:
+            if 'quote' in result:
+                items.append({'index': result['index'], 'success': True,
+                              'data': result['quote'].to_dict()})
+            else:
+                items.append({'index': result['index'], 'success': False,
+                              'error': result['error']})
+
+        created = sum(1 for item in items if item['success'])
+
+        return jsonify({
+            'success': created > 0,
+            'data': items,
+            'count': len(items),
+            'created': created,
+            'failed': len(items) - created
+        }), 201 if created else 400
+
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @fx_bp.route('/quotes/<quote_id>', methods=['GET'])
+@statement_budget(2)
 def get_quote(quote_id):
     """Get quote by ID"""
     try:
@@ -68,6 +140,9 @@ def get_quote(quote_id):
 
 
 @fx_bp.route('/transactions', methods=['POST'])
+# Key lookup, buffer flush, claim and writes, then the replay lookups after
+# losing a race to a concurrent execute of the same quote or key
+@statement_budget(10)
 def execute_transaction():
     """
     Execute FX transaction from quote
@@ -77,6 +152,11 @@ def execute_transaction():
         "quote_id": "uuid-here",
         "idempotency_key": "optional-key"
     }
+    or, for a stateless quote:
+    {
+        "quote_token": "signed-token",
+        "idempotency_key": "optional-key"
+    }
     """
     try:
         data = request.get_json()
@@ -85,12 +165,16 @@ def execute_transaction():
             return jsonify({'error': 'Request body is required'}), 400
 
         quote_id = data.get('quote_id')
+        quote_token = data.get('quote_token')
         idempotency_key = data.get('idempotency_key')
 
-        if not quote_id:
+        if not quote_id and not quote_token:
             return jsonify({'error': 'Missing required field: quote_id'}), 400
 
-        transaction = FXService.execute_quote(quote_id, idempotency_key)
+        if quote_token:
+            transaction = FXService.execute_quote_token(quote_token, idempotency_key)
+        else:
+            transaction = FXService.execute_quote(quote_id, idempotency_key)
 
         return jsonify({
             'success': True,
@@ -103,15 +187,113 @@ def execute_transaction():
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@fx_bp.route('/transactions/batch', methods=['POST'])
+# Room for one retry after a concurrent execute wins the commit
+@statement_budget(10)
+def execute_transactions_batch():
+    """
+    Execute many quotes with a single commit
+
+    Request body:
+    {
+        "quote_ids": ["uuid-1", "uuid-2"]
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({'error': 'Request body is required'}), 400
+
+        quote_ids = data.get('quote_ids')
+
+        if (not isinstance(quote_ids, list) or not quote_ids
+                or not all(isinstance(quote_id, str) for quote_id in quote_ids)):
+            return jsonify({'error': 'Missing required field: quote_ids (non-empty list of strings)'}), 400
+
+        max_batch_size = current_app.config['MAX_BATCH_SIZE']
+        if len(quote_ids) > max_batch_size:
+            return jsonify({
+                'error': f'Batch size {len(quote_ids)} exceeds maximum of {max_batch_size}'
+            }), 400
+
+        results = FXService.execute_quotes(quote_ids)
+
+        items = []
+        for result in results:
+            item = {
+                'index': result['index'],
+                'quote_id': result['quote_id'],
+                'status': result['status'],
+                'success': 'transaction' in result
+            }
+            if item['success']:
+                item['data'] = result['transaction'].to_dict()
+            else:
+                item['error'] = result['error']
+            items.append(item)
+
+        succeeded = sum(1 for item in items if item['success'])
+
+        return jsonify({
+            'success': succeeded > 0,
+            'data': items,
+            'count': len(items),
+            'executed': sum(1 for item in items if item['status'] == 'executed'),
+            'failed': len(items) - succeeded
+        }), 201 if succeeded else 400
+
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@fx_bp.route('/transactions/volume', methods=['GET'])
+@statement_budget(1)
+def get_transaction_volume():
+    """
+    Get executed volume per currency pair
+
+    Query parameters:
+        from, to: ISO 8601 bounds on created_at (from inclusive, to exclusive)
+    """
+    try:
+        volume = FXService.get_transaction_volume(
+            _parse_datetime_arg('from'), _parse_datetime_arg('to')
+        )
+        return jsonify({
+            'success': True,
+            'data': volume,
+            'count': len(volume)
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
 @fx_bp.route('/transactions/<transaction_id>', methods=['GET'])
+@statement_budget(2)
 def get_transaction(transaction_id):
-    """Get transaction by ID"""
+    """
+    Get transaction by ID
+
+    Transactions never change once executed, so the response may be cached
+    indefinitely. A conditional GET is answered 304 once the transaction is
+    found, so a guessed tag or If-None-Match: * still gets 404 for an
+    unknown id.
+    """
     try:
         transaction = FXService.get_transaction(transaction_id)
-        return jsonify({
+        etag = f'transaction-{transaction.id}'
+        matched = matching_etag(etag)
+        if matched:
+            return not_modified(matched, IMMUTABLE)
+
+        return cacheable(jsonify({
             'success': True,
             'data': transaction.to_dict()
-        }), 200
+        }), etag, IMMUTABLE), 200
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
@@ -120,37 +302,108 @@ def get_transaction(transaction_id):
 
 
 @fx_bp.route('/transactions', methods=['GET'])
+@statement_budget(2)
 def get_transaction_history():
-    """Get transaction history"""
+    """
+    Get transaction history, newest first
+
+    Query parameters:
+        limit: page size (1 to MAX_HISTORY_LIMIT, default 100)
+        cursor: next_cursor from the previous page
+        from, to: ISO 8601 bounds on created_at (from inclusive, to exclusive)
+        currency: only trades with this currency on either side
+        format: "ndjson" streams every matching row, one JSON object per line
+    """
     try:
+        cursor = request.args.get('cursor')
+        start = _parse_datetime_arg('from')
+        end = _parse_datetime_arg('to')
+        currency = request.args.get('currency')
+        if currency:
+            validate_currency(currency)
+
+        if request.args.get('format') == 'ndjson':
+            rows = FXService.stream_transaction_history(
+                cursor, start, end, currency,
+                batch_size=current_app.config['HISTORY_STREAM_BATCH_SIZE']
+            )
+            # Pull the first row eagerly so an invalid cursor fails as a 400
+            # before the streaming response has started
+            first = next(rows, None)
+
+            dumps = current_app.json.dumps
+
+            def generate():
+                if first is None:
+                    return
+                yield dumps(first) + '\n'
+                for row in rows:
+                    yield dumps(row) + '\n'
+
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
         limit = request.args.get('limit', 100, type=int)
-        transactions = FXService.get_transaction_history(limit)
+        limit = max(1, min(limit, current_app.config['MAX_HISTORY_LIMIT']))
+        transactions = FXService.get_transaction_history(limit, cursor, start, end, currency)
+
+        next_cursor = None
+        if len(transactions) == limit:
+            next_cursor = FXService.history_cursor(transactions[-1])
 
         return jsonify({
             'success': True,
             'data': transactions,
-            'count': len(transactions)
+            'count': len(transactions),
+            'next_cursor': next_cursor
         }), 200
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 
+def _parse_datetime_arg(name):
+    """Parse an optional ISO 8601 query parameter"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid '{name}' date: {value}")
+    # Timestamps are stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 @fx_bp.route('/rates', methods=['GET'])
+@statement_budget(1)
 def get_all_rates():
-    """Get all exchange rates"""
+    """
+    Get all exchange rates
+
+    Served from the rate snapshot with a strong ETag; a request whose
+    If-None-Match still matches gets 304 without touching the database.
+    """
     try:
-        rates = RateService.get_all_rates()
-        return jsonify({
+        etag, rates = RateService.get_published_rates()
+        matched = matching_etag(etag)
+        if matched:
+            return not_modified(matched, REVALIDATE)
+
+        return cacheable(jsonify({
             'success': True,
-            'data': rates
-        }), 200
+            'data': list(rates)
+        }), etag, REVALIDATE), 200
 
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 
 @fx_bp.route('/rates/update', methods=['POST'])
+@statement_budget(6)
 def update_rates():
     """
     Update exchange rates from external API
@@ -159,12 +412,20 @@ def update_rates():
     {
         "base_currency": "USD"
     }
+    or, to refresh several bases in one transaction:
+    {
+        "base_currencies": ["USD", "EUR"]
+    }
     """
     try:
-        data = request.get_json() or {}
-        base_currency = data.get('base_currency', 'USD')
+        data = request.get_json(silent=True) or {}
+        base_currencies = data.get('base_currencies') or [data.get('base_currency', 'USD')]
 
-        result = RateService.update_rates_from_api(base_currency)
+        if not isinstance(base_currencies, list) or not all(
+                isinstance(base, str) for base in base_currencies):
+            return jsonify({'error': 'base_currencies must be a list of currency codes'}), 400
+
+        result = RateService.update_rates_from_api(base_currencies)
 
         return jsonify({
             'success': True,
@@ -178,6 +439,7 @@ def update_rates():
 
 
 @fx_bp.route('/rates', methods=['POST'])
+@statement_budget(3)
 def set_rate():
     """
     Manually set exchange rate
@@ -221,3 +483,107 @@ def set_rate():
     except Exception as e:
         print("Exception: ", e)
         return jsonify({'error': 'Internal server error'}), 500
+
+
+@fx_bp.route('/admin/profile/cpu', methods=['GET'])
+@statement_budget(0)
+def profile_cpu():
+    """
+    Sample every thread's stack and return collapsed stacks for a flamegraph
+
+    Query parameters:
+        seconds: how long to sample (default 10, at most PROFILE_MAX_SECONDS)
+        interval_ms: time between samples (default 10)
+        idle: "1" keeps threads parked in waits, selects and accepts
+    """
+    denied = _check_admin_token()
+    if denied:
+        return denied
+    try:
+        seconds = _profile_seconds()
+        interval_ms = request.args.get('interval_ms', 10, type=float)
+        if not 1 <= interval_ms <= 1000:
+            raise ValueError("interval_ms must be between 1 and 1000")
+
+        if not profile_lock.acquire(blocking=False):
+            return jsonify({'error': 'A profile is already running'}), 409
+        try:
+            sampler = StackSampler(interval_ms / 1000, include_idle=request.args.get('idle') == '1')
+            sampler.run(seconds)
+        finally:
+            profile_lock.release()
+
+        response = Response(sampler.collapsed(), mimetype='text/plain')
+        response.headers['X-Profile-Samples'] = str(sampler.samples)
+        return response
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@fx_bp.route('/admin/profile/memory', methods=['GET'])
+@statement_budget(0)
+def profile_memory():
+    """
+    Return the allocations that grew most between two tracemalloc snapshots
+
+    Query parameters:
+        seconds: time between the snapshots (default 10, at most PROFILE_MAX_SECONDS)
+        limit: number of entries (default 20, at most 100)
+        group_by: "lineno" (default), "filename" or "traceback"
+        frames: frames kept per allocation when tracemalloc is started here (default 1, at most 25)
+    """
+    denied = _check_admin_token()
+    if denied:
+        return denied
+    try:
+        seconds = _profile_seconds()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        group_by = request.args.get('group_by', 'lineno')
+        if group_by not in ('lineno', 'filename', 'traceback'):
+            raise ValueError("group_by must be one of: lineno, filename, traceback")
+        frames = max(1, min(request.args.get('frames', 1, type=int), 25))
+
+        if not profile_lock.acquire(blocking=False):
+            return jsonify({'error': 'A profile is already running'}), 409
+        try:
+            allocations = allocation_diff(seconds, limit, group_by, frames)
+        finally:
+            profile_lock.release()
+
+        return jsonify({
+            'success': True,
+            'data': allocations,
+            'seconds': seconds,
+            'group_by': group_by
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+def _check_admin_token():
+    """Return an error response unless the request carries ADMIN_TOKEN"""
+    expected = current_app.config['ADMIN_TOKEN']
+    if not expected:
+        # Admin endpoints do not exist until a token is configured
+        return jsonify({'error': 'Not found'}), 404
+    supplied = request.headers.get('Authorization', '')
+    if supplied.startswith('Bearer '):
+        supplied = supplied[len('Bearer '):]
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        return jsonify({'error': 'Admin token required'}), 401
+    return None
+
+
+def _profile_seconds():
+    """Parse the seconds query parameter of the profiling endpoints"""
+    seconds = request.args.get('seconds', 10, type=float)
+    max_seconds = current_app.config['PROFILE_MAX_SECONDS']
+    if not 0 < seconds <= max_seconds:
+        raise ValueError(f"seconds must be greater than 0 and at most {max_seconds}")
+    return seconds
@@ -0,0 +1,10 @@
+from flask import Blueprint, Response, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(current_app.extensions['metrics'].render(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.archive_index import ArchiveIndex
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+from app.utils.decimal_utils import to_decimal
+from app.utils.instrumentation import count
+
+QUOTE_FIELDS = ('id', 'from_currency', 'to_currency', 'from_amount', 'to_amount', 'exchange_rate',
+                'created_at', 'expires_at', 'is_executed', 'executed_at')
+TRANSACTION_FIELDS = ('id', 'quote_id', 'from_currency', 'to_currency', 'from_amount', 'to_amount',
+                      'exchange_rate', 'status', 'created_at')
+_DECIMAL_FIELDS = ('from_amount', 'to_amount', 'exchange_rate')
+_DATETIME_FIELDS = ('created_at', 'expires_at', 'executed_at')
+
+
+class ArchiveService:
+    """
+    Keep the quotes and transactions tables at a steady size
+
+    Expired quotes that were never executed are deleted. Transactions older
+    than ARCHIVE_AFTER_SECONDS are moved, together with their quotes, into
+    compressed segment files; archive_index records where each id went so
+    lookups by id still succeed on a cold path. Each batch is its own
+    transaction, and the segment is written and synced before the rows are
+    deleted, so an interrupted sweep never loses data.
+    """
+
+    @staticmethod
+    def sweep(batch_size=None):
+        """
+        Run both cleanup steps until nothing is left to do
+
+        Returns:
+            Dict with expired_deleted and archived counts
+        """
+        return {
+            'expired_deleted': ArchiveService.delete_expired_quotes(batch_size),
+            'archived': ArchiveService.archive_transactions(batch_size),
+        }
+
+    @staticmethod
+    def delete_expired_quotes(batch_size=None):
+        """
+        Delete unexecuted quotes that expired more than QUOTE_EXPIRED_RETENTION_SECONDS ago
+
+        Returns:
+            Number of quotes deleted
+        """
+        batch_size = batch_size or current_app.config['QUOTE_SWEEP_BATCH_SIZE']
+        deleted = 0
+
+        while True:
+            cutoff = datetime.utcnow() - timedelta(
+                seconds=current_app.config['QUOTE_EXPIRED_RETENTION_SECONDS']
+            )
+            # Walks ix_quotes_expires_at from the oldest expiry
+            ids = [row.id for row in db.session.query(Quote.id).filter(
+                Quote.expires_at <= cutoff,
+                Quote.is_executed.is_(False)
+            ).limit(batch_size).all()]
+
+            if not ids:
+                break
+
+            # Re-check is_executed so a quote executed since the select survives
+            removed = Quote.query.filter(
+                Quote.id.in_(ids),
+                Quote.is_executed.is_(False)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += removed
+            count('quotes_swept', 'deleted_expired', amount=removed)
+
+            if len(ids) < batch_size:
+                break
+
+        return deleted
+
+    @staticmethod
+    def archive_transactions(batch_size=None):
+        """
+        Move transactions older than ARCHIVE_AFTER_SECONDS and their quotes to the archive
+
+        Does nothing while ARCHIVE_AFTER_SECONDS is 0 (the default).
+
+        Returns:
+            Number of transactions archived
+        """
+        if not current_app.config['ARCHIVE_AFTER_SECONDS']:
+            return 0
+
+        batch_size = batch_size or current_app.config['QUOTE_SWEEP_BATCH_SIZE']
+        store = current_app.extensions['archive_store']
+        archived = 0
+
+        while True:
+            cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['ARCHIVE_AFTER_SECONDS'])
+            transactions = Transaction.query.filter(
+                Transaction.created_at < cutoff
+            ).order_by(Transaction.created_at, Transaction.id).limit(batch_size).all()
+
+            if not transactions:
+                break
+
+            quote_ids = [transaction.quote_id for transaction in transactions]
+            quotes = {quote.id: quote for quote in Quote.query.filter(Quote.id.in_(quote_ids)).all()}
+            records = [
+                {
+                    'quote': ArchiveService._serialize(quotes[transaction.quote_id], QUOTE_FIELDS)
+                    if transaction.quote_id in quotes else None,
+                    'transaction': ArchiveService._serialize(transaction, TRANSACTION_FIELDS),
+                }
+                for transaction in transactions
+            ]
+
+            segment, offset, length = store.append(records)
+
+            entries = []
+            for transaction in transactions:
+                entries.append({'record_id': transaction.id, 'kind': 'transaction'})
+                if transaction.quote_id in quotes:
+                    entries.append({'record_id': transaction.quote_id, 'kind': 'quote'})
+            for entry in entries:
+                db.session.add(ArchiveIndex(segment=segment, offset=offset, length=length, **entry))
+
+            Transaction.query.filter(
+                Transaction.id.in_([transaction.id for transaction in transactions])
+            ).delete(synchronize_session=False)
+            Quote.query.filter(Quote.id.in_(list(quotes))).delete(synchronize_session=False)
+
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another sweeper archived these rows first; the member just
+                # written is unreferenced and harmless
+                db.session.rollback()
+                break
+            archived += len(transactions)
+            count('quotes_swept', 'archived', amount=len(transactions))
+
+            if len(transactions) < batch_size:
+                break
+
+        return archived
+
+    @staticmethod
+    def find_quote(quote_id):
+        """Return an archived quote as a detached Quote, or None"""
+        record = ArchiveService._find_record(quote_id, 'quote', 'quote', 'id')
+        return Quote(**ArchiveService._deserialize(record['quote'])) if record else None
+
+    @staticmethod
+    def find_transaction(transaction_id):
+        """Return an archived transaction as a detached Transaction, or None"""
+        record = ArchiveService._find_record(transaction_id, 'transaction', 'transaction', 'id')
+        return Transaction(**ArchiveService._deserialize(record['transaction'])) if record else None
+
+    @staticmethod
+    def find_transactions_for_quotes(quote_ids):
+        """
+        Return the archived transactions of archived quotes
+
+        Returns:
+            Dict of {quote id: Transaction} for the ids found in the archive
+        """
+        if not quote_ids:
+            return {}
+
+        store = current_app.extensions['archive_store']
+        found = {}
+        for entry in ArchiveIndex.query.filter(
+            ArchiveIndex.record_id.in_(quote_ids),
+            ArchiveIndex.kind == 'quote'
+        ).all():
+            for record in store.read(entry.segment, entry.offset, entry.length):
+                quote = record['quote']
+                if quote and quote['id'] == entry.record_id:
+                    found[entry.record_id] = Transaction(
+                        **ArchiveService._deserialize(record['transaction'])
+                    )
+                    break
+        return found
+
+    @staticmethod
+    def _find_record(record_id, kind, section, field):
+        entry = db.session.get(ArchiveIndex, record_id)
+        if entry is None or entry.kind != kind:
+            return None
+
+        records = current_app.extensions['archive_store'].read(entry.segment, entry.offset, entry.length)
+        for record in records:
+            if record[section] and record[section][field] == record_id:
+                return record
+        return None
+
+    @staticmethod
+    def _serialize(obj, fields):
+        data = {}
+        for field in fields:
+            value = getattr(obj, field)
+            if field in _DECIMAL_FIELDS:
+                value = str(value)
+            elif field in _DATETIME_FIELDS and value is not None:
+                value = value.isoformat()
+            data[field] = value
+        return data
+
+    @staticmethod
+    def _deserialize(data):
+        fields = dict(data)
+        for field in _DECIMAL_FIELDS:
+            fields[field] = to_decimal(fields[field])
+        for field in _DATETIME_FIELDS:
+            if fields.get(field):
+                fields[field] = datetime.fromisoformat(fields[field])
+        return fields
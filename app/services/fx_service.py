@@ -1,17 +1,30 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask import current_app
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.quote import Quote
 from app.models.transaction import Transaction
+from app.services.archive_service import ArchiveService
+from app.services.idempotency_service import IdempotencyService
 from app.services.rate_service import RateService
-from app.utils.decimal_utils import to_decimal, round_currency, calculate_spread
-from app.utils.validators import validate_currency_pair, validate_amount
+from app.utils.decimal_utils import to_decimal, round_currency
+from app.utils.fixed_point import currency_places, from_minor_units
+from app.utils.ids import generate_id
+from app.utils.instrumentation import count
+from app.utils.metrics import timed
+from app.utils.tracing import span, traced
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.quote_tokens import sign_quote, verify_quote
+from app.utils.validators import validate_currency_pair, validate_amount, validate_idempotency_key
 
 
 class FXService:
     """Service for FX operations - quotes and transactions"""
 
     @staticmethod
+    @timed('generate_quote')
+    @traced('FXService.generate_quote')
     def generate_quote(from_currency, to_currency, amount):
         """
         Generate an FX quote
@@ -32,12 +45,29 @@ class FXService:
         base_rate = RateService.get_rate(from_currency, to_currency)
 
         # Apply spread (customer pays spread on conversion)
+        pricer = current_app.extensions['pricer']
         buy_spread_bps = current_app.config['BUY_SPREAD_BPS']
-        rate_with_spread = calculate_spread(base_rate, buy_spread_bps, is_buy=True)
+        rate_with_spread = pricer.apply_spread(base_rate, buy_spread_bps, is_buy=True)
+
+        # Stateless quotes are returned as a signed token and never stored;
+        # write-behind quotes are stored later by the buffer's flusher
+        if current_app.config['STATELESS_QUOTES'] or \
+                current_app.config['QUOTE_WRITE_MODE'] == 'write_behind':
+            created_at = datetime.utcnow()
+            expires_at = created_at + timedelta(seconds=current_app.config['QUOTE_VALIDITY_SECONDS'])
+            row = FXService._quote_row(
+                from_currency, to_currency, amount_decimal, rate_with_spread, created_at, expires_at
+            )
+            count('quotes_generated')
+            if current_app.config['STATELESS_QUOTES']:
+                return FXService._sign(Quote(**row))
+            current_app.extensions['quote_buffer'].add([row])
+            return Quote(**row)
 
         # Calculate target amount
-        converted_amount = amount_decimal * rate_with_spread
-        converted_amount_rounded = round_currency(converted_amount)
+        converted_amount_rounded = pricer.convert(
+            amount_decimal, rate_with_spread, currency_places(to_currency)
+        )
 
         # Create quote
         quote = Quote(
@@ -49,15 +79,189 @@ class FXService:
         )
 
         db.session.add(quote)
-        db.session.commit()
+        with span('generate_quote.commit'):
+            db.session.commit()
+        count('quotes_generated')
+
+        return quote
+
+    @staticmethod
+    @timed('generate_quotes')
+    @traced('FXService.generate_quotes')
+    def generate_quotes(quote_requests):
+        """
+        Generate many FX quotes in one pass
+
+        Each pair's rate is resolved and spread-adjusted once, every valid
+        quote is written with a single bulk insert and the batch is committed
+        once. Invalid items are reported without failing the batch.
+
+        Args:
+            quote_requests: List of dicts with from_currency, to_currency, amount
+
+        Returns:
+            List of dicts in request order, each with 'index' and either
+            'quote' (an unattached Quote object) or 'error' (a message)
+        """
+        pricer = current_app.extensions['pricer']
+        buy_spread_bps = current_app.config['BUY_SPREAD_BPS']
+        created_at = datetime.utcnow()
+        expires_at = created_at + timedelta(seconds=current_app.config['QUOTE_VALIDITY_SECONDS'])
+
+        rates = {}
+        rows = []
+        results = []
+
+        for index, item in enumerate(quote_requests):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("Each quote request must be an object")
+
+                from_currency = item.get('from_currency')
+                to_currency = item.get('to_currency')
+                amount = item.get('amount')
+
+                if not all([from_currency, to_currency, amount]):
+                    raise ValueError("Missing required fields: from_currency, to_currency, amount")
+
+                validate_currency_pair(from_currency, to_currency)
+                amount_decimal = validate_amount(amount)
+
+                pair = (from_currency, to_currency)
+                if pair not in rates:
+                    try:
+                        base_rate = RateService.get_rate(from_currency, to_currency)
+                        rates[pair] = pricer.apply_spread(base_rate, buy_spread_bps, is_buy=True)
+                    except ValueError as e:
+                        rates[pair] = e
+                rate_with_spread = rates[pair]
+                if isinstance(rate_with_spread, ValueError):
+                    raise rate_with_spread
 
+                row = FXService._quote_row(
+                    from_currency, to_currency, amount_decimal, rate_with_spread,
+                    created_at, expires_at
+                )
+            except ValueError as e:
+                results.append({'index': index, 'error': str(e)})
+                continue
+
+            rows.append(row)
+            results.append({'index': index, 'quote': Quote(**row)})
+
+        if current_app.config['STATELESS_QUOTES']:
+            for result in results:
+                if 'quote' in result:
+                    FXService._sign(result['quote'])
+        elif current_app.config['QUOTE_WRITE_MODE'] == 'write_behind':
+            current_app.extensions['quote_buffer'].add(rows)
+        elif rows:
+            db.session.execute(insert(Quote), [Quote.storage_row(row) for row in rows])
+            db.session.commit()
+        count('quotes_generated', amount=len(rows))
+
+        return results
+
+    @staticmethod
+    def _quote_row(from_currency, to_currency, amount_decimal, rate_with_spread,
+                   created_at, expires_at):
+        """
+        Build the column values of a new quote
+
+        Values are rounded to their column precision up front so the quote
+        matches what a reload from the database gives.
+        """
+        pricer = current_app.extensions['pricer']
+        return {
+            'id': generate_id(),
+            'from_currency': from_currency,
+            'to_currency': to_currency,
+            'from_amount': round_currency(amount_decimal, currency_places(from_currency)),
+            'to_amount': pricer.convert(amount_decimal, rate_with_spread, currency_places(to_currency)),
+            'exchange_rate': pricer.round_rate(rate_with_spread),
+            'created_at': created_at,
+            'expires_at': expires_at,
+            'is_executed': False
+        }
+
+    @staticmethod
+    def _sign(quote):
+        """Attach a signed token to an unstored quote"""
+        quote.token = sign_quote(quote, current_app.config['SECRET_KEY'])
         return quote
 
     @staticmethod
+    @timed('execute_quote_token')
+    @traced('FXService.execute_quote_token')
+    def execute_quote_token(token, idempotency_key=None):
+        """
+        Execute a stateless quote from its signed token
+
+        The signature and expiry are checked without touching the database.
+        The quote and its transaction are then inserted in one commit; the
+        quote's primary key guarantees a token executes at most once across
+        workers, and a per-process store of executed token IDs answers
+        replays without attempting the insert.
+
+        Args:
+            token: Signed quote token returned by generate_quote
+            idempotency_key: Optional key to prevent duplicate executions
+
+        Returns:
+            Transaction object
+        """
+        fields = verify_quote(token, current_app.config['SECRET_KEY'])
+        quote_id = fields['id']
+        # The signature proves who issued the token, not that it is still
+        # acceptable: re-check what generate_quote validated
+        validate_currency_pair(fields['from_currency'], fields['to_currency'])
+        validate_amount(fields['from_amount'])
+        validate_amount(fields['to_amount'])
+        validate_amount(fields['exchange_rate'])
+
+        if idempotency_key:
+            validate_idempotency_key(idempotency_key)
+            transaction = FXService._replay_idempotency_key(idempotency_key, quote_id)
+            if transaction:
+                return transaction
+
+        executed_tokens = current_app.extensions['executed_tokens']
+        if quote_id in executed_tokens:
+            return FXService._get_existing_transaction(quote_id)
+
+        now = datetime.utcnow()
+        if now >= fields['expires_at']:
+            raise FXService._rejected('expired', f"Quote {quote_id} has expired")
+
+        quote = Quote(is_executed=True, executed_at=now, **fields)
+        transaction = FXService._build_transaction(quote, now)
+        db.session.add(quote)
+        db.session.add(transaction)
+
+        try:
+            transaction = FXService._commit_execution(transaction, idempotency_key)
+        except IntegrityError:
+            # Executed concurrently by another worker
+            db.session.rollback()
+            transaction = FXService._get_existing_transaction(quote_id)
+
+        executed_tokens.add(quote_id, fields['expires_at'])
+        return transaction
+
+    @staticmethod
+    @timed('execute_quote')
+    @traced('FXService.execute_quote')
     def execute_quote(quote_id, idempotency_key=None):
         """
         Execute a quote to create a transaction
 
+        The execution strategy is chosen by QUOTE_EXECUTION_MODE:
+        'locking' fetches the quote with SELECT ... FOR UPDATE, 'optimistic'
+        claims it with a single conditional UPDATE.
+
+        A retry carrying a known idempotency key is answered from the key
+        store with the stored transaction, without reading the quote.
+
         Args:
             quote_id: ID of the quote to execute
             idempotency_key: Optional key to prevent duplicate executions
@@ -65,26 +269,186 @@ class FXService:
         Returns:
             Transaction object
         """
+        if idempotency_key:
+            validate_idempotency_key(idempotency_key)
+            transaction = FXService._replay_idempotency_key(idempotency_key, quote_id)
+            if transaction:
+                return transaction
+
+        FXService._flush_buffered([quote_id])
+
+        if current_app.config['QUOTE_EXECUTION_MODE'] == 'optimistic':
+            return FXService._execute_quote_optimistic(quote_id, idempotency_key)
+        return FXService._execute_quote_locking(quote_id, idempotency_key)
+
+    @staticmethod
+    def _flush_buffered(quote_ids):
+        """Write the quote buffer first if any of the quotes are still in it"""
+        quote_buffer = current_app.extensions['quote_buffer']
+        if quote_buffer.contains_any(quote_ids):
+            quote_buffer.flush()
+
+    @staticmethod
+    def _replay_idempotency_key(idempotency_key, quote_id):
+        """Return the transaction stored for a key, or None if the key is new"""
+        record = IdempotencyService.lookup(idempotency_key)
+        if record is None:
+            return None
+
+        recorded_quote_id, transaction_id = record
+        if recorded_quote_id != quote_id:
+            raise FXService._rejected(
+                'idempotency_conflict',
+                f"Idempotency key {idempotency_key} was already used for a different quote"
+            )
+        transaction = db.session.get(Transaction, transaction_id)
+        if transaction is not None:
+            count('quote_executions', 'replayed')
+        return transaction
+
+    @staticmethod
+    def _commit_execution(transaction, idempotency_key):
+        """Commit a new transaction together with its idempotency key"""
+        quote_id = transaction.quote_id
+        try:
+            # Staging autoflushes the transaction, so a lost race can surface here too
+            if idempotency_key:
+                IdempotencyService.stage(idempotency_key, quote_id, transaction.id)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request stored the same key, or executed the same
+            # quote (transactions.quote_id is unique), first
+            db.session.rollback()
+            if idempotency_key:
+                existing = FXService._replay_idempotency_key(idempotency_key, quote_id)
+                if existing is not None:
+                    return existing
+            existing = Transaction.query.filter_by(quote_id=quote_id).first()
+            if existing is None:
+                raise
+            count('quote_executions', 'replayed')
+            return existing
+
+        if idempotency_key:
+            IdempotencyService.remember(idempotency_key, transaction.quote_id, transaction.id)
+        count('quote_executions', 'executed')
+        return transaction
+
+    @staticmethod
+    def _count_batch_result(status):
+        """Count one execute_quotes result under the single-execute metrics"""
+        if status == 'executed':
+            count('quote_executions', 'executed')
+        elif status == 'already_executed':
+            count('quote_executions', 'replayed')
+        else:
+            count('quote_rejections', status)
+
+    @staticmethod
+    def _rejected(reason, message):
+        """Count a refused execution and build the error to raise"""
+        count('quote_rejections', reason)
+        return ValueError(message)
+
+    @staticmethod
+    def _execute_quote_locking(quote_id, idempotency_key=None):
+        """Execute a quote under a row lock taken with SELECT ... FOR UPDATE"""
         # Fetch quote with row-level locking to prevent race conditions
-        quote = db.session.query(Quote).filter_by(id=quote_id).with_for_update().first()
+        with span('execute_quote.locked_fetch'):
+            quote = db.session.query(Quote).filter_by(id=quote_id).with_for_update().first()
 
         if not quote:
-            raise ValueError(f"Quote {quote_id} not found")
+            return FXService._get_archived_transaction(quote_id)
 
         # Check if already executed (idempotency)
         if quote.is_executed:
-            # Return existing transaction
-            transaction = Transaction.query.filter_by(quote_id=quote_id).first()
-            if transaction:
-                return transaction
-            raise ValueError(f"Quote {quote_id} was already executed but transaction not found")
+            return FXService._get_existing_transaction(quote_id)
 
-        # Validate quote is not expired
-        if quote.is_expired():
-            raise ValueError(f"Quote {quote_id} has expired")
+        # Validate quote is not expired; the transaction is stamped with the
+        # same instant so it can never postdate the expiry it was checked against
+        now = datetime.utcnow()
+        if now >= quote.expires_at:
+            raise FXService._rejected('expired', f"Quote {quote_id} has expired")
 
         # Create transaction
-        transaction = Transaction(
+        transaction = FXService._build_transaction(quote, now)
+
+        # Mark quote as executed
+        quote.is_executed = True
+        quote.executed_at = now
+
+        db.session.add(transaction)
+        return FXService._commit_execution(transaction, idempotency_key)
+
+    @staticmethod
+    def _execute_quote_optimistic(quote_id, idempotency_key=None):
+        """
+        Execute a quote by claiming it with one conditional UPDATE
+
+        The UPDATE only matches a quote that exists, is unexecuted and has not
+        expired, so at most one concurrent caller sees a row count of one.
+        Every other caller falls back to the idempotent read.
+        """
+        now = datetime.utcnow()
+        claim = (
+            update(Quote)
+            .where(Quote.id == quote_id, Quote.is_executed.is_(False), Quote.expires_at > now)
+            .values(is_executed=True, executed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.engine.dialect.update_returning:
+            quote = db.session.execute(claim.returning(Quote)).scalars().first()
+        else:
+            result = db.session.execute(claim)
+            quote = None
+            if result.rowcount == 1:
+                quote = db.session.query(Quote).filter_by(id=quote_id).first()
+
+        if quote is None:
+            db.session.rollback()
+            return FXService._resolve_unclaimed_quote(quote_id)
+
+        transaction = FXService._build_transaction(quote, now)
+        db.session.add(transaction)
+        return FXService._commit_execution(transaction, idempotency_key)
+
+    @staticmethod
+    def _resolve_unclaimed_quote(quote_id):
+        """Explain why a quote could not be claimed, or return its existing transaction"""
+        quote = db.session.query(Quote).filter_by(id=quote_id).first()
+
+        if not quote:
+            return FXService._get_archived_transaction(quote_id)
+
+        if quote.is_executed:
+            return FXService._get_existing_transaction(quote_id)
+
+        raise FXService._rejected('expired', f"Quote {quote_id} has expired")
+
+    @staticmethod
+    def _get_archived_transaction(quote_id):
+        """Answer a re-execution of an archived quote with its transaction (cold path)"""
+        transaction = ArchiveService.find_transactions_for_quotes([quote_id]).get(quote_id)
+        if transaction:
+            count('quote_executions', 'replayed')
+            return transaction
+        raise FXService._rejected('not_found', f"Quote {quote_id} not found")
+
+    @staticmethod
+    def _get_existing_transaction(quote_id):
+        """Return the transaction of an executed quote (idempotent replay)"""
+        transaction = Transaction.query.filter_by(quote_id=quote_id).first()
+        if transaction:
+            count('quote_executions', 'replayed')
+            return transaction
+        raise ValueError(f"Quote {quote_id} was already executed but transaction not found")
+
+    @staticmethod
+    def _build_transaction(quote, created_at=None):
+        return Transaction(
+            id=generate_id(),
+            created_at=created_at or datetime.utcnow(),
             quote_id=quote.id,
             from_currency=quote.from_currency,
             to_currency=quote.to_currency,
@@ -94,36 +458,269 @@ class FXService:
             status='completed'
         )
 
-        # Mark quote as executed
-        quote.is_executed = True
-        quote.executed_at = datetime.utcnow()
+    @staticmethod
+    @timed('execute_quotes')
+    @traced('FXService.execute_quotes')
+    def execute_quotes(quote_ids):
+        """
+        Execute many quotes with a single group commit
 
-        db.session.add(transaction)
-        db.session.commit()
+        All quotes are locked and validated with one query, existing
+        transactions for already-executed quotes are fetched with one query,
+        and new transactions are written with one bulk insert before a single
+        commit. Idempotency and expiry rules match execute_quote.
 
-        return transaction
+        Args:
+            quote_ids: List of quote IDs; repeated IDs resolve to the same transaction
+
+        Returns:
+            List of dicts in request order, each with 'index', 'quote_id',
+            'status' and either 'transaction' or 'error'. Status is one of
+            'executed', 'already_executed', 'expired', 'not_found' or
+            'conflict' (still racing other executions after
+            BATCH_EXECUTE_ATTEMPTS commits).
+        """
+        unique_ids = list(dict.fromkeys(quote_ids))
+        FXService._flush_buffered(unique_ids)
+
+        for _ in range(current_app.config['BATCH_EXECUTE_ATTEMPTS']):
+            quotes = {
+                quote.id: quote
+                for quote in db.session.query(Quote).filter(
+                    Quote.id.in_(unique_ids)
+                ).with_for_update().all()
+            }
+
+            executed_ids = [quote_id for quote_id, quote in quotes.items() if quote.is_executed]
+            transactions = {}
+            if executed_ids:
+                transactions = {
+                    transaction.quote_id: transaction
+                    for transaction in Transaction.query.filter(
+                        Transaction.quote_id.in_(executed_ids)
+                    ).all()
+                }
+
+            archived = ArchiveService.find_transactions_for_quotes(
+                [quote_id for quote_id in unique_ids if quote_id not in quotes]
+            )
+
+            now = datetime.utcnow()
+            outcomes = {}
+            rows = []
+
+            for quote_id in unique_ids:
+                quote = quotes.get(quote_id)
+
+                if not quote and quote_id in archived:
+                    outcomes[quote_id] = ('already_executed', archived[quote_id])
+                elif not quote:
+                    outcomes[quote_id] = ('not_found', f"Quote {quote_id} not found")
+                elif quote.is_executed:
+                    transaction = transactions.get(quote_id)
+                    if transaction:
+                        outcomes[quote_id] = ('already_executed', transaction)
+                    else:
+                        outcomes[quote_id] = (
+                            'not_found',
+                            f"Quote {quote_id} was already executed but transaction not found"
+                        )
+                elif now >= quote.expires_at:
+                    outcomes[quote_id] = ('expired', f"Quote {quote_id} has expired")
+                else:
+                    row = {
+                        'id': generate_id(),
+                        'quote_id': quote.id,
+                        'from_currency': quote.from_currency,
+                        'to_currency': quote.to_currency,
+                        'from_amount': quote.from_amount,
+                        'to_amount': quote.to_amount,
+                        'exchange_rate': quote.exchange_rate,
+                        'status': 'completed',
+                        'created_at': now
+                    }
+                    rows.append(row)
+                    outcomes[quote_id] = ('executed', Transaction(**row))
+
+            if rows:
+                db.session.execute(
+                    update(Quote)
+                    .where(Quote.id.in_([row['quote_id'] for row in rows]))
+                    .values(is_executed=True, executed_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.execute(insert(Transaction), [Transaction.storage_row(row) for row in rows])
+            try:
+                db.session.commit()
+                break
+            except IntegrityError:
+                # Some quotes were executed concurrently; the next attempt
+                # finds them executed and settles on already_executed
+                db.session.rollback()
+        else:
+            for quote_id, (status, _) in outcomes.items():
+                if status == 'executed':
+                    outcomes[quote_id] = (
+                        'conflict',
+                        f"Quote {quote_id} could not be executed due to concurrent executions; retry"
+                    )
+
+        results = []
+        seen = set()
+        for index, quote_id in enumerate(quote_ids):
+            status, value = outcomes[quote_id]
+            if status == 'executed' and quote_id in seen:
+                status = 'already_executed'
+            seen.add(quote_id)
+
+            result = {'index': index, 'quote_id': quote_id, 'status': status}
+            FXService._count_batch_result(status)
+            if isinstance(value, Transaction):
+                result['transaction'] = value
+            else:
+                result['error'] = value
+            results.append(result)
+
+        return results
 
     @staticmethod
     def get_quote(quote_id):
-        """Retrieve a quote by ID"""
-        quote = Quote.query.get(quote_id)
+        """
+        Retrieve a quote by ID
+
+        Quotes not yet flushed from the buffer are served from memory, and
+        archived quotes from the segment files.
+        """
+        row = current_app.extensions['quote_buffer'].get(quote_id)
+        if row is not None:
+            return Quote(**row)
+
+        quote = Quote.query.get(quote_id) or ArchiveService.find_quote(quote_id)
         if not quote:
             raise ValueError(f"Quote {quote_id} not found")
         return quote
 
     @staticmethod
     def get_transaction(transaction_id):
-        """Retrieve a transaction by ID"""
-        transaction = Transaction.query.get(transaction_id)
+        """Retrieve a transaction by ID, falling back to the archive"""
+        transaction = Transaction.query.get(transaction_id) or ArchiveService.find_transaction(transaction_id)
         if not transaction:
             raise ValueError(f"Transaction {transaction_id} not found")
         return transaction
 
     @staticmethod
-    def get_transaction_history(limit=100):
-        """Get recent transaction history"""
-        transactions = Transaction.query.order_by(
-            Transaction.created_at.desc()
-        ).limit(limit).all()
+    def get_transaction_history(limit=100, cursor=None, start=None, end=None, currency=None):
+        """
+        Get recent transaction history, newest first
+
+        Pages are addressed by keyset: pass the cursor returned for the last
+        row of the previous page (see history_cursor) to continue after it.
+        The (created_at, id) index makes every page an index range scan.
+
+        Args:
+            limit: Maximum number of rows
+            cursor: Optional cursor of the last row already seen
+            start: Optional inclusive lower bound on created_at
+            end: Optional exclusive upper bound on created_at
+            currency: Optional currency matching either side of the trade
+        """
+        rows = FXService._history_query(cursor, start, end, currency).limit(limit).all()
+
+        return [Transaction.row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def stream_transaction_history(cursor=None, start=None, end=None, currency=None,
+                                   batch_size=1000):
+        """
+        Yield the full filtered history as dicts, newest first
+
+        Rows are fetched in batches with yield_per so memory stays flat
+        regardless of how many rows are exported.
+        """
+        query = FXService._history_query(cursor, start, end, currency).yield_per(batch_size)
+        for row in query:
+            yield Transaction.row_to_dict(row)
+
+    @staticmethod
+    def get_transaction_volume(start=None, end=None):
+        """
+        Total executed volume per currency pair
+
+        Amounts stored as minor units are summed as integers in SQL; rows
+        still held in the Numeric columns (numeric mode, or not yet migrated)
+        are summed alongside, so the totals cover both. Without a date range
+        the query is answered from idx_transactions_volume alone.
+
+        Args:
+            start: Optional inclusive lower bound on created_at
+            end: Optional exclusive upper bound on created_at
+
+        Returns:
+            List of dicts with the pair, transaction count and summed amounts
+        """
+        query = db.session.query(
+            Transaction.from_currency,
+            Transaction.to_currency,
+            func.count(),
+            func.sum(Transaction.from_amount_minor),
+            func.sum(Transaction.to_amount_minor),
+            func.sum(Transaction.from_amount_numeric),
+            func.sum(Transaction.to_amount_numeric)
+        )
+        if start:
+            query = query.filter(Transaction.created_at >= start)
+        if end:
+            query = query.filter(Transaction.created_at < end)
+
+        rows = query.group_by(Transaction.from_currency, Transaction.to_currency) \
+            .order_by(Transaction.from_currency, Transaction.to_currency).all()
+
+        volume = []
+        for from_currency, to_currency, count, from_minor, to_minor, from_numeric, to_numeric in rows:
+            volume.append({
+                'from_currency': from_currency,
+                'to_currency': to_currency,
+                'count': count,
+                'from_amount': str(FXService._sum_amounts(from_minor, from_numeric)),
+                'to_amount': str(FXService._sum_amounts(to_minor, to_numeric))
+            })
+        return volume
+
+    @staticmethod
+    def _sum_amounts(minor_total, numeric_total):
+        total = from_minor_units(minor_total or 0)
+        if numeric_total is not None:
+            total += to_decimal(numeric_total)
+        return round_currency(total)
+
+    @staticmethod
+    def history_cursor(transaction):
+        """Return the cursor pointing after a transaction dict from the history"""
+        return encode_cursor(
+            datetime.fromisoformat(transaction['created_at']),
+            transaction['transaction_id']
+        )
+
+    @staticmethod
+    def _history_query(cursor=None, start=None, end=None, currency=None):
+        # Plain column rows: history pages are serialized straight from the
+        # row instead of building and tracking a Transaction per row
+        query = db.session.query(*Transaction.dict_columns())
+
+        if cursor:
+            created_at, transaction_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Transaction.created_at < created_at,
+                and_(Transaction.created_at == created_at, Transaction.id < transaction_id)
+            ))
+        if start:
+            query = query.filter(Transaction.created_at >= start)
+        if end:
+            query = query.filter(Transaction.created_at < end)
+        if currency:
+            query = query.filter(or_(
+                Transaction.from_currency == currency,
+                Transaction.to_currency == currency
+            ))
 
-        return [t.to_dict() for t in transactions]
\ No newline at end of file
+        return query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
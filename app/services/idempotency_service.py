@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyService:
+    """Service for client idempotency keys on quote execution"""
+
+    @staticmethod
+    def lookup(key):
+        """
+        Find the execution recorded for an idempotency key
+
+        The in-memory LRU is consulted first; on a miss the unique index on
+        idempotency_keys is used and a live result is cached.
+
+        Returns:
+            (quote_id, transaction_id) tuple, or None if the key is unknown or expired
+        """
+        cache = current_app.extensions['idempotency_cache']
+        record = cache.get(key)
+        if record is not None:
+            return record
+
+        row = IdempotencyKey.query.filter_by(key=key).first()
+        if row is None or row.is_expired():
+            return None
+
+        record = (row.quote_id, row.transaction_id)
+        remaining = (row.expires_at - datetime.utcnow()).total_seconds()
+        cache.set(key, record, min(remaining, cache.ttl_seconds))
+        return record
+
+    @staticmethod
+    def stage(key, quote_id, transaction_id):
+        """
+        Add a key to the current session so it commits with the transaction
+
+        An expired row holding the same key is removed first so the unique
+        index does not reject the reuse.
+        """
+        now = datetime.utcnow()
+        IdempotencyKey.query.filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now
+        ).delete(synchronize_session=False)
+
+        ttl_seconds = current_app.config['IDEMPOTENCY_KEY_TTL_SECONDS']
+        db.session.add(IdempotencyKey(
+            key=key,
+            quote_id=quote_id,
+            transaction_id=transaction_id,
+            created_at=now,
+            expires_at=now + timedelta(seconds=ttl_seconds)
+        ))
+
+    @staticmethod
+    def remember(key, quote_id, transaction_id):
+        """Cache a committed key so retries skip the database"""
+        current_app.extensions['idempotency_cache'].set(key, (quote_id, transaction_id))
+
+    @staticmethod
+    def sweep_expired(batch_size=None):
+        """
+        Delete expired keys in bounded batches
+
+        Each batch is its own short transaction so the sweep never holds
+        locks on the table for long.
+
+        Returns:
+            Number of keys deleted
+        """
+        batch_size = batch_size or current_app.config['IDEMPOTENCY_SWEEP_BATCH_SIZE']
+        deleted = 0
+
+        while True:
+            now = datetime.utcnow()
+            ids = [row.id for row in db.session.query(IdempotencyKey.id).filter(
+                IdempotencyKey.expires_at <= now
+            ).limit(batch_size).all()]
+
+            if not ids:
+                break
+
+            IdempotencyKey.query.filter(
+                IdempotencyKey.id.in_(ids)
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            deleted += len(ids)
+
+            if len(ids) < batch_size:
+                break
+
+        return deleted
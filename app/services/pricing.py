@@ -0,0 +1,112 @@
+from app.utils.decimal_utils import (
+    to_decimal, round_currency, round_rate, calculate_spread, spread_multiplier
+)
+from app.utils.fixed_point import (
+    CURRENCY_PLACES, RATE_PLACES, from_minor_units, from_scaled, multiply, quantize, to_scaled
+)
+from app.utils.tracing import traced
+
+
+class DecimalPricer:
+    """
+    Prices quotes with Decimal arithmetic
+
+    This is the reference engine; every other engine must return
+    bit-identical Decimals for the same inputs.
+    """
+
+    @traced('pricer.apply_spread')
+    def apply_spread(self, rate, spread_bps, is_buy=True):
+        """Return the rate with a spread applied"""
+        return calculate_spread(rate, spread_bps, is_buy)
+
+    def convert(self, amount, rate, places=CURRENCY_PLACES):
+        """Return amount * rate rounded half-up to minor units of `places` decimal places"""
+        return round_currency(amount * rate, places)
+
+    def round_rate(self, rate):
+        """Return the rate rounded to its stored precision"""
+        return round_rate(rate)
+
+
+class FixedPointPricer(DecimalPricer):
+    """
+    Prices quotes with integer arithmetic on scaled integers
+
+    Spread multipliers for the configured spreads are converted once, and
+    the scaled form of every rate seen is cached, so a quote only converts
+    its amount and does one integer multiply and one integer rounding. See
+    app.utils.fixed_point for the rounding rules.
+    """
+
+    def __init__(self, spreads_bps=(), cache_size=4096):
+        self.cache_size = cache_size
+        self._multipliers = {}
+        # id(Decimal) -> (Decimal, value); holding the Decimal keeps the id
+        # from being reused while the entry exists
+        self._scaled = {}
+        self._adjusted = {}
+        self._rounded = {}
+        for spread_bps in spreads_bps:
+            self._multiplier(spread_bps, True)
+            self._multiplier(spread_bps, False)
+
+    @traced('pricer.apply_spread')
+    def apply_spread(self, rate, spread_bps, is_buy=True):
+        rate = to_decimal(rate)
+        key = (id(rate), spread_bps, is_buy)
+        cached = self._adjusted.get(key)
+        if cached is not None and cached[0] is rate:
+            return cached[1]
+
+        scaled = multiply(self._scaled_rate(rate), self._multiplier(spread_bps, is_buy))
+        adjusted = from_scaled(*scaled)
+        self._remember(self._scaled, id(adjusted), (adjusted, scaled))
+        self._remember(self._adjusted, key, (rate, adjusted))
+        return adjusted
+
+    def convert(self, amount, rate, places=CURRENCY_PLACES):
+        amount = to_decimal(amount)
+        return from_minor_units(
+            quantize(multiply(to_scaled(amount), self._scaled_rate(rate)), places), places
+        )
+
+    def round_rate(self, rate):
+        cached = self._rounded.get(id(rate))
+        if cached is not None and cached[0] is rate:
+            return cached[1]
+        rounded = from_scaled(quantize(self._scaled_rate(rate), RATE_PLACES), -RATE_PLACES)
+        self._remember(self._rounded, id(rate), (rate, rounded))
+        return rounded
+
+    def _multiplier(self, spread_bps, is_buy):
+        key = (spread_bps, is_buy)
+        multiplier = self._multipliers.get(key)
+        if multiplier is None:
+            multiplier = to_scaled(spread_multiplier(spread_bps, is_buy))
+            self._multipliers[key] = multiplier
+        return multiplier
+
+    def _scaled_rate(self, rate):
+        cached = self._scaled.get(id(rate))
+        if cached is not None and cached[0] is rate:
+            return cached[1]
+        rate = to_decimal(rate)
+        scaled = to_scaled(rate)
+        self._remember(self._scaled, id(rate), (rate, scaled))
+        return scaled
+
+    def _remember(self, cache, key, value):
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[key] = value
+
+
+def create_pricer(config):
+    """Build the pricing engine selected by PRICING_ENGINE"""
+    engine = config['PRICING_ENGINE']
+    if engine == 'decimal':
+        return DecimalPricer()
+    if engine == 'fixed_point':
+        return FixedPointPricer((config['BUY_SPREAD_BPS'], config['SELL_SPREAD_BPS']))
+    raise ValueError(f"Unknown PRICING_ENGINE: {engine}")
@@ -0,0 +1,163 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.services.archive_service import ArchiveService
+from app.services.fx_service import FXService
+from app.services.idempotency_service import IdempotencyService
+from app.services.rate_service import RateService
+from app.utils.ids import generate_id
+
+# "SCAN quotes" is a full table scan; "SCAN t USING [COVERING] INDEX ..." walks an index
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)')
+_TEMP_BTREE = 'USE TEMP B-TREE'
+
+
+class QueryAudit:
+    """
+    Run every service query and report the ones SQLite cannot answer from an index
+
+    Each step of the workload calls one service method while the SQL it
+    issues is captured; every captured SELECT, UPDATE and DELETE is then
+    passed through EXPLAIN QUERY PLAN. Steps that read a whole table on
+    purpose (the rate snapshot, the rates listing, all-time volume) are
+    marked as allowed and reported separately.
+    """
+
+    @staticmethod
+    def workload():
+        """
+        Named service calls covering every query the services issue
+
+        Returns:
+            List of (name, callable, scan_allowed)
+        """
+        state = {'key': f'audit-{generate_id()}'}
+
+        def generate_quote():
+            state['quote'] = FXService.generate_quote('USD', 'KES', '100.00')
+
+        def generate_quotes():
+            results = FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'EUR', 'amount': '50.00'},
+                {'from_currency': 'EUR', 'to_currency': 'NGN', 'amount': '75.00'},
+            ])
+            state['batch'] = [result['quote'].id for result in results]
+
+        def execute_locking():
+            current_app.config['QUOTE_EXECUTION_MODE'] = 'locking'
+            state['transaction'] = FXService.execute_quote(state['quote'].id, state['key'])
+
+        def execute_optimistic():
+            current_app.config['QUOTE_EXECUTION_MODE'] = 'optimistic'
+            quote = FXService.generate_quote('USD', 'NGN', '10.00')
+            FXService.execute_quote(quote.id)
+            FXService.execute_quote(quote.id)
+
+        def idempotent_replay():
+            current_app.extensions['idempotency_cache'].clear()
+            FXService.execute_quote(state['quote'].id, state['key'])
+
+        def cursor():
+            return FXService.history_cursor(state['transaction'].to_dict())
+
+        def sweep_idempotency_keys():
+            IdempotencyService.sweep_expired()
+
+        return [
+            ('load_rate_snapshot', RateService._load_entries, True),
+            ('get_all_rates', RateService.get_all_rates, True),
+            ('set_rate', lambda: RateService.set_rate('USD', 'KES', '130.00'), False),
+            ('set_rates', lambda: RateService.set_rates({'USD': {'EUR': '0.91', 'NGN': '1500'}}), False),
+            ('generate_quote', generate_quote, False),
+            ('generate_quotes', generate_quotes, False),
+            ('get_quote', lambda: FXService.get_quote(state['quote'].id), False),
+            ('execute_quote_locking', execute_locking, False),
+            ('execute_quote_optimistic', execute_optimistic, False),
+            ('idempotent_replay', idempotent_replay, False),
+            ('execute_quotes', lambda: FXService.execute_quotes(state['batch']), False),
+            ('get_transaction', lambda: FXService.get_transaction(state['transaction'].id), False),
+            ('history', lambda: FXService.get_transaction_history(100), False),
+            ('history_cursor', lambda: FXService.get_transaction_history(100, cursor()), False),
+            ('history_range', lambda: FXService.get_transaction_history(
+                100, start=datetime.utcnow() - timedelta(days=1), end=datetime.utcnow()), False),
+            ('history_currency', lambda: FXService.get_transaction_history(100, currency='KES'), False),
+            ('history_stream', lambda: list(FXService.stream_transaction_history()), False),
+            ('transaction_volume', FXService.get_transaction_volume, True),
+            ('transaction_volume_range', lambda: FXService.get_transaction_volume(
+                datetime.utcnow() - timedelta(days=1)), False),
+            ('sweep_idempotency_keys', sweep_idempotency_keys, False),
+            ('sweep_quotes', ArchiveService.sweep, False),
+            ('find_archived', lambda: ArchiveService.find_transaction(generate_id()), False),
+            ('find_archived_by_quote', lambda: FXService.execute_quotes([generate_id()]), False),
+        ]
+
+    @staticmethod
+    def run(steps=None):
+        """
+        Run the workload and explain every captured statement
+
+        Returns:
+            List of dicts with step, statement, plan, full_scans,
+            temp_btree and allowed keys, one per distinct statement
+        """
+        if db.engine.dialect.name != 'sqlite':
+            raise ValueError('The query audit uses EXPLAIN QUERY PLAN and needs SQLite')
+
+        mode = current_app.config['QUOTE_EXECUTION_MODE']
+        results = []
+        seen = set()
+        try:
+            for name, func, allowed in steps or QueryAudit.workload():
+                with QueryAudit._capture() as statements:
+                    func()
+                for statement, parameters in statements:
+                    if statement in seen:
+                        continue
+                    seen.add(statement)
+                    plan = QueryAudit.explain(statement, parameters)
+                    results.append({
+                        'step': name,
+                        'statement': statement,
+                        'plan': plan,
+                        'full_scans': [m.group(1) for m in map(_FULL_SCAN.match, plan) if m],
+                        'temp_btree': any(_TEMP_BTREE in line for line in plan),
+                        'allowed': allowed,
+                    })
+        finally:
+            current_app.config['QUOTE_EXECUTION_MODE'] = mode
+        return results
+
+    @staticmethod
+    def findings(results):
+        """Statements that scan a table without being allowed to"""
+        return [result for result in results if result['full_scans'] and not result['allowed']]
+
+    @staticmethod
+    def explain(statement, parameters=()):
+        """Return the EXPLAIN QUERY PLAN detail lines for a DBAPI statement"""
+        rows = db.session.connection().exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', tuple(parameters)
+        ).all()
+        return [row[-1] for row in rows]
+
+    @staticmethod
+    @contextmanager
+    def _capture():
+        """Collect (statement, parameters) for reads, updates and deletes"""
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().split(None, 1)[0].upper() not in ('SELECT', 'UPDATE', 'DELETE'):
+                return
+            if executemany:
+                parameters = parameters[0] if parameters else ()
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
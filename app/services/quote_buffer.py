@@ -0,0 +1,144 @@
+import threading
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from app import db
+from app.models.quote import Quote
+
+
+class QuoteBuffer:
+    """
+    Write-behind buffer for newly generated quotes
+
+    Quotes are held in memory until a flush writes them with one bulk insert
+    and commit. Rows taken by an in-progress flush stay visible to readers
+    until that flush has committed, so a quote is always found either here
+    or in the database.
+    """
+
+    def __init__(self, flush_size, max_size):
+        self.flush_size = flush_size
+        self.max_size = max_size
+        self.flushes = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.task = None
+        self._pending = {}
+        self._flushing = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(self, rows):
+        """
+        Buffer quote rows and trigger a flush when the buffer fills
+
+        Reaching flush_size wakes the background flusher; reaching max_size
+        flushes on the calling thread so memory and the crash-loss window
+        stay bounded even if the flusher falls behind.
+        """
+        with self._lock:
+            for row in rows:
+                self._pending[row['id']] = row
+            size = len(self._pending)
+
+        if size >= self.max_size:
+            self.flush()
+        elif size >= self.flush_size and self.task is not None:
+            self.task.wake()
+
+    def get(self, quote_id):
+        """Return the buffered row for a quote, or None"""
+        with self._lock:
+            return self._pending.get(quote_id) or self._flushing.get(quote_id)
+
+    def contains_any(self, quote_ids):
+        """Check whether any of the quotes is still waiting to be written"""
+        with self._lock:
+            return any(q in self._pending or q in self._flushing for q in quote_ids)
+
+    def flush(self):
+        """
+        Write every buffered quote with one bulk insert and commit
+
+        Must run in an application context. If the bulk insert fails the rows
+        are written one at a time, so a row the database rejects is logged and
+        dropped instead of failing every later flush. When the database itself
+        is unreachable the unwritten rows are put back for the next flush.
+
+        Returns:
+            Number of quotes written
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._flushing, self._pending = self._pending, {}
+                rows = list(self._flushing.values())
+
+            if not rows:
+                return 0
+
+            try:
+                db.session.execute(insert(Quote), [Quote.storage_row(row) for row in rows])
+                db.session.commit()
+                written = len(rows)
+            except (OperationalError, InterfaceError):
+                db.session.rollback()
+                self._restore(rows)
+                raise
+            except Exception:
+                db.session.rollback()
+                written = self._flush_rows(rows)
+
+            with self._lock:
+                self._flushing = {}
+            self.flushes += 1
+            self.flushed += written
+            return written
+
+    def _flush_rows(self, rows):
+        """Write rows one by one after a failed bulk insert, dropping bad rows"""
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                db.session.execute(insert(Quote), [Quote.storage_row(row)])
+                db.session.commit()
+                written += 1
+            except (OperationalError, InterfaceError):
+                db.session.rollback()
+                self.flushed += written
+                self._restore(rows[index:])
+                raise
+            except Exception as e:
+                db.session.rollback()
+                self.dropped += 1
+                current_app.logger.error('Dropping buffered quote %s: %s', row['id'], e)
+        return written
+
+    def _restore(self, rows):
+        """Put unwritten rows back in front of anything buffered since"""
+        with self._lock:
+            restored = {row['id']: row for row in rows}
+            restored.update(self._pending)
+            self._pending, self._flushing = restored, {}
+
+    def close(self, app):
+        """Stop the background flusher and write whatever is still buffered"""
+        if self.task is not None:
+            self.task.stop()
+        with app.app_context():
+            try:
+                self.flush()
+            finally:
+                db.session.remove()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending) + len(self._flushing)
+
+    def stats(self):
+        """Return buffer size and flush counters"""
+        return {
+            'buffered': len(self),
+            'flushes': self.flushes,
+            'flushed': self.flushed,
+            'dropped': self.dropped
+        }
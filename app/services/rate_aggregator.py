@@ -0,0 +1,151 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from decimal import Decimal
+from statistics import median
+from app.utils.decimal_utils import to_decimal
+
+
+class RateAggregator:
+    """
+    Query several rate providers concurrently and combine their answers
+
+    Each provider runs on its own worker thread and is abandoned once its
+    timeout passes, so the refresh takes as long as the slowest provider
+    that answers in time and a hung provider cannot stall it. Per currency,
+    values further than outlier_threshold_bps from the median are dropped
+    (when at least three providers agree on a median) and the rest are
+    combined by median or weighted mean. When the values are so spread that
+    none is near the median, all of them are kept.
+    """
+
+    METHODS = ('median', 'weighted_mean')
+
+    def __init__(self, providers, method='median', outlier_threshold_bps=200):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown aggregation method: {method}")
+        if not providers:
+            raise ValueError("At least one rate provider is required")
+
+        self.providers = list(providers)
+        self.method = method
+        self.outlier_threshold_bps = to_decimal(outlier_threshold_bps)
+
+    def fetch(self, base_currency, session, currencies=None):
+        """
+        Fetch and aggregate rates for one base currency
+
+        Args:
+            base_currency: Base currency code
+            session: Pooled requests.Session shared by the providers
+            currencies: Optional collection of currencies to keep
+
+        Returns:
+            Tuple of ({currency: Decimal rate}, report) where report lists
+            each provider's status and the outliers that were dropped
+        """
+        results, report = self._collect(base_currency, session)
+
+        if not results:
+            errors = '; '.join(f"{r['provider']}: {r['error']}" for r in report['providers'])
+            raise ValueError(f"Failed to fetch rates from API: {errors}")
+
+        quotes = {}
+        for provider, rates in results:
+            for currency, rate in rates.items():
+                if currency == base_currency:
+                    continue
+                if currencies is not None and currency not in currencies:
+                    continue
+                quotes.setdefault(currency, []).append((provider, to_decimal(rate)))
+
+        aggregated = {}
+        for currency, values in quotes.items():
+            kept = self._drop_outliers(values)
+            for provider, rate in values:
+                if (provider, rate) not in kept:
+                    report['outliers'].append({
+                        'currency': currency, 'provider': provider.name, 'rate': str(rate)
+                    })
+            aggregated[currency] = self._combine(kept)
+
+        return aggregated, report
+
+    def _collect(self, base_currency, session):
+        """Run every provider concurrently, honouring each provider's timeout"""
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=len(self.providers),
+                                      thread_name_prefix='rate-provider')
+        pending = {}
+        try:
+            pending = {
+                executor.submit(provider.fetch, base_currency, session): provider
+                for provider in self.providers
+            }
+            deadlines = {
+                future: started + provider.timeout_seconds
+                for future, provider in pending.items()
+            }
+
+            results = []
+            statuses = []
+            while pending:
+                timeout = max(0, min(deadlines[f] for f in pending) - time.monotonic())
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    provider = pending.pop(future)
+                    status = {
+                        'provider': provider.name,
+                        'duration_ms': round((time.monotonic() - started) * 1000, 3)
+                    }
+                    try:
+                        results.append((provider, future.result()))
+                        status['status'] = 'ok'
+                    except Exception as e:
+                        status['status'] = 'error'
+                        status['error'] = str(e)
+                    statuses.append(status)
+
+                now = time.monotonic()
+                for future in [f for f in pending if deadlines[f] <= now]:
+                    provider = pending.pop(future)
+                    future.cancel()
+                    statuses.append({
+                        'provider': provider.name,
+                        'status': 'timeout',
+                        'error': f"no response within {provider.timeout_seconds}s",
+                        'duration_ms': round((now - started) * 1000, 3)
+                    })
+        finally:
+            # Do not wait for abandoned providers; their threads exit when
+            # the underlying request times out. Futures are cancelled by hand
+            # as shutdown(cancel_futures=True) needs Python 3.9
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        return results, {'providers': statuses, 'outliers': []}
+
+    def _drop_outliers(self, values):
+        if len(values) < 3:
+            return values
+
+        mid = median(rate for _, rate in values)
+        if mid == 0:
+            return values
+
+        limit = self.outlier_threshold_bps / Decimal('10000')
+        kept = [(provider, rate) for provider, rate in values
+                if abs(rate - mid) / mid <= limit]
+        # e.g. 0.90, 0.90, 0.95, 0.95: no value is close to the median, so
+        # there is no consensus to measure outliers against
+        return kept or values
+
+    def _combine(self, values):
+        if self.method == 'median':
+            return median(rate for _, rate in values)
+
+        total_weight = sum(provider.weight for provider, _ in values)
+        if total_weight == 0:
+            return median(rate for _, rate in values)
+        return sum(provider.weight * rate for provider, rate in values) / total_weight
@@ -0,0 +1,210 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from app.models.exchange_rate import ExchangeRate
+from app.services.rate_graph import RateGraph
+
+
+RateEntry = namedtuple(
+    'RateEntry', ['id', 'base_currency', 'target_currency', 'rate', 'updated_at']
+)
+
+
+class RateSnapshot:
+    """Immutable view of all stored exchange rates at a given version"""
+
+    __slots__ = ('version', 'rates', 'graph', 'loaded_at', '_rows', '_etag')
+
+    def __init__(self, version, rates, loaded_at=None, graph=None, pivots=()):
+        self.version = version
+        # {(base_currency, target_currency): RateEntry}
+        self.rates = MappingProxyType(dict(rates))
+        self.graph = graph if graph is not None else RateGraph.build(
+            {pair: entry.rate for pair, entry in self.rates.items()}, pivots
+        )
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+        self._rows = None
+        self._etag = None
+
+    def get(self, base_currency, target_currency):
+        """Return the stored entry for a pair, or None"""
+        return self.rates.get((base_currency, target_currency))
+
+    def rate(self, from_currency, to_currency):
+        """Return the best direct, inverse or cross rate for a pair, or None"""
+        return self.graph.matrix.get((from_currency, to_currency))
+
+    def path_entries(self, from_currency, to_currency):
+        """
+        Return the stored entries used to price a pair, or None
+
+        Derived (inverse) edges are traced back to the stored rate they come
+        from.
+        """
+        path = self.graph.paths.get((from_currency, to_currency))
+        if path is None:
+            return None
+        return [
+            self.rates.get((base_currency, target_currency))
+            or self.rates.get((target_currency, base_currency))
+            for base_currency, target_currency in path
+        ]
+
+    def updated_at(self, from_currency, to_currency):
+        """
+        Return when the oldest stored rate used to price a pair was updated
+
+        Returns None when the pair cannot be priced.
+        """
+        entries = self.path_entries(from_currency, to_currency)
+        if entries is None:
+            return None
+        return min(entry.updated_at for entry in entries)
+
+    def age(self):
+        """Seconds since the snapshot was last fully loaded from the database"""
+        return time.monotonic() - self.loaded_at
+
+    def with_entries(self, version, entries):
+        """
+        Return a new snapshot with the given entries added or replaced
+
+        The load time is inherited so that incremental updates never extend
+        how long rates written by other workers can go unnoticed.
+        """
+        rates = dict(self.rates)
+        updates = {}
+        for entry in entries:
+            pair = (entry.base_currency, entry.target_currency)
+            rates[pair] = entry
+            updates[pair] = entry.rate
+        return RateSnapshot(
+            version, rates, loaded_at=self.loaded_at, graph=self.graph.with_rates(updates)
+        )
+
+    def to_dicts(self):
+        """The stored rates as ExchangeRate.to_dict() rows ordered by id, built once"""
+        if self._rows is None:
+            self._rows = tuple(
+                ExchangeRate.row_to_dict(entry)
+                for entry in sorted(self.rates.values(), key=lambda entry: entry.id)
+            )
+        return self._rows
+
+    def etag(self):
+        """
+        Strong validator for the stored rates, computed once per version
+
+        It is a digest of the rows rather than the version number itself:
+        versions are counted per process, so two workers could give the same
+        number to different tables, while equal tables always get equal tags.
+        """
+        if self._etag is None:
+            digest = hashlib.sha256()
+            for row in self.to_dicts():
+                digest.update(repr(sorted(row.items())).encode())
+            self._etag = f'rates-{digest.hexdigest()[:32]}'
+        return self._etag
+
+    def __len__(self):
+        return len(self.rates)
+
+
+class RateCache:
+    """
+    Holds the current rate snapshot for one application
+
+    Readers grab the current snapshot reference without locking; writers
+    build a new snapshot and swap the reference under a lock, so a reader
+    always sees a complete, consistent set of rates.
+    """
+
+    def __init__(self, max_age_seconds=None, pivots=()):
+        self.max_age_seconds = max_age_seconds
+        self.pivots = tuple(pivots)
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get_snapshot(self, loader):
+        """
+        Return the current snapshot, loading it with `loader` when missing or stale
+
+        Args:
+            loader: Callable returning an iterable of RateEntry
+
+        Returns:
+            RateSnapshot
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and not self._is_stale(snapshot):
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            snapshot = self._snapshot
+            if snapshot is None or self._is_stale(snapshot):
+                snapshot = self._build(loader())
+                self._snapshot = snapshot
+            return snapshot
+
+    def reload(self, loader):
+        """Unconditionally replace the snapshot with a fresh load"""
+        with self._lock:
+            self._snapshot = self._build(loader())
+            return self._snapshot
+
+    def publish(self, entries):
+        """
+        Swap in a new snapshot containing the given entries
+
+        If nothing has been loaded yet there is nothing to patch; the next
+        reader loads the full table instead.
+        """
+        with self._lock:
+            if self._snapshot is None:
+                return None
+            self._version += 1
+            self._snapshot = self._snapshot.with_entries(self._version, entries)
+            return self._snapshot
+
+    def is_loaded(self):
+        """Check whether a snapshot is currently held"""
+        return self._snapshot is not None
+
+    def invalidate(self):
+        """Drop the current snapshot so the next reader reloads it"""
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self):
+        """Return cache counters and the current snapshot version"""
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            'version': snapshot.version if snapshot else None,
+            'size': len(snapshot) if snapshot else 0,
+            'age_seconds': round(snapshot.age(), 3) if snapshot else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
+
+    def _build(self, entries):
+        self._version += 1
+        return RateSnapshot(
+            self._version,
+            {(e.base_currency, e.target_currency): e for e in entries},
+            pivots=self.pivots
+        )
+
+    def _is_stale(self, snapshot):
+        if self.max_age_seconds is None:
+            return False
+        return snapshot.age() >= self.max_age_seconds
@@ -0,0 +1,167 @@
+import heapq
+from decimal import Decimal
+from app.utils.decimal_utils import safe_divide
+from app.utils.tracing import traced
+
+
+class RateGraph:
+    """
+    Precomputed all-pairs rate matrix over the stored exchange rates
+
+    Every stored rate BASE/TARGET is a directed edge BASE->TARGET. The reverse
+    direction is derived as 1/rate unless it is stored explicitly. Rates that
+    are not positive cannot be converted through and are left out. For every
+    ordered pair of currencies the best conversion path is chosen by, in order:
+
+        1. fewest hops (each hop compounds spread and rounding),
+        2. fewest inverted edges (each inversion is a 28-digit division),
+        3. fewest intermediate currencies that are not preferred pivots.
+
+    The product of the edge rates along that path is stored in the matrix, so
+    a lookup is a single dict access. Instances are immutable; updates return
+    a new graph.
+    """
+
+    __slots__ = ('direct', 'pivots', 'edges', 'paths', 'matrix', '_edge_users')
+
+    def __init__(self, direct, pivots, edges, paths, matrix, edge_users):
+        self.direct = direct
+        self.pivots = pivots
+        self.edges = edges
+        self.paths = paths
+        self.matrix = matrix
+        self._edge_users = edge_users
+
+    @classmethod
+    @traced('RateGraph.build')
+    def build(cls, direct_rates, pivots=()):
+        """
+        Build the full matrix
+
+        Args:
+            direct_rates: Mapping of (base_currency, target_currency) to Decimal rate
+            pivots: Currencies preferred as intermediates when paths tie
+
+        Returns:
+            RateGraph
+        """
+        direct = dict(direct_rates)
+        pivots = tuple(pivots)
+        edges = cls._derive_edges(direct)
+        paths = cls._shortest_paths(edges, pivots)
+
+        edge_users = {}
+        for pair, path in paths.items():
+            for edge in path:
+                edge_users.setdefault(edge, []).append(pair)
+
+        matrix = {pair: cls._path_rate(edges, path) for pair, path in paths.items()}
+        return cls(direct, pivots, edges, paths, matrix, edge_users)
+
+    def rate(self, from_currency, to_currency):
+        """Return the best rate for a pair, or None when it is unreachable"""
+        return self.matrix.get((from_currency, to_currency))
+
+    def path(self, from_currency, to_currency):
+        """Return the currencies visited by the best path, or None"""
+        path = self.paths.get((from_currency, to_currency))
+        if path is None:
+            return None
+        return [from_currency] + [target for _, target in path]
+
+    def with_rates(self, updates):
+        """
+        Return a new graph with the given direct rates added or changed
+
+        When only the values of existing edges change the path topology is
+        unchanged, so only pairs whose path crosses a changed edge are
+        recomputed. Adding a pair, storing the reverse of a pair that was
+        previously derived, or a rate that is not positive on either side of a
+        pair changes path costs and triggers a full rebuild.
+        """
+        direct = dict(self.direct)
+        direct.update(updates)
+
+        if any(pair not in self.direct or not self._usable(rate)
+               or not self._usable(self.direct[pair])
+               or not self._usable(direct.get((pair[1], pair[0]), 1))
+               for pair, rate in updates.items()):
+            return RateGraph.build(direct, self.pivots)
+
+        edges = dict(self.edges)
+        changed = set()
+        for (base, target), rate in updates.items():
+            edges[(base, target)] = (rate, False)
+            changed.add((base, target))
+            if (target, base) not in direct:
+                edges[(target, base)] = (safe_divide(Decimal('1'), rate), True)
+                changed.add((target, base))
+
+        matrix = dict(self.matrix)
+        for edge in changed:
+            for pair in self._edge_users.get(edge, ()):
+                matrix[pair] = self._path_rate(edges, self.paths[pair])
+
+        return RateGraph(direct, self.pivots, edges, self.paths, matrix, self._edge_users)
+
+    @staticmethod
+    def _usable(rate):
+        """Whether a stored rate can carry a conversion (and be inverted)"""
+        return rate > 0
+
+    @staticmethod
+    def _derive_edges(direct):
+        """Map (from, to) to (rate, inverted) for stored and derived directions"""
+        usable = {pair: rate for pair, rate in direct.items() if RateGraph._usable(rate)}
+        edges = {}
+        for (base, target), rate in usable.items():
+            edges[(base, target)] = (rate, False)
+        for (base, target), rate in usable.items():
+            if (target, base) not in edges:
+                edges[(target, base)] = (safe_divide(Decimal('1'), rate), True)
+        return edges
+
+    @staticmethod
+    def _shortest_paths(edges, pivots):
+        """Run a Dijkstra search from every currency over (hops, inversions, detours)"""
+        adjacency = {}
+        for (source, target), (_, inverted) in edges.items():
+            adjacency.setdefault(source, []).append((target, inverted))
+            adjacency.setdefault(target, [])
+        for neighbours in adjacency.values():
+            neighbours.sort()
+
+        pivot_set = set(pivots)
+        paths = {}
+        for source in adjacency:
+            best = {source: (0, 0, 0)}
+            previous = {}
+            heap = [((0, 0, 0), source)]
+            while heap:
+                cost, node = heapq.heappop(heap)
+                if cost > best[node]:
+                    continue
+                detour = 0 if node == source or node in pivot_set else 1
+                for target, inverted in adjacency[node]:
+                    candidate = (cost[0] + 1, cost[1] + inverted, cost[2] + detour)
+                    if target not in best or candidate < best[target]:
+                        best[target] = candidate
+                        previous[target] = node
+                        heapq.heappush(heap, (candidate, target))
+
+            for target in previous:
+                path = []
+                node = target
+                while node != source:
+                    path.append((previous[node], node))
+                    node = previous[node]
+                path.reverse()
+                paths[(source, target)] = tuple(path)
+        return paths
+
+    @staticmethod
+    def _path_rate(edges, path):
+        rate = edges[path[0]][0]
+        for edge in path[1:]:
+            rate = rate * edges[edge][0]
+        return rate
@@ -0,0 +1,77 @@
+from app.utils.decimal_utils import to_decimal
+
+
+class RateProvider:
+    """
+    Base class for exchange rate sources
+
+    Subclasses implement fetch(). Instances are shared between threads, so
+    fetch() must not keep per-call state on the provider.
+    """
+
+    def __init__(self, name, weight=1, timeout_seconds=10):
+        self.name = name
+        self.weight = to_decimal(weight)
+        self.timeout_seconds = timeout_seconds
+
+    def fetch(self, base_currency, session):
+        """
+        Fetch rates quoted against a base currency
+
+        Args:
+            base_currency: Base currency code
+            session: Pooled requests.Session to use for HTTP calls
+
+        Returns:
+            Dict of {currency: rate}
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name}>'
+
+
+class ExchangeRateApiProvider(RateProvider):
+    """Provider for APIs that serve {"rates": {...}} at <url><BASE>"""
+
+    def __init__(self, name, url, weight=1, timeout_seconds=10):
+        super().__init__(name, weight, timeout_seconds)
+        self.url = url
+
+    def fetch(self, base_currency, session):
+        response = session.get(f"{self.url}{base_currency}", timeout=self.timeout_seconds)
+        response.raise_for_status()
+        data = response.json()
+
+        if 'rates' not in data:
+            raise ValueError("Invalid API response format")
+
+        return data['rates']
+
+
+def build_providers(config):
+    """
+    Build the configured providers
+
+    RATE_PROVIDERS may hold RateProvider instances or dicts with name, url
+    and optional weight and timeout_seconds. When it is empty the single
+    EXCHANGE_RATE_API_URL provider is used.
+    """
+    entries = config.get('RATE_PROVIDERS') or [{
+        'name': 'default',
+        'url': config['EXCHANGE_RATE_API_URL'],
+        'timeout_seconds': config['RATE_API_TIMEOUT_SECONDS']
+    }]
+
+    providers = []
+    for entry in entries:
+        if isinstance(entry, RateProvider):
+            providers.append(entry)
+        else:
+            providers.append(ExchangeRateApiProvider(
+                entry['name'],
+                entry['url'],
+                weight=entry.get('weight', 1),
+                timeout_seconds=entry.get('timeout_seconds', config['RATE_API_TIMEOUT_SECONDS'])
+            ))
+    return providers
@@ -0,0 +1,128 @@
+import threading
+import time
+from datetime import datetime
+from app.services.rate_service import RateService
+from app.utils.background import PeriodicTask
+
+
+class RateRefresher:
+    """
+    Refreshes exchange rates from the external API off the request path
+
+    A periodic task refreshes on a fixed schedule, and quote requests that
+    find a stale rate call trigger() to start a refresh without waiting for
+    it. Only one refresh runs at a time; readers keep using the last good
+    snapshot until the refresh commits and publishes a new one. Base
+    currencies passed to trigger() are fetched by the next refresh along
+    with the configured ones, so a stale rate outside those gets updated.
+    """
+
+    def __init__(self, app, base_currencies, interval_seconds, min_trigger_interval_seconds=0):
+        self.app = app
+        self.base_currencies = list(base_currencies)
+        self.interval_seconds = interval_seconds
+        self.min_trigger_interval_seconds = min_trigger_interval_seconds
+        self.task = PeriodicTask(app, 'rate-refresher', interval_seconds, self.refresh)
+
+        self.refreshes = 0
+        self.failures = 0
+        self.last_attempt_at = None
+        self.last_success_at = None
+        self.last_error = None
+        self.last_result = None
+
+        self._in_flight = threading.Lock()
+        self._last_attempt = None
+        self._requested = set()
+        self._requested_lock = threading.Lock()
+
+    def start(self):
+        """Start the scheduled refresher if an interval is configured"""
+        if self.interval_seconds and self.interval_seconds > 0:
+            self.task.start()
+
+    def stop(self, timeout=None):
+        self.task.stop(timeout)
+
+    def is_refreshing(self):
+        return self._in_flight.locked()
+
+    def refresh(self):
+        """
+        Run one refresh in the current application context
+
+        Returns:
+            The update_rates_from_api result, or None if another refresh was
+            already in flight or the refresh failed
+        """
+        if not self._in_flight.acquire(blocking=False):
+            return None
+
+        try:
+            self._last_attempt = time.monotonic()
+            self.last_attempt_at = datetime.utcnow()
+            with self._requested_lock:
+                requested, self._requested = self._requested, set()
+            base_currencies = self.base_currencies + sorted(requested - set(self.base_currencies))
+            result = RateService.update_rates_from_api(base_currencies)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self.app.logger.warning('Rate refresh failed: %s', e)
+            return None
+        finally:
+            self._in_flight.release()
+
+        self.refreshes += 1
+        self.last_success_at = datetime.utcnow()
+        self.last_error = None
+        self.last_result = result
+        return result
+
+    def trigger(self, base_currencies=()):
+        """
+        Start a refresh in the background without blocking the caller
+
+        Triggers are ignored while a refresh is in flight and for
+        min_trigger_interval_seconds after the previous attempt, so a
+        failing provider is not hammered by every quote request. The given
+        base currencies are still queued for the next refresh.
+
+        Args:
+            base_currencies: Extra base currencies the refresh must fetch
+
+        Returns:
+            True if a refresh was started
+        """
+        if base_currencies:
+            with self._requested_lock:
+                self._requested.update(base_currencies)
+
+        if self.is_refreshing():
+            return False
+
+        last_attempt = self._last_attempt
+        if (last_attempt is not None
+                and time.monotonic() - last_attempt < self.min_trigger_interval_seconds):
+            return False
+        self._last_attempt = time.monotonic()
+
+        if self.task.is_running():
+            self.task.wake()
+        else:
+            threading.Thread(
+                target=self.task.run_once, name='rate-refresher-once', daemon=True
+            ).start()
+        return True
+
+    def status(self):
+        """Return counters and timestamps of the refresher"""
+        return {
+            'running': self.task.is_running(),
+            'refreshing': self.is_refreshing(),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'last_attempt_at': self.last_attempt_at.isoformat() if self.last_attempt_at else None,
+            'last_success_at': self.last_success_at.isoformat() if self.last_success_at else None,
+            'last_error': self.last_error
+        }
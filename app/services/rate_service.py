@@ -1,105 +1,238 @@
-import requests
+import time
 from datetime import datetime, timedelta
-from decimal import Decimal
 from flask import current_app
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.exchange_rate import ExchangeRate
-from app.utils.decimal_utils import to_decimal, safe_divide
+from app.services.rate_aggregator import RateAggregator
+from app.services.rate_cache import RateEntry
+from app.services.rate_providers import build_providers
+from app.utils.decimal_utils import to_decimal
+from app.utils.metrics import timed
+from app.utils.tracing import traced
 
 
 class RateService:
     """Service for managing exchange rates"""
 
     @staticmethod
+    @timed('get_rate')
+    @traced('RateService.get_rate')
     def get_rate(from_currency, to_currency):
         """
         Get exchange rate between two currencies
         Returns the rate with spread applied
+
+        Direct, inverse and cross rates are precomputed in the snapshot's
+        rate graph, so this is a dict lookup that does not touch the database
+        unless the snapshot is missing or too old.
         """
-        # Check if it's a direct rate
-        rate = ExchangeRate.query.filter_by(
-            base_currency=from_currency,
-            target_currency=to_currency
-        ).first()
+        snapshot = RateService.get_snapshot()
+        rate = snapshot.rate(from_currency, to_currency)
+        if rate is not None:
+            # Stale-while-revalidate: keep serving the last good rate and let
+            # the background refresher fetch a new one
+            if current_app.config['RATE_REFRESH_ON_STALE']:
+                stale_bases = RateService._stale_bases(snapshot, from_currency, to_currency)
+                if stale_bases:
+                    current_app.extensions['rate_refresher'].trigger(stale_bases)
+            return rate
 
-        if rate:
-            return to_decimal(rate.rate)
+        raise ValueError(f"No exchange rate available for {from_currency}/{to_currency}")
 
-        # Check if inverse rate exists
-        inverse_rate = ExchangeRate.query.filter_by(
-            base_currency=to_currency,
-            target_currency=from_currency
-        ).first()
+    @staticmethod
+    def get_snapshot():
+        """Return the current rate snapshot, loading it from the database if needed"""
+        cache = current_app.extensions['rate_cache']
+        return cache.get_snapshot(RateService._load_entries)
 
-        if inverse_rate:
-            # Calculate inverse: if EUR/USD = 1.1, then USD/EUR = 1/1.1
-            return safe_divide(Decimal('1'), to_decimal(inverse_rate.rate))
+    @staticmethod
+    def get_rate_path(from_currency, to_currency):
+        """Return the currencies a conversion is routed through, or None"""
+        return RateService.get_snapshot().graph.path(from_currency, to_currency)
 
-        # Try to calculate cross rate (e.g., KES/NGN through USD)
-        cross_rate = RateService._calculate_cross_rate(from_currency, to_currency)
-        if cross_rate:
-            return cross_rate
+    @staticmethod
+    def get_cache_stats():
+        """Return hit/miss counters and version of the rate snapshot cache"""
+        return current_app.extensions['rate_cache'].stats()
 
-        raise ValueError(f"No exchange rate available for {from_currency}/{to_currency}")
+    @staticmethod
+    @traced('RateService.load_snapshot')
+    def _load_entries():
+        """Read every stored rate into snapshot entries"""
+        return [RateService._to_entry(rate) for rate in ExchangeRate.query.all()]
 
     @staticmethod
-    def _calculate_cross_rate(from_currency, to_currency):
+    def _to_entry(rate):
+        return RateEntry(
+            id=rate.id,
+            base_currency=rate.base_currency,
+            target_currency=rate.target_currency,
+            rate=to_decimal(rate.rate),
+            updated_at=rate.updated_at
+        )
+
+    @staticmethod
+    @timed('update_rates_from_api')
+    @traced('RateService.update_rates_from_api')
+    def update_rates_from_api(base_currencies='USD'):
         """
-        Calculate cross rate through a common currency (USD)
-        E.g., KES/NGN = (KES/USD) * (USD/NGN)
+        Fetch latest rates from external API
+
+        Every requested base currency is fetched first and the combined
+        payload is then written with set_rates in a single transaction.
+
+        Args:
+            base_currencies: A base currency code or a list of them
+
+        Returns:
+            Dict with counts and timing stats of the refresh
         """
-        if from_currency == 'USD' or to_currency == 'USD':
-            return None
+        if isinstance(base_currencies, str):
+            base_currencies = [base_currencies]
 
-        try:
-            # Get rates to/from USD
-            from_to_usd = RateService.get_rate(from_currency, 'USD')
-            usd_to_target = RateService.get_rate('USD', to_currency)
+        started = time.perf_counter()
+        rates_by_base = {}
+        reports = {}
+        for base_currency in base_currencies:
+            rates_by_base[base_currency], reports[base_currency] = \
+                RateService._fetch_rates(base_currency)
+        fetch_ms = (time.perf_counter() - started) * 1000
 
-            # Calculate cross rate
-            return from_to_usd * usd_to_target
-        except ValueError:
-            return None
+        stats = RateService.set_rates(rates_by_base)
+
+        return {
+            'success': True,
+            'rates_updated': stats['rates_updated'],
+            'base_currency': base_currencies[0],
+            'base_currencies': list(base_currencies),
+            'inserted': stats['inserted'],
+            'updated': stats['updated'],
+            'fetch_ms': round(fetch_ms, 3),
+            'write_ms': stats['duration_ms'],
+            'duration_ms': round(fetch_ms + stats['duration_ms'], 3),
+            'providers': reports,
+            'timestamp': datetime.utcnow().isoformat()
+        }
 
     @staticmethod
-    def update_rates_from_api(base_currency='USD'):
+    def _fetch_rates(base_currency):
         """
-        Fetch latest rates from external API
+        Fetch the supported rates for one base currency
+
+        All configured providers are queried concurrently and their answers
+        aggregated; see RateAggregator.
+
+        Returns:
+            Tuple of ({currency: Decimal rate}, provider report)
         """
-        api_url = current_app.config['EXCHANGE_RATE_API_URL']
+        aggregator = RateAggregator(
+            build_providers(current_app.config),
+            method=current_app.config['RATE_AGGREGATION_METHOD'],
+            outlier_threshold_bps=current_app.config['RATE_OUTLIER_THRESHOLD_BPS']
+        )
+        return aggregator.fetch(
+            base_currency,
+            current_app.extensions['http_session'],
+            currencies=set(current_app.config['SUPPORTED_CURRENCIES'])
+        )
 
-        try:
-            response = requests.get(f"{api_url}{base_currency}", timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            if 'rates' not in data:
-                raise ValueError("Invalid API response format")
-
-            rates_updated = 0
-            supported_currencies = current_app.config['SUPPORTED_CURRENCIES']
-
-            for currency, rate in data['rates'].items():
-                if currency in supported_currencies and currency != base_currency:
-                    RateService.set_rate(base_currency, currency, rate)
-                    rates_updated += 1
-
-            return {
-                'success': True,
-                'rates_updated': rates_updated,
-                'base_currency': base_currency,
-                'timestamp': datetime.utcnow().isoformat()
+    @staticmethod
+    def set_rates(rates_by_base):
+        """
+        Insert or update many rates in one transaction
+
+        Existing rows for all affected base currencies are read with one
+        SELECT, changes are flushed as batched INSERT/UPDATE statements and
+        committed once, and the rate snapshot is patched once.
+
+        Args:
+            rates_by_base: Dict of {base_currency: {target_currency: rate}}
+
+        Returns:
+            Dict with rates_updated, inserted, updated and duration_ms
+        """
+        started = time.perf_counter()
+
+        incoming = {}
+        for base_currency, targets in rates_by_base.items():
+            for target_currency, rate in targets.items():
+                if target_currency != base_currency:
+                    incoming[(base_currency, target_currency)] = RateService._positive_rate(rate)
+
+        bases = {base for base, _ in incoming}
+        existing = {}
+        if bases:
+            existing = {
+                (rate.base_currency, rate.target_currency): rate
+                for rate in ExchangeRate.query.filter(
+                    ExchangeRate.base_currency.in_(bases)
+                ).all()
             }
 
-        except requests.RequestException as e:
-            raise ValueError(f"Failed to fetch rates from API: {str(e)}")
+        now = datetime.utcnow()
+        inserted = 0
+        for (base_currency, target_currency), rate_decimal in incoming.items():
+            exchange_rate = existing.get((base_currency, target_currency))
+            if exchange_rate:
+                exchange_rate.rate = rate_decimal
+                exchange_rate.updated_at = now
+            else:
+                db.session.add(ExchangeRate(
+                    base_currency=base_currency,
+                    target_currency=target_currency,
+                    rate=rate_decimal,
+                    updated_at=now
+                ))
+                inserted += 1
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A pair was inserted concurrently; the retry updates it instead
+            db.session.rollback()
+            return RateService.set_rates(rates_by_base)
+
+        # Read the committed rows back in one query so the snapshot holds
+        # exactly what the database stores
+        if incoming and current_app.extensions['rate_cache'].is_loaded():
+            RateService._publish([
+                rate for rate in ExchangeRate.query.filter(
+                    ExchangeRate.base_currency.in_(bases)
+                ).all()
+                if (rate.base_currency, rate.target_currency) in incoming
+            ])
+
+        return {
+            'rates_updated': len(incoming),
+            'inserted': inserted,
+            'updated': len(incoming) - inserted,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
 
     @staticmethod
     def set_rate(base_currency, target_currency, rate):
         """
         Set or update exchange rate
         """
-        rate_decimal = to_decimal(rate)
+        exchange_rate = RateService._upsert_rate(base_currency, target_currency, rate)
+        rate_decimal = exchange_rate.rate
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # The pair was inserted concurrently; update that row instead
+            db.session.rollback()
+            exchange_rate = RateService._upsert_rate(base_currency, target_currency, rate)
+            db.session.commit()
+
+        RateService._publish([exchange_rate])
+        return rate_decimal
+
+    @staticmethod
+    def _upsert_rate(base_currency, target_currency, rate):
+        """Stage an insert or update of a rate without committing"""
+        rate_decimal = RateService._positive_rate(rate)
 
         # Check if rate exists
         existing_rate = ExchangeRate.query.filter_by(
@@ -110,38 +243,82 @@ class RateService:
         if existing_rate:
             existing_rate.rate = rate_decimal
             existing_rate.updated_at = datetime.utcnow()
-        else:
-            new_rate = ExchangeRate(
-                base_currency=base_currency,
-                target_currency=target_currency,
-                rate=rate_decimal
-            )
-            db.session.add(new_rate)
-
-        db.session.commit()
+            return existing_rate
+
+        new_rate = ExchangeRate(
+            base_currency=base_currency,
+            target_currency=target_currency,
+            rate=rate_decimal
+        )
+        db.session.add(new_rate)
+        return new_rate
+
+    @staticmethod
+    def _positive_rate(rate):
+        """Convert a rate to Decimal, rejecting values that cannot be quoted"""
+        rate_decimal = to_decimal(rate)
+        if not rate_decimal.is_finite() or rate_decimal <= 0:
+            raise ValueError(f"Rate must be greater than zero: {rate}")
         return rate_decimal
 
+    @staticmethod
+    def _publish(exchange_rates):
+        """
+        Swap committed rates into the snapshot served to readers
+
+        Runs after the commit, so a failure here must not fail the write: the
+        snapshot is dropped instead and the next lookup reloads the table.
+        """
+        cache = current_app.extensions['rate_cache']
+        try:
+            cache.publish(RateService._to_entry(rate) for rate in exchange_rates)
+        except Exception as e:
+            current_app.logger.warning('Rate snapshot publish failed, invalidating: %s', e)
+            cache.invalidate()
+
     @staticmethod
     def get_all_rates():
         """Get all stored exchange rates"""
-        rates = ExchangeRate.query.all()
-        return [rate.to_dict() for rate in rates]
+        rows = db.session.query(*ExchangeRate.dict_columns()).all()
+        return [ExchangeRate.row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def get_published_rates():
+        """
+        Return (etag, rates) for the rates currently served to quotes
+
+        Both come from the rate snapshot and are built once per version, so
+        repeated calls neither query nor re-serialize the table.
+        """
+        snapshot = RateService.get_snapshot()
+        return snapshot.etag(), snapshot.to_dicts()
 
     @staticmethod
     def is_rate_stale(from_currency, to_currency):
         """Check if rate is stale (older than threshold)"""
-        rate = ExchangeRate.query.filter_by(
-            base_currency=from_currency,
-            target_currency=to_currency
-        ).first()
+        return RateService._is_stale(RateService.get_snapshot(), from_currency, to_currency)
+
+    @staticmethod
+    def _is_stale(snapshot, from_currency, to_currency):
+        """Check a pair against the staleness threshold using snapshot timestamps"""
+        updated_at = snapshot.updated_at(from_currency, to_currency)
 
-        if not rate:
+        if updated_at is None:
             return True
 
-        threshold_hours = current_app.config['RATE_STALENESS_THRESHOLD_HOURS']
-        threshold = datetime.utcnow() - timedelta(hours=threshold_hours)
+        return updated_at < RateService._staleness_cutoff()
 
-        return rate.updated_at < threshold
+    @staticmethod
+    def _stale_bases(snapshot, from_currency, to_currency):
+        """Base currencies of the stale stored rates a pair is priced from"""
+        entries = snapshot.path_entries(from_currency, to_currency) or []
+        cutoff = RateService._staleness_cutoff()
+        return {entry.base_currency for entry in entries if entry.updated_at < cutoff}
+
+    @staticmethod
+    def _staleness_cutoff():
+        threshold_hours = current_app.config['RATE_STALENESS_THRESHOLD_HOURS']
+        return datetime.utcnow() - timedelta(hours=threshold_hours)
 
     @staticmethod
     def seed_initial_rates():
@@ -151,8 +328,6 @@ class RateService:
             'EUR': {'USD': '1.09', 'KES': '140.76', 'NGN': '842.39'},
         }
 
-        for base, targets in initial_rates.items():
-            for target, rate in targets.items():
-                RateService.set_rate(base, target, rate)
+        RateService.set_rates(initial_rates)
 
         return True
\ No newline at end of file
@@ -0,0 +1,73 @@
+from sqlalchemy import func, inspect
+from sqlalchemy.schema import CreateIndex, DropIndex
+from app import db
+from app.models.archive_index import ArchiveIndex
+from app.models.exchange_rate import ExchangeRate
+from app.models.idempotency_key import IdempotencyKey
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+
+
+class SchemaService:
+    """Bring the indexes of an existing database in line with the models"""
+
+    MODELS = (ExchangeRate, Quote, Transaction, IdempotencyKey, ArchiveIndex)
+
+    @staticmethod
+    def ensure_indexes(models=None):
+        """
+        Create missing indexes and rebuild ones whose uniqueness changed
+
+        db.create_all() only creates missing tables, so databases created
+        before an index was added never get it. Duplicate exchange rate rows
+        are collapsed to the newest row per pair before the unique index is
+        built; duplicate transactions for one quote cannot be resolved
+        automatically.
+
+        Returns:
+            List of index names created
+
+        Raises:
+            ValueError: If a quote has more than one transaction
+        """
+        created = []
+        for model in models or SchemaService.MODELS:
+            table = model.__table__
+            existing = {
+                index['name']: index
+                for index in inspect(db.session.connection()).get_indexes(table.name)
+            }
+
+            for index in table.indexes:
+                current = existing.get(index.name)
+                if current is not None and bool(current['unique']) == bool(index.unique):
+                    continue
+
+                if index.unique:
+                    SchemaService._remove_duplicates(model, index)
+                if current is not None:
+                    db.session.execute(DropIndex(index))
+                db.session.execute(CreateIndex(index))
+                created.append(index.name)
+
+        db.session.commit()
+        return created
+
+    @staticmethod
+    def _remove_duplicates(model, index):
+        """Make the rows unique on the index columns, or refuse if that would lose data"""
+        columns = [getattr(model, column.key) for column in index.columns]
+        if model is ExchangeRate:
+            keep = db.session.query(func.max(ExchangeRate.id)).group_by(*columns)
+            ExchangeRate.query.filter(
+                ExchangeRate.id.notin_(keep)
+            ).delete(synchronize_session=False)
+
+        duplicate = db.session.query(*columns).group_by(*columns) \
+            .having(func.count() > 1).first()
+        if duplicate is not None:
+            raise ValueError(
+                f"Cannot create unique index {index.name}: duplicate "
+                f"{', '.join(column.name for column in index.columns)} {tuple(duplicate)}"
+            )
+
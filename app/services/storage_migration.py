@@ -0,0 +1,123 @@
+from sqlalchemy import BigInteger, inspect, text, update
+from sqlalchemy.schema import CreateIndex, CreateTable
+from app import db
+from app.models.money import MONEY_FIELDS
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+from app.services.schema_service import SchemaService
+from app.utils.fixed_point import to_minor_units
+
+
+class MoneyStorageMigration:
+    """
+    Convert stored quote and transaction amounts to integer minor units
+
+    The schema is prepared first: the integer columns and any missing
+    indexes are added and the legacy Numeric columns are made nullable. Rows are then converted in
+    batches, each in its own transaction, so the command can be stopped and
+    resumed at any point. Converted rows have their Numeric values cleared.
+    """
+
+    MODELS = (Quote, Transaction)
+
+    @staticmethod
+    def run(batch_size=1000):
+        """
+        Prepare the schema and convert every table
+
+        Returns:
+            Dict of {table name: rows converted}
+        """
+        converted = {}
+        for model in MoneyStorageMigration.MODELS:
+            MoneyStorageMigration.prepare_schema(model)
+            total = 0
+            while True:
+                count = MoneyStorageMigration.convert_batch(model, batch_size)
+                if not count:
+                    break
+                total += count
+            converted[model.__tablename__] = total
+        return converted
+
+    @staticmethod
+    def prepare_schema(model):
+        """Add missing integer columns and drop NOT NULL from the Numeric ones"""
+        table = model.__table__
+        dialect = db.engine.dialect
+        existing = {c['name']: c for c in inspect(db.engine).get_columns(table.name)}
+
+        for numeric_attr, scaled_attr, _ in MONEY_FIELDS.values():
+            column = getattr(model, scaled_attr).property.columns[0]
+            if column.name not in existing:
+                db.session.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} '
+                    f'{BigInteger().compile(dialect=dialect)}'
+                ))
+
+        not_null = [
+            getattr(model, numeric_attr).property.columns[0].name
+            for numeric_attr, _, _ in MONEY_FIELDS.values()
+            if not existing[getattr(model, numeric_attr).property.columns[0].name]['nullable']
+        ]
+        if not_null:
+            if dialect.name == 'sqlite':
+                # SQLite cannot alter a column constraint in place
+                MoneyStorageMigration._rebuild_sqlite_table(table)
+            else:
+                for name in not_null:
+                    db.session.execute(text(
+                        f'ALTER TABLE {table.name} ALTER COLUMN {name} DROP NOT NULL'
+                    ))
+
+        db.session.commit()
+        SchemaService.ensure_indexes([model])
+
+    @staticmethod
+    def convert_batch(model, batch_size):
+        """
+        Convert up to batch_size rows still stored as Numeric
+
+        Returns:
+            Number of rows converted
+        """
+        numeric_attrs = [numeric_attr for numeric_attr, _, _ in MONEY_FIELDS.values()]
+        rows = db.session.query(
+            model.id, *[getattr(model, attr) for attr in numeric_attrs]
+        ).filter(
+            getattr(model, numeric_attrs[0]).isnot(None)
+        ).limit(batch_size).all()
+
+        if not rows:
+            return 0
+
+        updates = []
+        for row in rows:
+            values = {'id': row[0]}
+            for index, (numeric_attr, scaled_attr, places) in enumerate(MONEY_FIELDS.values(), 1):
+                values[scaled_attr] = to_minor_units(row[index], places)
+                values[numeric_attr] = None
+            updates.append(values)
+
+        db.session.execute(update(model), updates)
+        db.session.commit()
+        return len(updates)
+
+    @staticmethod
+    def _rebuild_sqlite_table(table):
+        """Recreate a SQLite table from the current model, keeping its rows"""
+        dialect = db.engine.dialect
+        rebuilt = f'{table.name}_rebuild'
+        ddl = str(CreateTable(table).compile(dialect=dialect)).replace(
+            f'CREATE TABLE {table.name} (', f'CREATE TABLE {rebuilt} (', 1
+        )
+        columns = ', '.join(column.name for column in table.columns)
+
+        db.session.execute(text(ddl))
+        db.session.execute(text(
+            f'INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}'
+        ))
+        db.session.execute(text(f'DROP TABLE {table.name}'))
+        db.session.execute(text(f'ALTER TABLE {rebuilt} RENAME TO {table.name}'))
+        for index in table.indexes:
+            db.session.execute(CreateIndex(index))
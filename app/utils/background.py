@@ -0,0 +1,85 @@
+import threading
+from app import db
+
+
+class PeriodicTask:
+    """
+    Run a function on a daemon thread at a fixed interval inside an app context
+
+    With run_on_stop the function runs one final time when the task is
+    stopped, for jobs that must drain state before shutdown.
+    """
+
+    def __init__(self, app, name, interval_seconds, func, run_on_stop=False):
+        self.app = app
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.run_on_stop = run_on_stop
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread if it is not already running"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Signal the worker to exit and wait for it"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Run the next iteration now instead of waiting for the interval"""
+        self._wakeup.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self):
+        """Run the function once in an application context, logging failures"""
+        with self.app.app_context():
+            try:
+                return self.func()
+            except Exception:
+                self.app.logger.exception('Background task %s failed', self.name)
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval_seconds)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            self.run_once()
+
+        if self.run_on_stop:
+            self.run_once()
+
+
+def start_periodic_task(app, name, interval_seconds, func, run_on_stop=False):
+    """
+    Register a periodic task on the app and start it
+
+    A non-positive interval registers nothing, which is how tasks are
+    disabled in configuration.
+    """
+    if not interval_seconds or interval_seconds <= 0:
+        return None
+    task = PeriodicTask(app, name, interval_seconds, func, run_on_stop)
+    app.extensions.setdefault('background_tasks', {})[name] = task
+    task.start()
+    return task
+
+
+def stop_background_tasks(app, timeout=5):
+    """Stop every periodic task registered on the app"""
+    for task in app.extensions.get('background_tasks', {}).values():
+        task.stop(timeout)
@@ -1,4 +1,5 @@
 from decimal import Decimal, ROUND_HALF_UP, getcontext
+from functools import lru_cache
 
 # Set decimal precision for financial calculations
 getcontext().prec = 28
@@ -8,7 +9,11 @@ def to_decimal(value):
     """Convert value to Decimal safely"""
     if isinstance(value, Decimal):
         return value
-    if isinstance(value, (int, float, str)):
+    # Strings and ints convert exactly; floats go through str() so that
+    # 0.1 becomes Decimal('0.1') rather than its binary expansion
+    if isinstance(value, str) or type(value) is int:
+        return Decimal(value)
+    if isinstance(value, (int, float)):
         return Decimal(str(value))
     raise ValueError(f"Cannot convert {type(value)} to Decimal")
 
@@ -18,8 +23,17 @@ def round_currency(amount, decimal_places=2):
     if not isinstance(amount, Decimal):
         amount = to_decimal(amount)
 
-    quantize_value = Decimal('0.1') ** decimal_places
-    return amount.quantize(quantize_value, rounding=ROUND_HALF_UP)
+    return amount.quantize(_quantizer(decimal_places), rounding=ROUND_HALF_UP)
+
+
+@lru_cache(maxsize=None)
+def _quantizer(decimal_places):
+    return Decimal('0.1') ** decimal_places
+
+
+def round_rate(rate, decimal_places=8):
+    """Round an exchange rate to the precision it is stored with"""
+    return round_currency(rate, decimal_places)
 
 
 def calculate_spread(rate, spread_bps, is_buy=True):
@@ -34,18 +48,21 @@ def calculate_spread(rate, spread_bps, is_buy=True):
     Returns:
         Decimal: Rate with spread applied
     """
-    rate = to_decimal(rate)
-    spread_bps = to_decimal(spread_bps)
+    return to_decimal(rate) * spread_multiplier(spread_bps, is_buy)
+
 
+@lru_cache(maxsize=64)
+def spread_multiplier(spread_bps, is_buy=True):
+    """Return the factor a rate is multiplied by to apply a spread"""
     # Convert basis points to decimal (50 bps = 0.005 = 0.5%)
-    spread_decimal = spread_bps / Decimal('10000')
+    spread_decimal = to_decimal(spread_bps) / Decimal('10000')
 
     if is_buy:
         # For buying, we add the spread (customer pays more)
-        return rate * (Decimal('1') + spread_decimal)
+        return Decimal('1') + spread_decimal
     else:
         # For selling, we subtract the spread (customer receives less)
-        return rate * (Decimal('1') - spread_decimal)
+        return Decimal('1') - spread_decimal
 
 
 def safe_divide(numerator, denominator):
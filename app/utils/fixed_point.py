@@ -0,0 +1,139 @@
+"""
+Integer fixed-point arithmetic for pricing
+
+A value is a scaled integer pair (coefficient, exponent) meaning
+coefficient * 10**exponent, the same representation Decimal uses internally.
+Amounts leave this module as integer minor units (hundredths) and rates as
+integers scaled by 10**8, matching the Numeric column precisions.
+
+Rounding follows the Decimal path exactly so both engines produce
+bit-identical results:
+
+    * multiplication is exact, then rounded to PRECISION (28) significant
+      digits with ROUND_HALF_EVEN, as the default Decimal context does;
+    * quantizing to a fixed number of places uses ROUND_HALF_UP, as
+      round_currency does, and fails with InvalidOperation when the result
+      would need more than PRECISION digits.
+"""
+from decimal import Decimal, InvalidOperation
+
+PRECISION = 28
+CURRENCY_PLACES = 2
+RATE_PLACES = 8
+
+# Decimal places of each currency's minor unit (ISO 4217). Amounts are
+# stored with CURRENCY_PLACES places, so no currency may use more.
+MINOR_UNIT_PLACES = {'USD': 2, 'EUR': 2, 'KES': 2, 'NGN': 2}
+
+_POW10 = [10 ** i for i in range(2 * PRECISION + 40)]
+
+
+def _pow10(n):
+    return _POW10[n] if n < len(_POW10) else 10 ** n
+
+
+def _digits(n):
+    """Number of decimal digits of a non-negative integer"""
+    # bit_length gives an estimate that is at most one too small
+    estimate = (n.bit_length() * 1233) >> 12
+    return estimate + 1 if n >= _pow10(estimate) else max(estimate, 1)
+
+
+def to_scaled(value):
+    """Convert a finite Decimal to (coefficient, exponent)"""
+    # Parsing the plain string form is several times faster than as_tuple()
+    text = str(value)
+    if 'E' in text:
+        sign, digits, exponent = value.as_tuple()
+        coefficient = 0
+        for digit in digits:
+            coefficient = coefficient * 10 + digit
+        return (-coefficient if sign else coefficient), exponent
+
+    point = text.find('.')
+    if point < 0:
+        return int(text), 0
+    return int(text[:point] + text[point + 1:]), point + 1 - len(text)
+
+
+def from_scaled(coefficient, exponent):
+    """Convert (coefficient, exponent) back to an equal, identically scaled Decimal"""
+    if -_POW10[PRECISION] < coefficient < _POW10[PRECISION]:
+        # Exact: scaleb only rounds coefficients longer than the context precision
+        return Decimal(coefficient).scaleb(exponent)
+    sign = 1 if coefficient < 0 else 0
+    return Decimal((sign, tuple(map(int, str(abs(coefficient)))), exponent))
+
+
+def round_significant(coefficient, exponent, precision=PRECISION):
+    """Round to `precision` significant digits with ROUND_HALF_EVEN"""
+    n = abs(coefficient)
+    if n < _pow10(precision):
+        return coefficient, exponent
+
+    drop = _digits(n) - precision
+    divisor = _pow10(drop)
+    q, r = divmod(n, divisor)
+    half = divisor >> 1
+    if r > half or (r == half and q & 1):
+        q += 1
+        if q == _pow10(precision):
+            # 99...9 rounded up to 100...0 loses a digit
+            q //= 10
+            drop += 1
+
+    return (-q if coefficient < 0 else q), exponent + drop
+
+
+def multiply(a, b):
+    """Multiply two scaled values, rounded like a Decimal context multiply"""
+    return round_significant(a[0] * b[0], a[1] + b[1])
+
+
+def quantize(value, places):
+    """
+    Round a scaled value to `places` decimal places with ROUND_HALF_UP
+
+    Returns:
+        Integer count of 10**-places units (e.g. minor units for places=2)
+    """
+    coefficient, exponent = value
+    shift = exponent + places
+    n = abs(coefficient)
+
+    if shift >= 0:
+        q = n * _pow10(shift)
+    else:
+        divisor = _pow10(-shift)
+        q, r = divmod(n, divisor)
+        if 2 * r >= divisor:
+            q += 1
+
+    if q >= _pow10(PRECISION):
+        raise InvalidOperation("quantize result has too many digits for current context")
+    return -q if coefficient < 0 else q
+
+
+def currency_places(currency):
+    """Decimal places of a currency's minor unit, CURRENCY_PLACES if unlisted"""
+    return MINOR_UNIT_PLACES.get(currency, CURRENCY_PLACES)
+
+
+def convert_minor_units(amount_minor, rate, places=CURRENCY_PLACES):
+    """
+    Convert an amount in minor units at a scaled rate
+
+    Gives the same result as round_currency(amount * rate) for the Decimal
+    amount with value amount_minor / 10**places.
+    """
+    return quantize(multiply((amount_minor, -places), rate), places)
+
+
+def to_minor_units(value, places=CURRENCY_PLACES):
+    """Round a Decimal half-up to integer minor units"""
+    return quantize(to_scaled(value), places)
+
+
+def from_minor_units(units, places=CURRENCY_PLACES):
+    """Convert integer minor units to a Decimal with `places` decimal places"""
+    return from_scaled(units, -places)
@@ -0,0 +1,20 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_http_session(pool_size=10, max_retries=0):
+    """
+    Create a requests.Session with a keep-alive connection pool
+
+    Sessions are shared per application so that repeated calls to the same
+    rate provider reuse TCP/TLS connections instead of reconnecting.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=max_retries
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
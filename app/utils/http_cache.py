@@ -0,0 +1,70 @@
+import gzip
+from flask import current_app, request
+
+# Executed transactions never change, so clients may keep them for a year
+IMMUTABLE = 'private, max-age=31536000, immutable'
+# Rates change at any time: clients keep them but revalidate on every use
+REVALIDATE = 'no-cache'
+
+GZIP_SUFFIX = '-gzip'
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/plain')
+
+
+def matching_etag(etag):
+    """
+    Return the tag in If-None-Match that still names the resource, or None
+
+    The gzip variant of the tag (see compress_response) names the same
+    content, so it matches too and is echoed back as is.
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return None
+    for candidate in (etag, etag + GZIP_SUFFIX):
+        if if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def not_modified(etag, cache_control):
+    """Build the 304 answer to a matching conditional GET"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def cacheable(response, etag, cache_control):
+    """Add ETag and Cache-Control to a successful response"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def compress_response(response):
+    """
+    Gzip a large response for clients that accept it
+
+    Responses of at least GZIP_MIN_BYTES are compressed (0 disables it).
+    Streamed responses are left alone. A strong ETag gets a -gzip suffix so
+    the compressed and identity bodies carry different tags.
+    """
+    min_bytes = current_app.config['GZIP_MIN_BYTES']
+    if not min_bytes or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code != 200 or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not request.accept_encodings['gzip']):
+        return response
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=current_app.config['GZIP_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + GZIP_SUFFIX)
+    return response
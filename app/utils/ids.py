@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+import uuid
+from flask import current_app, has_app_context
+
+# Crockford base32, the ULID text alphabet
+_CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_CROCKFORD_VALUES = {char: value for value, char in enumerate(_CROCKFORD)}
+_CROCKFORD_VALUES.update({char.lower(): value for char, value in _CROCKFORD_VALUES.items()})
+
+
+class _MonotonicClock:
+    """
+    Hands out (millisecond, sequence) pairs that never go backwards
+
+    Within one millisecond the sequence counts up from a random start, so
+    ids generated by one process sort in generation order.
+    """
+
+    def __init__(self, sequence_bits):
+        self.sequence_bits = sequence_bits
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # Leave headroom so the counter rarely overflows
+                self._sequence = int.from_bytes(os.urandom(16), 'big') >> (128 - self.sequence_bits + 1)
+            else:
+                self._sequence += 1
+                if self._sequence >> self.sequence_bits:
+                    # Counter exhausted: borrow the next millisecond
+                    self._last_ms += 1
+                    self._sequence = 0
+            return self._last_ms, self._sequence
+
+
+_uuid7_clock = _MonotonicClock(12)
+_ulid_clock = _MonotonicClock(80)
+
+
+def uuid7():
+    """
+    Generate a UUIDv7 (RFC 9562)
+
+    48-bit Unix millisecond timestamp, 12-bit sequence in rand_a and 62
+    random bits, so values sort by creation time.
+    """
+    timestamp_ms, sequence = _uuid7_clock.next()
+    rand_b = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= sequence << 64
+    value |= 0b10 << 62
+    value |= rand_b
+    return uuid.UUID(int=value)
+
+
+def ulid_to_str(value):
+    """Encode a 128-bit integer as a 26-character ULID"""
+    chars = []
+    for _ in range(26):
+        chars.append(_CROCKFORD[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def ulid():
+    """Generate a ULID: 48-bit millisecond timestamp and 80 monotonic random bits"""
+    timestamp_ms, randomness = _ulid_clock.next()
+    return ulid_to_str(((timestamp_ms & ((1 << 48) - 1)) << 80) | randomness)
+
+
+def id_to_int(value):
+    """
+    Parse a textual id (UUID or ULID) into its 128-bit integer
+
+    Raises:
+        ValueError: If the value is not a valid id
+    """
+    if isinstance(value, str) and len(value) == 26:
+        if value[0] not in '01234567':
+            raise ValueError(f"Invalid id: {value}")
+        result = 0
+        for char in value:
+            digit = _CROCKFORD_VALUES.get(char)
+            if digit is None:
+                raise ValueError(f"Invalid id: {value}")
+            result = (result << 5) | digit
+        return result
+    try:
+        return uuid.UUID(value).int
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"Invalid id: {value}")
+
+
+_GENERATORS = {
+    'uuid4': lambda: str(uuid.uuid4()),
+    'uuid7': lambda: str(uuid7()),
+    'ulid': ulid,
+}
+
+
+def generate_id():
+    """Generate a primary key for quotes and transactions using ID_STRATEGY"""
+    strategy = current_app.config['ID_STRATEGY'] if has_app_context() else 'uuid4'
+    return _GENERATORS[strategy]()
@@ -0,0 +1,127 @@
+import time
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from app import db
+from app.utils.metrics import MetricsRegistry
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class FXMetrics:
+    """The metrics the FX engine records, on a registry owned by one app"""
+
+    def __init__(self):
+        self.registry = registry = MetricsRegistry()
+        self.requests = registry.counter(
+            'fx_http_requests_total', 'HTTP requests by endpoint and status',
+            ('method', 'endpoint', 'status'))
+        self.request_duration = registry.histogram(
+            'fx_http_request_duration_seconds', 'HTTP request latency by endpoint',
+            ('method', 'endpoint'))
+        self.service_duration = registry.histogram(
+            'fx_service_duration_seconds', 'Latency of service operations', ('operation',))
+        self.db_statement_duration = registry.histogram(
+            'fx_db_statement_duration_seconds', 'Latency of individual SQL statements')
+        self.db_statements_per_request = registry.histogram(
+            'fx_db_statements_per_request', 'SQL statements issued per request',
+            ('endpoint',), buckets=STATEMENT_BUCKETS)
+        self.db_time_per_request = registry.histogram(
+            'fx_db_time_per_request_seconds', 'Time spent in SQL statements per request',
+            ('endpoint',))
+        self.quotes_generated = registry.counter(
+            'fx_quotes_generated_total', 'Quotes generated')
+        self.quote_executions = registry.counter(
+            'fx_quote_executions_total', 'Quote executions that returned a transaction, by result',
+            ('result',))
+        self.quote_rejections = registry.counter(
+            'fx_quote_rejections_total', 'Quote executions refused, by reason', ('reason',))
+        self.quotes_swept = registry.counter(
+            'fx_quotes_swept_total', 'Quotes removed from the hot tables, by action', ('action',))
+
+    def render(self):
+        return self.registry.render()
+
+
+def count(metric, *labelvalues, amount=1):
+    """Increment one of the app's FXMetrics counters if metrics are enabled"""
+    metrics = current_app.extensions.get('metrics') if has_app_context() else None
+    if metrics is not None and amount:
+        getattr(metrics, metric).inc(*labelvalues, amount=amount)
+
+
+def init_metrics(app):
+    """Create the app's metrics and hook them into requests and the database engine"""
+    metrics = FXMetrics()
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_db = [0, 0.0]
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        metrics.requests.inc(request.method, endpoint, str(response.status_code))
+        metrics.request_duration.observe(time.perf_counter() - started, request.method, endpoint)
+        statements, seconds = g.pop('metrics_db', (0, 0.0))
+        metrics.db_statements_per_request.observe(statements, endpoint)
+        metrics.db_time_per_request.observe(seconds, endpoint)
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+    # The start time lives on the statement's execution context, so a
+    # statement that raises cannot pair a later statement with its timer
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.fx_metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'fx_metrics_started', None)
+        if started is None:
+            return
+        context.fx_metrics_started = None
+        elapsed = time.perf_counter() - started
+        metrics.db_statement_duration.observe(elapsed)
+        per_request = g.get('metrics_db') if has_app_context() else None
+        if per_request is not None:
+            per_request[0] += 1
+            per_request[1] += elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_statement_timer(exception_context):
+        context = exception_context.execution_context
+        if context is not None:
+            context.fx_metrics_started = None
+
+    metrics.registry.collector(lambda: _collect_app_state(app))
+    return metrics
+
+
+def _collect_app_state(app):
+    """Values read from the caches and buffers at scrape time"""
+    cache = app.extensions['rate_cache'].stats()
+    values = [
+        ('fx_rate_cache_hits_total', 'counter', 'Rate snapshot lookups served from memory',
+         [((), cache['hits'])]),
+        ('fx_rate_cache_misses_total', 'counter', 'Rate snapshot lookups that had to load or wait',
+         [((), cache['misses'])]),
+        ('fx_rate_cache_hit_ratio', 'gauge', 'Share of rate snapshot lookups served from memory',
+         [((), cache['hit_ratio'] if cache['hit_ratio'] is not None else 0.0)]),
+        ('fx_rate_snapshot_version', 'gauge', 'Version of the current rate snapshot',
+         [((), cache['version'] or 0)]),
+        ('fx_rate_snapshot_pairs', 'gauge', 'Currency pairs in the current rate snapshot',
+         [((), cache['size'])]),
+        ('fx_quote_buffer_pending', 'gauge', 'Quotes waiting in the write-behind buffer',
+         [((), len(app.extensions['quote_buffer']))]),
+        ('fx_idempotency_cache_entries', 'gauge', 'Idempotency keys held in memory',
+         [((), len(app.extensions['idempotency_cache']))]),
+    ]
+    return values
@@ -0,0 +1,60 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+
+def _default(value):
+    """Decimals as their exact string, dates and times as ISO 8601"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class FXJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider for API responses
+
+    Decimal is written as its string, so amounts keep their scale ("100.00"),
+    and datetimes as ISO 8601 like the models' to_dict(). With JSON_ENGINE
+    'orjson' (or 'auto' when orjson is installed) encoding runs in orjson,
+    which writes datetimes natively and calls back only for Decimals;
+    anything orjson rejects is retried with the standard library encoder.
+    orjson cannot escape non-ASCII, so the standard library encoder writes
+    raw UTF-8 too, and both engines give the same bytes for the same
+    payload.
+    """
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        engine = app.config['JSON_ENGINE']
+        if engine not in ('auto', 'orjson', 'json'):
+            raise ValueError(f"Unknown JSON_ENGINE: {engine}")
+        if engine == 'orjson' and orjson is None:
+            raise ValueError("JSON_ENGINE 'orjson' needs the orjson package")
+        self.use_orjson = orjson is not None and engine != 'json'
+
+    def dumps(self, obj, **kwargs):
+        # response() passes separators (compact) or indent (debug); any other
+        # json.dumps argument goes to the standard library
+        if self.use_orjson and set(kwargs) <= {'separators', 'indent'}:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=_default, option=option).decode()
+            except TypeError:
+                # e.g. integers beyond 64 bits
+                pass
+        return super().dumps(obj, **kwargs)
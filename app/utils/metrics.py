@@ -0,0 +1,210 @@
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, has_app_context
+
+# Seconds; spans sub-millisecond rate lookups up to slow upstream API calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms kept in per-thread shards
+
+    Each thread only ever writes to its own shard, so recording a value
+    takes no lock: it is a dict lookup and an add. A scrape sums the
+    shards. Shards of threads that have exited are folded into one
+    retired shard, so thread-per-request servers do not grow the registry.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def collector(self, func):
+        """
+        Register a callable run at scrape time for values owned elsewhere
+
+        It returns a list of (name, type, documentation, [(labels, value)]).
+        """
+        self._collectors.append(func)
+        return func
+
+    def shard(self):
+        """Return the calling thread's shard, creating it on first use"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                if len(self._shards) > 2 * threading.active_count():
+                    self._fold_dead_shards()
+        return shard
+
+    def samples(self):
+        """Sum every shard into {(name, labelvalues): value}"""
+        with self._lock:
+            self._fold_dead_shards()
+            totals = {}
+            _merge(totals, self._retired)
+            for _, shard in self._shards:
+                _merge(totals, shard)
+        return totals
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        totals = self.samples()
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for (name, labelvalues), value in sorted(totals.items(), key=_sort_key):
+                if name == metric.name:
+                    lines.extend(metric.expose(labelvalues, value))
+
+        for collector in self._collectors:
+            for name, metric_type, documentation, values in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in values:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _fold_dead_shards(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                _merge(self._retired, shard)
+        self._shards = alive
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self.registry.shard()
+        key = (self.name, labelvalues)
+        shard[key] = shard.get(key, 0) + amount
+
+    def expose(self, labelvalues, value):
+        return [f'{self.name}{_format_labels(zip(self.labelnames, labelvalues))} {_format_value(value)}']
+
+
+class Histogram:
+    """Cumulative-bucket histogram; each shard holds [bucket counts..., +Inf, sum]"""
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        shard = self.registry.shard()
+        key = (self.name, labelvalues)
+        values = shard.get(key)
+        if values is None:
+            values = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def expose(self, labelvalues, values):
+        labels = list(zip(self.labelnames, labelvalues))
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), values[:-1]):
+            cumulative += count
+            le = '+Inf' if bound == math.inf else _format_value(bound)
+            lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", le)])} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {cumulative}')
+        return lines
+
+
+def timed(operation):
+    """
+    Record a service call's duration in fx_service_duration_seconds
+
+    Calls made outside an application with metrics enabled are not timed.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = current_app.extensions.get('metrics') if has_app_context() else None
+            if metrics is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.service_duration.observe(time.perf_counter() - start, operation)
+        return wrapper
+    return decorator
+
+
+def _merge(totals, shard):
+    # list() snapshots the items in one step, so a concurrent insert by the
+    # owning thread cannot break the iteration
+    for key, value in list(shard.items()):
+        if isinstance(value, list):
+            current = totals.get(key)
+            if current is None:
+                totals[key] = list(value)
+            else:
+                for index, item in enumerate(value):
+                    current[index] += item
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+
+def _sort_key(item):
+    (name, labelvalues), _ = item
+    return name, tuple(str(value) for value in labelvalues)
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else ('+Inf' if value > 0 else '-Inf')
+    return str(value)
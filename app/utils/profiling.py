@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Only one profile runs at a time per process; both kinds perturb the
+# process they measure and a second one would measure the first
+profile_lock = threading.Lock()
+
+# Frames that mean a thread is parked rather than working
+IDLE_FILES = ('threading.py', 'selectors.py', 'socketserver.py', 'queue.py', 'socket.py')
+
+
+class StackSampler:
+    """
+    Statistical CPU profiler over sys._current_frames
+
+    Every interval seconds it records the Python stack of each thread except
+    its own. A function's share of the samples approximates its share of
+    wall time; with idle threads left out, that is where the CPU goes.
+    """
+
+    def __init__(self, interval=0.01, include_idle=False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.counts = Counter()
+        self.samples = 0
+
+    def run(self, seconds):
+        """Sample for the given number of seconds and return the stack counts"""
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if not self.include_idle and _is_idle(frame):
+                    continue
+                stack = _stack(frame)
+                self.counts[(names.get(thread_id, str(thread_id)),) + stack] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return self.counts
+
+    def collapsed(self):
+        """Render 'thread;outer;...;leaf count' lines, the input of flamegraph.pl and speedscope"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.counts.most_common()]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+def allocation_diff(seconds, limit=20, group_by='lineno', frames=1):
+    """
+    Compare tracemalloc snapshots taken seconds apart
+
+    Tracing is started for the window if it is not already on, so only
+    allocations made during the window are seen; it is stopped again after.
+
+    Returns:
+        List of at most limit dicts, largest growth first, with location,
+        size_diff, size, count_diff and count
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+    try:
+        before = _snapshot()
+        time.sleep(seconds)
+        after = _snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return [
+        {
+            'location': [f'{_short_path(frame.filename)}:{frame.lineno}' for frame in stat.traceback],
+            'size_diff': stat.size_diff,
+            'size': stat.size,
+            'count_diff': stat.count_diff,
+            'count': stat.count,
+        }
+        for stat in after.compare_to(before, group_by)[:limit]
+    ]
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ))
+
+
+def _stack(frame):
+    """Frame labels from outermost to innermost"""
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        # co_qualname (Class.method) exists from Python 3.11 only
+        name = getattr(code, 'co_qualname', code.co_name)
+        labels.append(f'{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _is_idle(frame):
+    return os.path.basename(frame.f_code.co_filename) in IDLE_FILES
+
+
+def _short_path(filename):
+    """Path relative to the working directory or the site-packages it lives in"""
+    for prefix in (os.getcwd() + os.sep, 'site-packages' + os.sep):
+        index = filename.find(prefix)
+        if index != -1:
+            return filename[index + len(prefix):]
+    return filename
@@ -0,0 +1,116 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode((data + '=' * (-len(data) % 4)).encode())
+
+
+def _signing_key(secret_key):
+    """Derive the token key so quote tokens and Flask sessions never share one"""
+    return hmac.new(secret_key.encode(), b'quote-token', hashlib.sha256).digest()
+
+
+def _signature(body, secret_key):
+    return hmac.new(_signing_key(secret_key), body.encode(), hashlib.sha256).digest()
+
+
+def sign_quote(quote, secret_key):
+    """
+    Serialize a quote into an HMAC-SHA256 signed token
+
+    The token is "<base64url JSON payload>.<base64url signature>" and holds
+    everything needed to execute the quote later without a database read.
+    """
+    payload = json.dumps({
+        'id': quote.id,
+        'from_currency': quote.from_currency,
+        'to_currency': quote.to_currency,
+        'from_amount': str(quote.from_amount),
+        'to_amount': str(quote.to_amount),
+        'exchange_rate': str(quote.exchange_rate),
+        'created_at': quote.created_at.isoformat(),
+        'expires_at': quote.expires_at.isoformat()
+    }, separators=(',', ':'), sort_keys=True)
+
+    body = _b64encode(payload.encode())
+    return f"{body}.{_b64encode(_signature(body, secret_key))}"
+
+
+def verify_quote(token, secret_key):
+    """
+    Verify a quote token and return its fields
+
+    Returns:
+        Dict of Quote column values with Decimal amounts and datetimes
+
+    Raises:
+        ValueError: If the token is malformed or the signature does not match
+    """
+    try:
+        body, signature = token.split('.')
+        valid = hmac.compare_digest(_b64decode(signature), _signature(body, secret_key))
+    except (AttributeError, ValueError, TypeError):
+        raise ValueError("Invalid quote token")
+
+    if not valid:
+        raise ValueError("Invalid quote token")
+
+    try:
+        data = json.loads(_b64decode(body))
+        return {
+            'id': data['id'],
+            'from_currency': data['from_currency'],
+            'to_currency': data['to_currency'],
+            'from_amount': Decimal(data['from_amount']),
+            'to_amount': Decimal(data['to_amount']),
+            'exchange_rate': Decimal(data['exchange_rate']),
+            'created_at': datetime.fromisoformat(data['created_at']),
+            'expires_at': datetime.fromisoformat(data['expires_at'])
+        }
+    except (KeyError, TypeError, ValueError, InvalidOperation):
+        raise ValueError("Invalid quote token")
+
+
+class ExecutedTokenStore:
+    """
+    Compact in-process record of executed quote token IDs
+
+    An ID only needs to be remembered until its token expires, because
+    expired tokens are rejected before the store is consulted. Entries are
+    kept in expiry order and pruned from the front on every insert.
+    """
+
+    def __init__(self):
+        self._expiries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, token_id, expires_at):
+        with self._lock:
+            self._expiries[token_id] = expires_at
+            self._prune(datetime.utcnow())
+
+    def __contains__(self, token_id):
+        return token_id in self._expiries
+
+    def __len__(self):
+        return len(self._expiries)
+
+    def _prune(self, now):
+        # Quotes share one validity period, so insertion order is close to
+        # expiry order; stop at the first live entry
+        while self._expiries:
+            token_id, expires_at = next(iter(self._expiries.items()))
+            if expires_at > now:
+                break
+            del self._expiries[token_id]
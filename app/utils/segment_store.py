@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are serialized per process only
+    fcntl = None
+
+_SEGMENT_NAME = re.compile(r'^segment-(\d{6})\.jsonl\.gz$')
+
+
+class SegmentStore:
+    """
+    Append-only archive of JSON records in gzip segment files
+
+    Each append writes one gzip member holding one JSON line per record and
+    returns where it landed as (segment, offset, length). Concatenated gzip
+    members are still a valid gzip file, so a segment can be read whole with
+    zcat, while a single member can be read back by seeking to its offset.
+    Segments roll over once they pass max_bytes and are never rewritten.
+    Appends hold an exclusive flock on the segment, so sweepers in several
+    processes can share a directory.
+    """
+
+    def __init__(self, directory, max_bytes, cache_size=32):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def append(self, records):
+        """
+        Write records as one compressed member and flush it to disk
+
+        Returns:
+            Tuple of (segment name, byte offset, byte length)
+        """
+        payload = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        member = gzip.compress(payload.encode('utf-8'))
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segment = self._current_segment()
+            with open(os.path.join(self.directory, segment), 'ab') as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    # Another process may have appended since the file was opened
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(member)
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return segment, offset, len(member)
+
+    def read(self, segment, offset, length):
+        """Return the records of the member at offset"""
+        key = (segment, offset)
+        with self._cache_lock:
+            records = self._cache.get(key)
+            if records is not None:
+                self._cache.move_to_end(key)
+                return records
+
+        if not _SEGMENT_NAME.match(segment):
+            raise ValueError(f"Invalid archive segment: {segment}")
+        with open(os.path.join(self.directory, segment), 'rb') as f:
+            f.seek(offset)
+            member = f.read(length)
+        records = [json.loads(line) for line in gzip.decompress(member).splitlines() if line]
+
+        # Members are immutable, so cached copies never go stale
+        with self._cache_lock:
+            self._cache[key] = records
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return records
+
+    def segments(self):
+        """Names of the segment files, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if _SEGMENT_NAME.match(name))
+
+    def _current_segment(self):
+        segments = self.segments()
+        if not segments:
+            return self._segment_name(1)
+        latest = segments[-1]
+        if os.path.getsize(os.path.join(self.directory, latest)) < self.max_bytes:
+            return latest
+        return self._segment_name(int(_SEGMENT_NAME.match(latest).group(1)) + 1)
+
+    @staticmethod
+    def _segment_name(number):
+        return f'segment-{number:06d}.jsonl.gz'
@@ -0,0 +1,153 @@
+import heapq
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from app import db
+
+
+class StatementBudgetExceeded(AssertionError):
+    """A request issued more SQL statements than its endpoint's budget"""
+
+
+class StatementProfile:
+    """Statements issued during one request or profiled block"""
+
+    def __init__(self, keep_slowest):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest = []
+        self.shapes = Counter()
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.seconds += elapsed
+        self.shapes[statement] += 1
+        if self.keep_slowest:
+            entry = (elapsed, self.count, statement)
+            if len(self.slowest) < self.keep_slowest:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def slowest_statements(self):
+        """[(seconds, statement)] slowest first"""
+        return [(elapsed, statement) for elapsed, _, statement in sorted(self.slowest, reverse=True)]
+
+    def repeated(self, threshold):
+        """
+        Statements run at least threshold times
+
+        Statement text is parameterized, so the same text with different
+        parameters is the same query issued in a loop, the usual N+1 shape.
+        """
+        return [(statement, times) for statement, times in self.shapes.most_common()
+                if times >= threshold]
+
+
+def statement_budget(limit):
+    """Declare the most SQL statements a route may issue per request"""
+    def decorator(view):
+        view.statement_budget = limit
+        return view
+    return decorator
+
+
+@contextmanager
+def profile_statements(keep_slowest=5):
+    """
+    Profile the statements issued inside the block
+
+    Needs SQL_PROFILING_ENABLED. Profiles nest: an outer profile and the
+    current request's profile also see the statements.
+    """
+    profile = StatementProfile(keep_slowest)
+    stack = g.setdefault('sql_profiles', [])
+    stack.append(profile)
+    try:
+        yield profile
+    finally:
+        stack.remove(profile)
+
+
+def init_sql_profiler(app):
+    """Profile the SQL each request issues; see SQL_PROFILING_ENABLED in config.py"""
+    keep_slowest = app.config['SQL_PROFILE_SLOWEST']
+    logger = app.logger
+
+    @app.before_request
+    def start_profile():
+        g.sql_request_profile = profile = StatementProfile(keep_slowest)
+        g.setdefault('sql_profiles', []).append(profile)
+
+    @app.after_request
+    def report_profile(response):
+        profile = g.pop('sql_request_profile', None)
+        if profile is None:
+            return response
+        g.sql_profiles.remove(profile)
+        endpoint = request.endpoint or 'unmatched'
+
+        if app.config['SQL_PROFILE_HEADERS']:
+            db_ms = profile.seconds * 1000
+            response.headers['X-SQL-Statements'] = str(profile.count)
+            response.headers['X-SQL-Time-Ms'] = f'{db_ms:.3f}'
+            response.headers.add('Server-Timing', f'db;dur={db_ms:.3f};desc="{profile.count} statements"')
+
+        logger.debug('%s %s: %d statements in %.3f ms', request.method, endpoint,
+                     profile.count, profile.seconds * 1000)
+        for elapsed, statement in profile.slowest_statements():
+            logger.debug('  %.3f ms  %s', elapsed * 1000, ' '.join(statement.split()))
+
+        repeated = profile.repeated(app.config['SQL_REPEATED_STATEMENT_THRESHOLD'])
+        for statement, times in repeated:
+            logger.warning('%s %s ran the same statement %d times (possible N+1): %s',
+                           request.method, endpoint, times, ' '.join(statement.split()))
+
+        budget = _budget_for(endpoint)
+        if budget is not None and profile.count > budget:
+            message = (f'{request.method} {endpoint} issued {profile.count} SQL statements, '
+                       f'over its budget of {budget}')
+            if app.config['SQL_BUDGET_ENFORCE']:
+                raise StatementBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    with app.app_context():
+        engine = db.engine
+
+    # Timed on the statement's execution context so a failed statement
+    # leaves nothing behind for the next one to pick up
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.fx_profile_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'fx_profile_started', None)
+        if started is None:
+            return
+        context.fx_profile_started = None
+        elapsed = time.perf_counter() - started
+        profiles = g.get('sql_profiles') if has_app_context() else None
+        if profiles:
+            for profile in profiles:
+                profile.record(statement, elapsed)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_statement(exception_context):
+        context = exception_context.execution_context
+        if context is not None:
+            context.fx_profile_started = None
+
+
+def _budget_for(endpoint):
+    """SQL_STATEMENT_BUDGETS overrides the budget declared on the view"""
+    budgets = current_app.config['SQL_STATEMENT_BUDGETS']
+    if endpoint in budgets:
+        return budgets[endpoint]
+    view = current_app.view_functions.get(endpoint)
+    return getattr(view, 'statement_budget', None)
@@ -0,0 +1,255 @@
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from app import db
+
+# W3C Trace Context: version-trace_id-parent_id-flags
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = ContextVar('fx_current_span', default=None)
+
+
+class Span:
+    """One timed operation in a trace; children share their root's span list"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'status',
+                 'start_time', 'duration', '_started', '_finished', '_exporter')
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None,
+                 finished=None, exporter=None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.status = 'ok'
+        self.start_time = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+        # Spans of the trace that have ended; a root span also has the
+        # exporter and hands the list to it when it ends
+        self._finished = [] if finished is None else finished
+        self._exporter = exporter
+
+    def child(self, name, **attributes):
+        return Span(name, self.trace_id, self.span_id, attributes, self._finished)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, error=None):
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.status = 'error'
+            self.attributes['error'] = f'{type(error).__name__}: {error}'
+        self._finished.append(self)
+        if self._exporter is not None:
+            self._exporter.export(self._finished)
+
+    def traceparent(self):
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+        }
+
+
+class SpanExporter:
+    """Receives the spans of each sampled trace when its root span ends"""
+
+    def export(self, spans):
+        raise NotImplementedError
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span.to_dict(), default=str) + '\n' for span in spans)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(lines)
+
+
+class MemorySpanExporter(SpanExporter):
+    """Keeps exported spans in a list, for tests and interactive use"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class Tracer:
+    """
+    Starts root spans with head-based sampling
+
+    The sampling decision is made once per trace, when the root span would
+    start: a request carrying a traceparent header follows the caller's
+    sampled flag, anything else is sampled with probability sample_rate.
+    Unsampled requests create no spans at all, so every span() call in them
+    is a context variable read.
+    """
+
+    def __init__(self, exporter, sample_rate):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start_trace(self, name, traceparent=None, **attributes):
+        """Return a root span, or None if the trace is not sampled"""
+        match = TRACEPARENT.match(traceparent or '')
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            if not int(flags, 16) & 1:
+                return None
+        else:
+            if random.random() >= self.sample_rate:
+                return None
+            trace_id, parent_id = os.urandom(16).hex(), None
+        return Span(name, trace_id, parent_id, attributes, exporter=self.exporter)
+
+
+class _SpanScope:
+    """Makes a span current for a with block and ends it on exit"""
+
+    __slots__ = ('span', '_token')
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.span.end(exc)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def current_span():
+    """Return the active span, or None outside a sampled trace"""
+    return _current.get()
+
+
+def span(name, **attributes):
+    """Context manager timing a child of the active span; a no-op outside a sampled trace"""
+    parent = _current.get()
+    if parent is None:
+        return _NO_SPAN
+    return _SpanScope(parent.child(name, **attributes))
+
+
+def traced(name):
+    """Decorator running the function in a child span of the active span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return func(*args, **kwargs)
+            with _SpanScope(parent.child(name)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def build_exporter(config):
+    """TRACING_EXPORTER is 'jsonl' or a SpanExporter instance"""
+    exporter = config['TRACING_EXPORTER']
+    if isinstance(exporter, SpanExporter):
+        return exporter
+    if exporter == 'jsonl':
+        return JsonlSpanExporter(config['TRACING_FILE'])
+    raise ValueError(f"Unknown TRACING_EXPORTER: {exporter}")
+
+
+def init_tracing(app, blueprints=('fx',)):
+    """Trace requests to the given blueprints, their services and their SQL"""
+    tracer = Tracer(build_exporter(app.config), app.config['TRACING_SAMPLE_RATE'])
+    app.extensions['tracer'] = tracer
+
+    @app.before_request
+    def start_request_span():
+        if request.blueprint not in blueprints:
+            return
+        rule = request.url_rule.rule if request.url_rule else request.path
+        root = tracer.start_trace(f'{request.method} {rule}', request.headers.get('traceparent'),
+                                  **{'http.method': request.method, 'http.route': rule})
+        if root is not None:
+            g.trace_root = root
+            g.trace_token = _current.set(root)
+
+    @app.after_request
+    def tag_response(response):
+        root = g.get('trace_root')
+        if root is not None:
+            root.set_attribute('http.status_code', response.status_code)
+            response.headers['traceparent'] = root.traceparent()
+        return response
+
+    @app.teardown_request
+    def end_request_span(exc):
+        root = g.pop('trace_root', None)
+        if root is not None:
+            _current.reset(g.pop('trace_token'))
+            root.end(exc)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_span(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is not None and context is not None:
+            context.fx_span = parent.child('db.query', statement=' '.join(statement.split()))
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def end_statement_span(conn, cursor, statement, parameters, context, executemany):
+        statement_span = getattr(context, 'fx_span', None)
+        if statement_span is not None:
+            context.fx_span = None
+            statement_span.end()
+
+    @event.listens_for(engine, 'handle_error')
+    def fail_statement_span(exception_context):
+        context = exception_context.execution_context
+        statement_span = getattr(context, 'fx_span', None)
+        if statement_span is not None:
+            context.fx_span = None
+            statement_span.end(exception_context.original_exception)
+
+    return tracer
@@ -34,3 +34,14 @@ def validate_currency_pair(from_currency, to_currency):
         raise ValueError("Source and target currencies must be different")
 
     return True
+
+
+def validate_idempotency_key(key):
+    """Validate a client-supplied idempotency key"""
+    if not isinstance(key, str) or not key.strip():
+        raise ValueError("Idempotency key must be a non-empty string")
+
+    if len(key) > 255:
+        raise ValueError("Idempotency key must be at most 255 characters")
+
+    return True
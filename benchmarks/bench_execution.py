@@ -0,0 +1,95 @@
+"""
+Execution throughput of QUOTE_EXECUTION_MODE 'locking' against 'optimistic'
+
+Generates --threads x --quotes quotes per mode in a file-backed SQLite
+database, then executes them from --threads threads at once and reports
+executions per second. With --shared every thread executes every quote,
+so most calls lose the race and take the replay path; otherwise the
+quotes are split between the threads.
+
+    python -m benchmarks.bench_execution [--threads 8] [--quotes 25] [--shared]
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app import create_app, db
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+
+MODES = ('locking', 'optimistic')
+
+
+def hammer(app, quote_ids, threads, shared):
+    """Execute quotes from many threads; return executions, errors and elapsed seconds"""
+    executed = []
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker(seed):
+        order = list(quote_ids) if shared else list(quote_ids[seed::threads])
+        random.Random(seed).shuffle(order)
+        with app.app_context():
+            barrier.wait()
+            for quote_id in order:
+                try:
+                    FXService.execute_quote(quote_id)
+                    executed.append(quote_id)
+                except Exception as e:
+                    errors.append(repr(e))
+                    db.session.rollback()
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return len(executed), errors, time.perf_counter() - started
+
+
+def run(mode, args, directory):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(directory) / f'{mode}.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'QUOTE_EXECUTION_MODE': mode,
+        'SQL_PROFILING_ENABLED': False,
+        'SQL_BUDGET_ENFORCE': False,
+    })
+    with app.app_context():
+        db.create_all()
+        RateService.seed_initial_rates()
+        quote_ids = [result['quote'].id for result in FXService.generate_quotes([
+            {'from_currency': 'USD', 'to_currency': 'KES', 'amount': str(i + 1)}
+            for i in range(args.threads * args.quotes)
+        ])]
+        db.session.remove()
+
+    executions, errors, elapsed = hammer(app, quote_ids, args.threads, args.shared)
+    with app.app_context():
+        db.engine.dispose()
+    return executions / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--quotes', type=int, default=25, help='Quotes per thread')
+    parser.add_argument('--shared', action='store_true', help='Every thread executes every quote')
+    args = parser.parse_args()
+
+    print(f"{'mode':12s} {'executions/s':>13s} {'errors':>7s}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            rate, errors = run(mode, args, directory)
+            print(f"{mode:12s} {rate:13.0f} {len(errors):7d}")
+            for error in errors[:5]:
+                print(f"  {error}")
+
+
+if __name__ == '__main__':
+    main()
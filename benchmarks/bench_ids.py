@@ -0,0 +1,95 @@
+"""
+Insert throughput and index size per ID_STRATEGY / ID_STORAGE
+
+Bulk inserts the same quotes into a file-backed SQLite database once per
+id configuration, committing every --batch rows, then reports rows per
+second and the on-disk size of the quotes table and its primary key index
+(from the dbstat virtual table).
+
+    python -m benchmarks.bench_ids [--rows N] [--batch B]
+"""
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import insert, text
+
+from app import create_app, db
+from app.models.quote import Quote
+from app.utils.ids import generate_id
+
+CONFIGURATIONS = [
+    ('uuid4', 'string'),
+    ('uuid7', 'string'),
+    ('ulid', 'string'),
+    ('uuid7', 'binary'),
+    ('ulid', 'binary'),
+]
+
+
+def quote_rows(count):
+    created_at = datetime(2024, 1, 1)
+    for _ in range(count):
+        yield {
+            'id': generate_id(),
+            'from_currency': 'USD',
+            'to_currency': 'KES',
+            'from_amount': Decimal('100.00'),
+            'to_amount': Decimal('12950.00'),
+            'exchange_rate': Decimal('129.50000000'),
+            'created_at': created_at,
+            'expires_at': created_at + timedelta(seconds=60),
+            'is_executed': False
+        }
+
+
+def run(strategy, storage, rows, batch, directory):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(directory) / f'{strategy}-{storage}.db'}",
+        'ID_STRATEGY': strategy,
+        'ID_STORAGE': storage
+    })
+    with app.app_context():
+        start = time.perf_counter()
+        pending = []
+        for row in quote_rows(rows):
+            pending.append(Quote.storage_row(row))
+            if len(pending) == batch:
+                db.session.execute(insert(Quote), pending)
+                db.session.commit()
+                pending = []
+        if pending:
+            db.session.execute(insert(Quote), pending)
+            db.session.commit()
+        elapsed = time.perf_counter() - start
+
+        sizes = dict(db.session.execute(text(
+            "SELECT name, SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = 'quotes') GROUP BY name"
+        )).all())
+        db.session.remove()
+
+    table_size = sizes.pop('quotes', 0)
+    index_size = sum(size for name, size in sizes.items() if name.startswith('sqlite_autoindex_quotes'))
+    return rows / elapsed, table_size, index_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'strategy':10s} {'storage':8s} {'rows/s':>10s} {'table MiB':>10s} {'pk index MiB':>13s}")
+    with tempfile.TemporaryDirectory() as directory:
+        for strategy, storage in CONFIGURATIONS:
+            rate, table_size, index_size = run(strategy, storage, args.rows, args.batch, directory)
+            print(f"{strategy:10s} {storage:8s} {rate:10.0f} "
+                  f"{table_size / 2 ** 20:10.2f} {index_size / 2 ** 20:13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Transaction volume aggregation under each MONEY_STORAGE_MODE
+
+Fills a file-backed SQLite database with the same transactions stored as
+Numeric and as integer minor units, then times the per-pair volume query
+and loading a page of rows.
+
+    python -m benchmarks.bench_money_storage [--rows N] [--repeat R]
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.utils.ids import generate_id
+
+PAIRS = [('USD', 'KES'), ('USD', 'EUR'), ('EUR', 'NGN'), ('KES', 'NGN')]
+
+
+def make_rows(count, seed=7):
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        from_currency, to_currency = rnd.choice(PAIRS)
+        amount = Decimal(rnd.randint(100, 10 ** 8)).scaleb(-2)
+        rate = Decimal(rnd.randint(10 ** 6, 2 * 10 ** 11)).scaleb(-8)
+        rows.append({
+            'id': generate_id(),
+            'quote_id': generate_id(),
+            'from_currency': from_currency,
+            'to_currency': to_currency,
+            'from_amount': amount,
+            'to_amount': (amount * rate).quantize(Decimal('0.01')),
+            'exchange_rate': rate,
+            'status': 'completed',
+            'created_at': start + timedelta(seconds=i)
+        })
+    return rows
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def run_mode(mode, rows, repeat, directory):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(directory) / (mode + '.db')}",
+        'MONEY_STORAGE_MODE': mode
+    })
+    with app.app_context():
+        for offset in range(0, len(rows), 10000):
+            db.session.execute(
+                insert(Transaction),
+                [Transaction.storage_row(row) for row in rows[offset:offset + 10000]]
+            )
+        db.session.commit()
+
+        volume_ms = best_of(repeat, FXService.get_transaction_volume)
+        page_ms = best_of(repeat, lambda: FXService.get_transaction_history(limit=1000))
+        db.session.remove()
+    return volume_ms, page_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('numeric', 'minor_units'):
+            volume_ms, page_ms = run_mode(mode, rows, args.repeat, directory)
+            print(f"{mode:12s} volume {volume_ms:9.2f} ms   1000-row page {page_ms:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
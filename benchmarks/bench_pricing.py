@@ -0,0 +1,86 @@
+"""
+Per-quote CPU cost of the pricing engines
+
+Prices the same set of (amount, rate) pairs with each engine the way
+FXService does for one quote: apply the buy spread, convert the amount and
+round the rate. Rates repeat, as they do when quotes are served from the
+rate snapshot.
+
+The "core" rows time only the conversion itself: Decimal multiply and
+round_currency against one integer multiply and rounding on minor units,
+i.e. the cost once amounts are carried as integers end to end.
+
+    python -m benchmarks.bench_pricing [--quotes N] [--repeat R]
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from app.services.pricing import DecimalPricer, FixedPointPricer
+from app.utils.decimal_utils import round_currency
+from app.utils.fixed_point import convert_minor_units, to_minor_units, to_scaled
+
+SPREAD_BPS = 50
+
+
+def make_inputs(count, seed=42):
+    rnd = random.Random(seed)
+    # A handful of snapshot rates, some with full 28-digit cross-rate precision
+    rates = [Decimal('129.5'), Decimal('0.92'), Decimal('1580.25'),
+             Decimal('1') / Decimal('0.92'), Decimal('1580.25') / Decimal('129.5')]
+    return [
+        (Decimal(rnd.randint(1, 10 ** 9)).scaleb(-rnd.randint(0, 4)), rnd.choice(rates))
+        for _ in range(count)
+    ]
+
+
+def price_all(pricer, inputs):
+    for amount, rate in inputs:
+        rate_with_spread = pricer.apply_spread(rate, SPREAD_BPS, is_buy=True)
+        pricer.convert(amount, rate_with_spread)
+        pricer.round_rate(rate_with_spread)
+
+
+def convert_decimal(inputs):
+    for amount, rate in inputs:
+        round_currency(amount * rate)
+
+
+def convert_fixed(inputs):
+    for amount_minor, rate in inputs:
+        convert_minor_units(amount_minor, rate)
+
+
+def bench(func, inputs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(inputs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(inputs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quotes', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.quotes)
+    engines = {
+        'decimal': DecimalPricer(),
+        'fixed_point': FixedPointPricer((SPREAD_BPS,))
+    }
+    for name, pricer in engines.items():
+        cost = bench(lambda items: price_all(pricer, items), inputs, args.repeat)
+        print(f"{name:18s} {cost:8.3f} us/quote")
+
+    minor_inputs = [(to_minor_units(amount), to_scaled(rate)) for amount, rate in inputs]
+    print(f"{'decimal core':18s} {bench(convert_decimal, inputs, args.repeat):8.3f} us/quote")
+    print(f"{'fixed_point core':18s} {bench(convert_fixed, minor_inputs, args.repeat):8.3f} us/quote")
+
+
+if __name__ == '__main__':
+    main()
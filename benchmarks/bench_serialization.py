@@ -0,0 +1,117 @@
+"""
+Payload throughput of the transaction history response
+
+Serializes pages of history the old way (load Transaction objects, call
+to_dict() on each, encode with Flask's stock JSON provider) and the new way
+(read plain column rows, build the dicts from them, encode with
+FXJSONProvider on each available JSON_ENGINE). Fetch and encode are timed
+separately and together, and the full GET /transactions route is timed on
+each engine.
+
+    python -m benchmarks.bench_serialization [--rows N] [--page P] [--repeat R]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app, db
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.utils import json_provider
+from app.utils.json_provider import FXJSONProvider
+from benchmarks.run import grow_transactions
+
+
+def fetch_orm(page):
+    """History as it was built before column-level serialization"""
+    transactions = Transaction.query.order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()
+    ).limit(page).all()
+    rows = [transaction.to_dict() for transaction in transactions]
+    db.session.expunge_all()
+    return rows
+
+
+def fetch_columns(page):
+    return FXService.get_transaction_history(page)
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def report(name, seconds, page, payload_bytes=None):
+    line = f"{name:34s} {seconds * 1000:9.2f} ms  {page / seconds:11.0f} rows/s"
+    if payload_bytes is not None:
+        line += f"  {payload_bytes / seconds / 2 ** 20:8.1f} MiB/s"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20000, help='Transactions in the table')
+    parser.add_argument('--page', type=int, default=1000, help='Rows per response')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    engines = ['json'] + (['orjson'] if json_provider.orjson is not None else [])
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(directory) / 'bench.db'}",
+            'ARCHIVE_DIR': str(Path(directory) / 'archive'),
+            'MAX_HISTORY_LIMIT': args.page,
+            'SQL_PROFILING_ENABLED': False,
+        })
+        with app.app_context():
+            grow_transactions(args.rows)
+            stock = DefaultJSONProvider(app)
+            providers = {}
+            for engine in engines:
+                app.config['JSON_ENGINE'] = engine
+                providers[engine] = FXJSONProvider(app)
+
+            assert fetch_orm(args.page) == fetch_columns(args.page)
+            print(f"{args.page} of {args.rows} rows, best of {args.repeat}\n")
+
+            orm_seconds, orm_rows = best_of(lambda: fetch_orm(args.page), args.repeat)
+            column_seconds, column_rows = best_of(lambda: fetch_columns(args.page), args.repeat)
+            report('fetch: ORM objects + to_dict', orm_seconds, args.page)
+            report('fetch: column rows', column_seconds, args.page)
+
+            stock_seconds, payload = best_of(lambda: stock.dumps(orm_rows), args.repeat)
+            report('encode: stock provider', stock_seconds, args.page, len(payload))
+            for engine, provider in providers.items():
+                seconds, payload = best_of(lambda: provider.dumps(column_rows), args.repeat)
+                report(f'encode: FXJSONProvider {engine}', seconds, args.page, len(payload))
+
+            before, payload = best_of(lambda: stock.dumps(fetch_orm(args.page)), args.repeat)
+            print()
+            report('before: ORM + stock provider', before, args.page, len(payload))
+            for engine, provider in providers.items():
+                seconds, payload = best_of(lambda: provider.dumps(fetch_columns(args.page)), args.repeat)
+                report(f'after: columns + {engine}', seconds, args.page, len(payload))
+
+            print()
+            client = app.test_client()
+            url = f'/api/v1/transactions?limit={args.page}'
+            for engine, provider in providers.items():
+                app.json = provider
+                seconds, response = best_of(lambda: client.get(url), args.repeat)
+                report(f'route: GET /transactions {engine}', seconds, args.page,
+                       len(response.get_data()))
+
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Timing, summary statistics and baseline comparison shared by the benchmarks
+"""
+import json
+import math
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def measure(func, iterations, warmup=0, setup=None):
+    """
+    Time func once per iteration and return the samples in seconds
+
+    When setup is given it is called before each iteration, outside the
+    timed region, and its return value is passed to func.
+    """
+    for _ in range(warmup):
+        func(setup()) if setup else func()
+
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            arg = setup()
+            start = time.perf_counter()
+            func(arg)
+        else:
+            start = time.perf_counter()
+            func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of already sorted samples"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds and throughput of one case"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'iterations': len(ordered),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 4),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+        'mean_ms': round(total / len(ordered) * 1000, 4) if ordered else 0.0,
+        'ops_per_sec': round(len(ordered) / total, 1) if total else 0.0,
+    }
+
+
+def environment():
+    """Describe where the numbers were measured"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_revision': revision,
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+    }
+
+
+def write_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two reports case by case
+
+    A case regresses when its p50 latency grew, or its throughput fell, by
+    more than threshold (0.2 = 20%) relative to the baseline. Cases present
+    in only one report are listed but never count as regressions.
+
+    Returns:
+        List of dicts with case, p50 and ops ratios and a regressed flag
+    """
+    rows = []
+    base_results = baseline.get('results', {})
+    for case, result in current.get('results', {}).items():
+        base = base_results.get(case)
+        if base is None:
+            rows.append({'case': case, 'status': 'new'})
+            continue
+        p50_ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        ops_ratio = result['ops_per_sec'] / base['ops_per_sec'] if base['ops_per_sec'] else 1.0
+        regressed = p50_ratio > 1 + threshold or ops_ratio < 1 / (1 + threshold)
+        rows.append({
+            'case': case,
+            'status': 'REGRESSION' if regressed else 'ok',
+            'base_p50_ms': base['p50_ms'],
+            'p50_ms': result['p50_ms'],
+            'p50_ratio': round(p50_ratio, 3),
+            'ops_ratio': round(ops_ratio, 3),
+        })
+    for case in base_results:
+        if case not in current.get('results', {}):
+            rows.append({'case': case, 'status': 'missing'})
+    return rows
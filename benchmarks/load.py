@@ -0,0 +1,484 @@
+"""
+Concurrent load and soak test with correctness checks
+
+Drives a weighted mix of quote, execute, rate-update and read traffic from
+--threads threads in each of --processes processes for --duration seconds,
+either against a running server (--url) or in-process through the Flask
+test client of an app built by the same create_app factory as run.py,
+backed by a scratch SQLite file unless --database-url is given.
+
+Executions deliberately contend: threads of a process share a pool of
+recent quotes, some executions repeat a quote already executed, some
+carry an idempotency key and some target quotes old enough to have
+expired. Afterwards the database is checked for the invariants below and
+the run fails if any is violated, or if any request got a 5xx (or no
+response at all):
+
+- no quote has more than one transaction
+- every executed quote has a transaction and every transaction's quote is executed
+- no transaction was created after its quote expired
+- every client saw the same transaction for the same quote
+
+    python -m benchmarks.load [--threads 16] [--duration 60] [--mix quote=45,execute=35,rate=5,read=15]
+    python -m benchmarks.load --url http://127.0.0.1:5000 --database-url sqlite:////path/fx_engine.db
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from decimal import Decimal
+
+API = '/api/v1'
+OPERATIONS = ('quote', 'execute', 'rate', 'read')
+PAIRS = [('USD', 'KES'), ('USD', 'EUR'), ('EUR', 'NGN'), ('KES', 'NGN'), ('NGN', 'USD')]
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram that can be merged across workers
+
+    Buckets grow by 5%, so percentiles are accurate to within 5% while
+    memory stays constant however long the soak runs.
+    """
+
+    GROWTH = 1.05
+
+    def __init__(self, counts=None):
+        self.counts = defaultdict(int, counts or {})
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        self.counts[int(math.log(micros, self.GROWTH))] += 1
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] += count
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction, in milliseconds"""
+        total = self.total
+        if not total:
+            return 0.0
+        rank = max(1, math.ceil(fraction * total))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return self.GROWTH ** (bucket + 1) / 1000
+        return 0.0
+
+    def coarse(self, edges_ms=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)):
+        """Counts per coarse latency range, for printing"""
+        ranges = [0] * (len(edges_ms) + 1)
+        for bucket, count in self.counts.items():
+            upper_ms = self.GROWTH ** (bucket + 1) / 1000
+            index = next((i for i, edge in enumerate(edges_ms) if upper_ms <= edge), len(edges_ms))
+            ranges[index] += count
+        labels = [f'<={edge}ms' for edge in edges_ms] + [f'>{edges_ms[-1]}ms']
+        return dict(zip(labels, ranges))
+
+
+class RunStats:
+    """Latencies, outcomes and per-second throughput of one worker or of the whole run"""
+
+    def __init__(self):
+        self.histograms = defaultdict(LatencyHistogram)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.timeline = defaultdict(lambda: [0, 0])
+        # quote id -> {'transactions': set of ids, 'late': executions after expiry}
+        self.executions = {}
+
+    def record(self, operation, seconds, outcome, elapsed_second):
+        self.histograms[operation].record(seconds)
+        self.outcomes[operation][outcome] += 1
+        self.timeline[elapsed_second][0] += 1
+        if outcome == 'error':
+            self.timeline[elapsed_second][1] += 1
+
+    def record_execution(self, quote_id, transaction_id, late):
+        entry = self.executions.setdefault(quote_id, {'transactions': set(), 'late': 0})
+        entry['transactions'].add(transaction_id)
+        entry['late'] += int(late)
+
+    def merge(self, other):
+        for operation, histogram in other.histograms.items():
+            self.histograms[operation].merge(histogram)
+        for operation, outcomes in other.outcomes.items():
+            for outcome, count in outcomes.items():
+                self.outcomes[operation][outcome] += count
+        for second, (ops, errors) in other.timeline.items():
+            self.timeline[second][0] += ops
+            self.timeline[second][1] += errors
+        for quote_id, entry in other.executions.items():
+            merged = self.executions.setdefault(quote_id, {'transactions': set(), 'late': 0})
+            merged['transactions'] |= entry['transactions']
+            merged['late'] += entry['late']
+
+    def to_state(self):
+        """Plain data for passing between processes"""
+        return {
+            'histograms': {op: dict(h.counts) for op, h in self.histograms.items()},
+            'outcomes': {op: dict(o) for op, o in self.outcomes.items()},
+            'timeline': dict(self.timeline),
+            'executions': self.executions,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        for op, counts in state['histograms'].items():
+            stats.histograms[op] = LatencyHistogram(counts)
+        for op, outcomes in state['outcomes'].items():
+            stats.outcomes[op].update(outcomes)
+        for second, values in state['timeline'].items():
+            stats.timeline[second] = list(values)
+        stats.executions = state['executions']
+        return stats
+
+
+class InProcessClient:
+    """Calls the app through its test client; one per thread"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(f'{API}{path}', method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """Calls a running server over a keep-alive session; one per thread"""
+
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, body=None):
+        response = self.session.request(method, f'{self.url}{API}{path}', json=body, timeout=30)
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return response.status_code, data
+
+
+class QuotePool:
+    """Recent quotes shared by the threads of one process, so executions collide"""
+
+    def __init__(self, size=1000):
+        self._quotes = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, quote_id, expires_at):
+        with self._lock:
+            self._quotes.append((quote_id, expires_at))
+
+    def pick(self, rnd):
+        with self._lock:
+            if not self._quotes:
+                return None
+            roll = rnd.random()
+            if roll < 0.6:
+                return self._quotes[-1]
+            if roll < 0.9:
+                return self._quotes[rnd.randrange(len(self._quotes))]
+            # The oldest quotes are the ones most likely to have expired
+            return self._quotes[rnd.randrange(min(10, len(self._quotes)))]
+
+
+def parse_mix(value):
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'; use {', '.join(OPERATIONS)}")
+        weights[name] = float(weight)
+    return weights
+
+
+def _outcome(status):
+    if status >= 500:
+        return 'error'
+    return 'ok' if status < 400 else 'rejected'
+
+
+def run_operation(client, operation, rnd, pool, stats, started):
+    """Issue one request of the given kind and record what happened"""
+    quote_id = expires_at = None
+    if operation == 'quote':
+        from_currency, to_currency = rnd.choice(PAIRS)
+        request = ('POST', '/quotes', {'from_currency': from_currency, 'to_currency': to_currency,
+                                       'amount': str(Decimal(rnd.randint(100, 10 ** 7)) / 100)})
+    elif operation == 'execute':
+        picked = pool.pick(rnd)
+        if picked is None:
+            return
+        quote_id, expires_at = picked
+        body = {'quote_id': quote_id}
+        if rnd.random() < 0.1:
+            body['idempotency_key'] = f'load-{quote_id}'
+        request = ('POST', '/transactions', body)
+    elif operation == 'rate':
+        base, target = rnd.choice(PAIRS[:3])
+        rate = {'KES': '129.50', 'EUR': '0.92', 'NGN': '842.39'}[target]
+        request = ('POST', '/rates', {'base_currency': base, 'target_currency': target,
+                                      'rate': str(Decimal(rate) * Decimal(rnd.randint(990, 1010)) / 1000)})
+    else:
+        picked = pool.pick(rnd)
+        if picked is None:
+            return
+        request = ('GET', f'/quotes/{picked[0]}', None)
+
+    start = time.perf_counter()
+    try:
+        status, data = client.request(*request)
+    except Exception:
+        status, data = 599, None
+    latency = time.perf_counter() - start
+    stats.record(operation, latency, _outcome(status), int(time.perf_counter() - started))
+
+    if status >= 400 or not data:
+        return
+    if operation == 'quote':
+        pool.add(data['data']['quote_id'], data['data']['expires_at'])
+    elif operation == 'execute':
+        transaction = data['data']
+        late = datetime.fromisoformat(transaction['created_at']) >= datetime.fromisoformat(expires_at)
+        stats.record_execution(quote_id, transaction['transaction_id'], late)
+
+
+def worker(make_client, mix, pool, deadline, started, seed, think_seconds):
+    client = make_client()
+    rnd = random.Random(seed)
+    operations, weights = zip(*mix.items())
+    stats = RunStats()
+    while time.perf_counter() < deadline:
+        run_operation(client, rnd.choices(operations, weights)[0], rnd, pool, stats, started)
+        if think_seconds:
+            time.sleep(think_seconds)
+    return stats
+
+
+def create_load_app(args):
+    from app import create_app
+    return create_app(args.config, {
+        'SQLALCHEMY_DATABASE_URI': args.database_url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}},
+        'QUOTE_VALIDITY_SECONDS': args.quote_validity,
+        'QUOTE_EXECUTION_MODE': args.execution_mode,
+        'RATE_REFRESH_INTERVAL_SECONDS': 0,
+        'RATE_REFRESH_ON_STALE': False,
+        # Measure the app, not the profiler; budgets must not fail requests
+        'SQL_PROFILING_ENABLED': False,
+        'SQL_BUDGET_ENFORCE': False,
+    })
+
+
+def run_process(args, seed):
+    """Run --threads workers in this process and return their merged stats"""
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        app = create_load_app(args)
+        make_client = lambda: InProcessClient(app)
+
+    pool = QuotePool()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    results = []
+    threads = [
+        threading.Thread(target=lambda s=seed * 1000 + i: results.append(
+            worker(make_client, args.mix, pool, deadline, started, s, args.think_ms / 1000)))
+        for i in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = RunStats()
+    for result in results:
+        stats.merge(result)
+    return stats.to_state()
+
+
+def check_invariants(args, stats):
+    """Return a list of violated invariants, checked in the database and against client observations"""
+    from sqlalchemy import func
+    from app import db
+    from app.models.quote import Quote
+    from app.models.transaction import Transaction
+
+    violations = []
+    app = create_load_app(args)
+    with app.app_context():
+        duplicated = db.session.query(Transaction.quote_id, func.count()) \
+            .group_by(Transaction.quote_id).having(func.count() > 1).all()
+        for quote_id, count in duplicated:
+            violations.append(f'quote {quote_id} executed {count} times')
+
+        missing = db.session.query(Quote.id).outerjoin(Transaction, Transaction.quote_id == Quote.id) \
+            .filter(Quote.is_executed.is_(True), Transaction.id.is_(None)).all()
+        for (quote_id,) in missing:
+            violations.append(f'quote {quote_id} is executed but has no transaction')
+
+        unmarked = db.session.query(Transaction.id, Transaction.quote_id) \
+            .join(Quote, Quote.id == Transaction.quote_id).filter(Quote.is_executed.is_(False)).all()
+        for transaction_id, quote_id in unmarked:
+            violations.append(f'transaction {transaction_id} belongs to unexecuted quote {quote_id}')
+
+        late = db.session.query(Transaction.id, Transaction.quote_id) \
+            .join(Quote, Quote.id == Transaction.quote_id) \
+            .filter(Transaction.created_at >= Quote.expires_at).all()
+        for transaction_id, quote_id in late:
+            violations.append(f'transaction {transaction_id} created after quote {quote_id} expired')
+        db.session.remove()
+
+    for quote_id, entry in stats.executions.items():
+        if len(entry['transactions']) > 1:
+            violations.append(f"clients saw {len(entry['transactions'])} transactions for quote {quote_id}")
+        if entry['late']:
+            violations.append(f'clients saw quote {quote_id} executed after expiry')
+    return violations
+
+
+def report(args, stats, elapsed, violations):
+    total_ops = sum(h.total for h in stats.histograms.values())
+    summary = {
+        'settings': {key: value for key, value in vars(args).items() if key != 'output'},
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_ops_per_sec': round(total_ops / elapsed, 1) if elapsed else 0.0,
+        'operations': {},
+        'timeline': [
+            {'second': second, 'ops': ops, 'errors': errors}
+            for second, (ops, errors) in sorted(stats.timeline.items())
+        ],
+        'quotes_executed': len(stats.executions),
+        'server_errors': sum(outcomes['error'] for outcomes in stats.outcomes.values()),
+        'violations': violations,
+    }
+
+    print(f"\n{'operation':10s} {'count':>8s} {'ok':>8s} {'4xx':>7s} {'errors':>7s} "
+          f"{'err %':>6s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s}")
+    for operation in OPERATIONS:
+        histogram = stats.histograms.get(operation)
+        if histogram is None:
+            continue
+        outcomes = stats.outcomes[operation]
+        error_rate = outcomes['error'] / histogram.total if histogram.total else 0.0
+        summary['operations'][operation] = {
+            'count': histogram.total,
+            'ok': outcomes['ok'],
+            'rejected': outcomes['rejected'],
+            'errors': outcomes['error'],
+            'error_rate': round(error_rate, 5),
+            'p50_ms': round(histogram.percentile(0.50), 3),
+            'p95_ms': round(histogram.percentile(0.95), 3),
+            'p99_ms': round(histogram.percentile(0.99), 3),
+            'histogram': histogram.coarse(),
+        }
+        row = summary['operations'][operation]
+        print(f"{operation:10s} {row['count']:8d} {row['ok']:8d} {row['rejected']:7d} {row['errors']:7d} "
+              f"{error_rate:6.2%} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f}")
+
+    print('\nlatency histogram (all operations)')
+    combined = LatencyHistogram()
+    for histogram in stats.histograms.values():
+        combined.merge(histogram)
+    widest = max(combined.coarse().values() or [1]) or 1
+    for label, count in combined.coarse().items():
+        print(f"  {label:>9s} {count:8d} {'#' * round(40 * count / widest)}")
+
+    print('\nthroughput over time')
+    step = max(1, args.report_interval)
+    timeline = summary['timeline']
+    for index in range(0, len(timeline), step):
+        window = timeline[index:index + step]
+        ops = sum(entry['ops'] for entry in window)
+        errors = sum(entry['errors'] for entry in window)
+        print(f"  t={window[0]['second']:>5d}s {ops / len(window):9.1f} ops/s {errors:6d} errors")
+
+    print(f"\n{total_ops} requests in {elapsed:.1f}s ({summary['throughput_ops_per_sec']} ops/s), "
+          f"{len(stats.executions)} quotes executed")
+    if violations:
+        print(f'{len(violations)} INVARIANT VIOLATIONS')
+        for violation in violations[:20]:
+            print(f'  {violation}')
+    else:
+        print('All invariants hold')
+    if summary['server_errors']:
+        print(f"{summary['server_errors']} REQUESTS FAILED WITH 5xx OR NO RESPONSE")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2, default=list)
+            f.write('\n')
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='Base URL of a running server; in-process when omitted')
+    parser.add_argument('--database-url', help="Database the app uses (required with --url for the checks)")
+    parser.add_argument('--config', default='testing', help='Config name for the in-process app')
+    parser.add_argument('--threads', type=int, default=16, help='Threads per process')
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('quote=45,execute=35,rate=5,read=15'))
+    parser.add_argument('--think-ms', type=float, default=0, help='Pause between requests per thread')
+    parser.add_argument('--quote-validity', type=int, default=5,
+                        help='QUOTE_VALIDITY_SECONDS of the in-process app; short so expiry is exercised')
+    parser.add_argument('--execution-mode', choices=['locking', 'optimistic'], default='locking')
+    parser.add_argument('--report-interval', type=int, default=5, help='Seconds per timeline row')
+    parser.add_argument('--output', help='Write the summary as JSON')
+    args = parser.parse_args()
+
+    scratch = None
+    if not args.database_url:
+        if args.url:
+            parser.error('--database-url is required with --url so the invariants can be checked')
+        scratch = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite:///{os.path.join(scratch.name, 'load.db')}"
+
+    if not args.url:
+        from app.services.rate_service import RateService
+        app = create_load_app(args)
+        with app.app_context():
+            RateService.seed_initial_rates()
+
+    started = time.perf_counter()
+    if args.processes > 1:
+        with multiprocessing.Pool(args.processes) as pool:
+            states = pool.starmap(run_process, [(args, seed) for seed in range(args.processes)])
+    else:
+        states = [run_process(args, 0)]
+    elapsed = time.perf_counter() - started
+
+    stats = RunStats()
+    for state in states:
+        stats.merge(RunStats.from_state(state))
+
+    violations = check_invariants(args, stats)
+    summary = report(args, stats, elapsed, violations)
+    if scratch:
+        scratch.cleanup()
+    if violations or summary['server_errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""
+Latency and throughput of the quote, execute, rate and history hot paths
+
+Runs every case against in-memory and file-backed SQLite (--db), times
+each call individually and writes p50/p95/p99 latency and ops/sec per case
+as JSON. Service cases call RateService/FXService directly; route cases go
+through the Flask test client, so they include request parsing and JSON
+encoding. History is measured after growing the transactions table to each
+of --sizes rows. POST /rates/update uses an in-process rate provider, so it
+measures the write path without the network.
+
+    python -m benchmarks.run [--db memory|file|both] [--output results.json]
+    python -m benchmarks.run --compare baseline.json [--threshold 0.2]
+
+With --compare the new results are checked against a stored report and the
+command exits non-zero if any case regressed by more than --threshold.
+"""
+import argparse
+import itertools
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app import create_app, db
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.services.rate_providers import RateProvider
+from app.services.rate_service import RateService
+from app.utils.ids import generate_id
+from benchmarks.harness import compare, environment, load_report, measure, summarize, write_report
+
+API = '/api/v1'
+
+
+class StaticRateProvider(RateProvider):
+    """Serves the seeded rates so /rates/update can be timed without the network"""
+
+    RATES = {
+        'USD': {'EUR': '0.92', 'KES': '129.50', 'NGN': '775.00'},
+        'EUR': {'USD': '1.09', 'KES': '140.76', 'NGN': '842.39'},
+    }
+
+    def fetch(self, base_currency, session):
+        return self.RATES.get(base_currency, {})
+
+
+def create_bench_app(db_mode, directory):
+    uri = 'sqlite:///:memory:'
+    if db_mode == 'file':
+        uri = f"sqlite:///{Path(directory) / 'bench.db'}"
+    return create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'RATE_PROVIDERS': [StaticRateProvider('static')],
+        'ARCHIVE_DIR': str(Path(directory) / 'archive'),
+        # Measure the app, not the profiler; budgets must not fail requests
+        'SQL_PROFILING_ENABLED': False,
+        'SQL_BUDGET_ENFORCE': False,
+    })
+
+
+def fresh_quote():
+    return FXService.generate_quote('USD', 'KES', '100.00').id
+
+
+def service_cases():
+    """(name, func, setup) for calls made straight into the services"""
+    return [
+        ('rate.direct', lambda: RateService.get_rate('USD', 'KES'), None),
+        ('rate.inverse', lambda: RateService.get_rate('KES', 'USD'), None),
+        ('rate.cross', lambda: RateService.get_rate('KES', 'NGN'), None),
+        ('quote.generate', lambda: FXService.generate_quote('USD', 'KES', '100.00'), None),
+        ('quote.generate_cross', lambda: FXService.generate_quote('KES', 'NGN', '2500.00'), None),
+        ('quote.execute', FXService.execute_quote, fresh_quote),
+    ]
+
+
+def route_cases(client):
+    """(name, func, setup) for every route in fx_routes.py"""
+    counter = itertools.count()
+
+    def execute_batch_setup():
+        return [fresh_quote() for _ in range(10)]
+
+    def executed_transaction():
+        return client.post(f'{API}/transactions', json={'quote_id': fresh_quote()}) \
+            .get_json()['data']['transaction_id']
+
+    return [
+        ('route.health', lambda: client.get(f'{API}/health'), None),
+        ('route.create_quote', lambda: client.post(f'{API}/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'}), None),
+        ('route.create_quotes_batch', lambda: client.post(f'{API}/quotes/batch', json={'quotes': [
+            {'from_currency': 'USD', 'to_currency': 'KES', 'amount': str(i + 1)} for i in range(10)
+        ]}), None),
+        ('route.get_quote', lambda quote_id: client.get(f'{API}/quotes/{quote_id}'), fresh_quote),
+        ('route.execute_transaction', lambda quote_id: client.post(
+            f'{API}/transactions', json={'quote_id': quote_id}), fresh_quote),
+        ('route.execute_transactions_batch', lambda quote_ids: client.post(
+            f'{API}/transactions/batch', json={'quote_ids': quote_ids}), execute_batch_setup),
+        ('route.get_transaction', lambda transaction_id: client.get(
+            f'{API}/transactions/{transaction_id}'), executed_transaction),
+        ('route.transaction_history', lambda: client.get(f'{API}/transactions?limit=100'), None),
+        ('route.transaction_volume', lambda: client.get(f'{API}/transactions/volume'), None),
+        ('route.get_rates', lambda: client.get(f'{API}/rates'), None),
+        ('route.set_rate', lambda: client.post(f'{API}/rates', json={
+            'base_currency': 'USD', 'target_currency': 'KES',
+            'rate': str(Decimal('129.50') + Decimal(next(counter) % 100) / 100)}), None),
+        ('route.update_rates', lambda: client.post(f'{API}/rates/update', json={
+            'base_currencies': ['USD', 'EUR']}), None),
+    ]
+
+
+def grow_transactions(target):
+    """Bulk insert transactions until the table holds target rows"""
+    current = Transaction.query.count()
+    start = datetime.utcnow() - timedelta(days=30)
+    rows = []
+    for i in range(current, target):
+        rows.append(Transaction.storage_row({
+            'id': generate_id(),
+            'quote_id': generate_id(),
+            'from_currency': ('USD', 'EUR')[i % 2],
+            'to_currency': ('KES', 'NGN')[i % 2],
+            'from_amount': Decimal('100.00'),
+            'to_amount': Decimal('12950.00'),
+            'exchange_rate': Decimal('129.50000000'),
+            'status': 'completed',
+            'created_at': start + timedelta(seconds=i),
+        }))
+        if len(rows) == 10000:
+            db.session.execute(insert(Transaction), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Transaction), rows)
+    db.session.commit()
+
+
+def history_cases(size):
+    """(name, func, setup) for history queries on a table of size rows"""
+    middle = FXService.get_transaction_history(min(size // 2, 1000))
+    cursor = FXService.history_cursor(middle[-1]) if middle else None
+    # Covers the newest half of the table, or its newest 1000 rows
+    since = datetime.fromisoformat(middle[-1]['created_at']) if middle else None
+    return [
+        (f'history.first_page.{size}', lambda: FXService.get_transaction_history(100), None),
+        (f'history.cursor_page.{size}', lambda: FXService.get_transaction_history(100, cursor), None),
+        (f'history.currency.{size}', lambda: FXService.get_transaction_history(100, currency='NGN'), None),
+        (f'history.range.{size}', lambda: FXService.get_transaction_history(100, start=since), None),
+    ]
+
+
+def run_suite(db_mode, args):
+    results = {}
+
+    def run_cases(cases):
+        for name, func, setup in cases:
+            key = f'{db_mode}.{name}'
+            if args.filter and args.filter not in key:
+                continue
+            results[key] = summarize(measure(func, args.iterations, args.warmup, setup))
+            print(f"{key:45s} p50 {results[key]['p50_ms']:9.3f} ms  "
+                  f"p99 {results[key]['p99_ms']:9.3f} ms  {results[key]['ops_per_sec']:10.0f} ops/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_bench_app(db_mode, directory)
+        with app.app_context():
+            RateService.seed_initial_rates()
+            run_cases(service_cases())
+            run_cases(route_cases(app.test_client()))
+            for size in args.sizes:
+                grow_transactions(size)
+                run_cases(history_cases(size))
+            db.session.remove()
+            db.engine.dispose()
+    return results
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'case':45s} {'status':>10s} {'base p50':>10s} {'p50':>10s} {'p50 x':>7s} {'ops x':>7s}")
+    for row in rows:
+        if 'p50_ratio' not in row:
+            print(f"{row['case']:45s} {row['status']:>10s}")
+            continue
+        print(f"{row['case']:45s} {row['status']:>10s} {row['base_p50_ms']:10.3f} {row['p50_ms']:10.3f} "
+              f"{row['p50_ratio']:7.2f} {row['ops_ratio']:7.2f}")
+    regressions = [row for row in rows if row['status'] == 'REGRESSION']
+    print(f"{len(regressions)} regressions beyond {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db', choices=['memory', 'file', 'both'], default='both')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[1000, 10000, 100000], help='Comma-separated history table sizes')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='Report to check for regressions against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed slowdown before a case counts as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for db_mode in (['memory', 'file'] if args.db == 'both' else [args.db]):
+        results.update(run_suite(db_mode, args))
+
+    report = {
+        'environment': environment(),
+        'settings': {'iterations': args.iterations, 'warmup': args.warmup, 'sizes': args.sizes},
+        'results': results,
+    }
+    write_report(args.output, report)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = print_comparison(compare(load_report(args.compare), report, args.threshold),
+                                       args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
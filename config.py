@@ -1,10 +1,14 @@
 import os
 from datetime import timedelta
 
+# Development fallback only: it is public, so create_app refuses to sign
+# stateless quotes with it
+DEFAULT_SECRET_KEY = '9f74c1e5b8d24e2b9a1f8b0c5c8e2f1a9d7e6c4b3a2d1f0e4c8b9d7a6e5f4c3b'
+
 
 class Config:
     """Base configuration"""
-    SECRET_KEY = os.environ.get('SECRET_KEY') or '9f74c1e5b8d24e2b9a1f8b0c5c8e2f1a9d7e6c4b3a2d1f0e4c8b9d7a6e5f4c3b'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or DEFAULT_SECRET_KEY
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///fx_engine.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
@@ -12,6 +16,127 @@ class Config:
     QUOTE_VALIDITY_SECONDS = 60
     SUPPORTED_CURRENCIES = ['USD', 'EUR', 'KES', 'NGN']
 
+    # How generate_quote persists quotes:
+    # 'sync' - insert and commit before responding
+    # 'write_behind' - buffer in memory and bulk insert from a background
+    #   flusher every QUOTE_FLUSH_INTERVAL_SECONDS, or sooner once
+    #   QUOTE_BUFFER_FLUSH_SIZE quotes are waiting. A crash loses at most the
+    #   quotes of one interval, never more than QUOTE_BUFFER_MAX_SIZE; at that
+    #   size the request thread flushes itself. Clean shutdown flushes all.
+    QUOTE_WRITE_MODE = 'sync'
+    QUOTE_FLUSH_INTERVAL_SECONDS = 1.0
+    QUOTE_BUFFER_FLUSH_SIZE = 500
+    QUOTE_BUFFER_MAX_SIZE = 5000
+
+    # When enabled, quotes are not stored; clients receive a quote_token
+    # signed with a key derived from SECRET_KEY and execute it with
+    # POST /transactions. SECRET_KEY must then be set in the environment.
+    STATELESS_QUOTES = False
+
+    # How execute_quote guards against double execution:
+    # 'locking' - SELECT ... FOR UPDATE, then insert (ignored by SQLite)
+    # 'optimistic' - claim with one conditional UPDATE, then insert
+    QUOTE_EXECUTION_MODE = 'locking'
+
+    # Idempotency keys on quote execution: how long a key is honoured, how
+    # many are kept in the in-process LRU, and how often expired keys are
+    # swept from the database (0 disables the background sweeper)
+    IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_SIZE = 10000
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS = 300
+    IDEMPOTENCY_SWEEP_BATCH_SIZE = 500
+
+    # Table housekeeping, run every QUOTE_SWEEP_INTERVAL_SECONDS (0 disables
+    # the background sweeper; `flask sweep-quotes` runs it once):
+    # unexecuted quotes are deleted QUOTE_EXPIRED_RETENTION_SECONDS after
+    # they expire, and transactions older than ARCHIVE_AFTER_SECONDS move
+    # with their quotes to gzip segments in ARCHIVE_DIR, rolled over at
+    # ARCHIVE_SEGMENT_MAX_BYTES. Archived ids are still found by id, but
+    # archived transactions leave history, its cursors and volume, so
+    # archiving is off (0) unless set explicitly, e.g. 7 * 24 * 60 * 60.
+    QUOTE_SWEEP_INTERVAL_SECONDS = 300
+    QUOTE_SWEEP_BATCH_SIZE = 500
+    QUOTE_EXPIRED_RETENTION_SECONDS = 60 * 60
+    ARCHIVE_AFTER_SECONDS = 0
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR') or 'archive'
+    ARCHIVE_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+    # Request, service and database metrics, served at GET /metrics in the
+    # Prometheus text format
+    METRICS_ENABLED = True
+
+    # Per-request SQL profiling (opt-in): statement count and database time
+    # go in X-SQL-Statements / X-SQL-Time-Ms / Server-Timing headers when
+    # SQL_PROFILE_HEADERS is set, the SQL_PROFILE_SLOWEST slowest statements
+    # are logged at DEBUG, and a statement repeated
+    # SQL_REPEATED_STATEMENT_THRESHOLD times in one request is logged as a
+    # possible N+1. Routes over their @statement_budget (or the override in
+    # SQL_STATEMENT_BUDGETS, keyed by endpoint) are logged, or raise
+    # StatementBudgetExceeded when SQL_BUDGET_ENFORCE is set.
+    SQL_PROFILING_ENABLED = False
+    SQL_PROFILE_HEADERS = True
+    SQL_PROFILE_SLOWEST = 3
+    SQL_REPEATED_STATEMENT_THRESHOLD = 5
+    SQL_STATEMENT_BUDGETS = {}
+    SQL_BUDGET_ENFORCE = False
+
+    # Request tracing (opt-in) for the /api/v1 routes, the services they call
+    # and their SQL. TRACING_SAMPLE_RATE of requests are traced, decided when
+    # the request arrives; a W3C traceparent header continues the caller's
+    # trace and follows its sampled flag. TRACING_EXPORTER is 'jsonl' (spans
+    # appended to TRACING_FILE) or a SpanExporter instance.
+    TRACING_ENABLED = False
+    TRACING_SAMPLE_RATE = 0.01
+    TRACING_EXPORTER = 'jsonl'
+    TRACING_FILE = os.environ.get('TRACING_FILE') or 'traces.jsonl'
+
+    # Bearer token for the /api/v1/admin endpoints (CPU sampling profiler and
+    # tracemalloc diffs); they answer 404 while it is unset. A profile runs
+    # for at most PROFILE_MAX_SECONDS and holds its worker thread meanwhile.
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    PROFILE_MAX_SECONDS = 60
+
+    # Encoder behind jsonify and the NDJSON history stream: 'auto' uses
+    # orjson when it is installed, 'orjson' requires it, 'json' always uses
+    # the standard library. Both write non-ASCII as raw UTF-8, so output is
+    # the same either way.
+    JSON_ENGINE = 'auto'
+
+    # /api/v1 responses of at least GZIP_MIN_BYTES are gzipped at
+    # GZIP_LEVEL for clients sending Accept-Encoding: gzip (0 disables)
+    GZIP_MIN_BYTES = 16 * 1024
+    GZIP_LEVEL = 5
+
+    # Maximum number of items accepted by the batch endpoints
+    MAX_BATCH_SIZE = 1000
+
+    # Commits a batch execution attempts while concurrent executions of the
+    # same quotes keep failing it; quotes still unsettled report 'conflict'
+    BATCH_EXECUTE_ATTEMPTS = 3
+
+    # Largest page size accepted by GET /transactions, and the fetch batch
+    # size used when streaming history as NDJSON
+    MAX_HISTORY_LIMIT = 1000
+    HISTORY_STREAM_BATCH_SIZE = 1000
+
+    # Primary keys of quotes and transactions:
+    # ID_STRATEGY 'uuid4' (random), 'uuid7' or 'ulid' (time-ordered)
+    # ID_STORAGE 'string' (text columns) or 'binary' (16 bytes; fixed when
+    #   the tables are created). The API always uses the text form.
+    ID_STRATEGY = 'uuid4'
+    ID_STORAGE = 'string'
+
+    # How quote and transaction amounts are stored:
+    # 'numeric' - Numeric(18,2) amounts and Numeric(18,8) rates
+    # 'minor_units' - BigInteger minor units and rates scaled by 10**8;
+    #   convert existing rows with `flask migrate-money-storage`
+    MONEY_STORAGE_MODE = 'numeric'
+
+    # Arithmetic used to price quotes; both give bit-identical results:
+    # 'decimal' - Decimal operations
+    # 'fixed_point' - integer minor units and scaled-integer rates
+    PRICING_ENGINE = 'decimal'
+
     # Spread configuration (in basis points, 1 bp = 0.01%)
     BUY_SPREAD_BPS = 50  # 0.5%
     SELL_SPREAD_BPS = 50  # 0.5%
@@ -19,6 +144,34 @@ class Config:
     # Rate update settings
     EXCHANGE_RATE_API_URL = 'https://api.exchangerate-api.com/v4/latest/'
     RATE_STALENESS_THRESHOLD_HOURS = 24
+    RATE_API_TIMEOUT_SECONDS = 10
+    RATE_API_POOL_SIZE = 10
+
+    # Rate sources queried concurrently on every refresh. Each entry is a
+    # RateProvider instance or a dict with name, url and optional weight and
+    # timeout_seconds; empty means EXCHANGE_RATE_API_URL alone. Results are
+    # combined per currency by 'median' or 'weighted_mean' after dropping
+    # values further than RATE_OUTLIER_THRESHOLD_BPS from the median.
+    RATE_PROVIDERS = []
+    RATE_AGGREGATION_METHOD = 'median'
+    RATE_OUTLIER_THRESHOLD_BPS = 200
+
+    # Background rate refresh: base currencies to fetch, schedule (0 disables
+    # the scheduled refresher) and whether a quote that finds a stale rate
+    # triggers an immediate background refresh, at most once per interval.
+    # A triggered refresh also fetches the bases of the stale rates.
+    RATE_REFRESH_BASE_CURRENCIES = ['USD']
+    RATE_REFRESH_INTERVAL_SECONDS = 15 * 60
+    RATE_REFRESH_ON_STALE = True
+    RATE_REFRESH_MIN_INTERVAL_SECONDS = 60
+
+    # Maximum age of the in-memory rate snapshot before it is reloaded from
+    # the database. Bounds how long rates written by another worker go unseen.
+    RATE_CACHE_MAX_AGE_SECONDS = 30
+
+    # Currencies preferred as intermediates when several cross-rate paths
+    # have the same number of hops
+    CROSS_RATE_PIVOTS = ['USD']
 
 
 class DevelopmentConfig(Config):
@@ -31,6 +184,12 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
 
+    # Background jobs are run explicitly by the tests that need them
+    IDEMPOTENCY_SWEEP_INTERVAL_SECONDS = 0
+    QUOTE_SWEEP_INTERVAL_SECONDS = 0
+    RATE_REFRESH_INTERVAL_SECONDS = 0
+    RATE_REFRESH_ON_STALE = False
+
 
 class ProductionConfig(Config):
     """Production configuration"""
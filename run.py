@@ -1,6 +1,11 @@
 import os
+import click
 from app import create_app
+from app.services.archive_service import ArchiveService
+from app.services.idempotency_service import IdempotencyService
 from app.services.rate_service import RateService
+from app.services.schema_service import SchemaService
+from app.services.storage_migration import MoneyStorageMigration
 from flasgger import Swagger
 
 # Get environment or default to development
@@ -21,11 +26,79 @@ def seed_rates():
         print("✓ Initial rates seeded successfully")
 
 @app.cli.command()
-def update_rates():
+@click.option('--base', 'bases', multiple=True, default=['USD'],
+              help='Base currency to refresh; repeat for several bases')
+def update_rates(bases):
     """Update rates from external API"""
     with app.app_context():
-        result = RateService.update_rates_from_api()
-        print(f"✓ Updated {result['rates_updated']} rates")
+        result = RateService.update_rates_from_api(list(bases))
+        print(f"✓ Updated {result['rates_updated']} rates for {', '.join(bases)} "
+              f"in {result['duration_ms']:.0f} ms")
+
+@app.cli.command()
+def sweep_idempotency_keys():
+    """Delete expired idempotency keys"""
+    with app.app_context():
+        deleted = IdempotencyService.sweep_expired()
+        print(f"✓ Deleted {deleted} expired idempotency keys")
+
+@app.cli.command()
+def sweep_quotes():
+    """Delete expired quotes and archive old transactions"""
+    with app.app_context():
+        result = ArchiveService.sweep()
+        print(f"✓ Deleted {result['expired_deleted']} expired quotes, "
+              f"archived {result['archived']} transactions")
+
+@app.cli.command()
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows converted per transaction')
+def migrate_money_storage(batch_size):
+    """Convert stored amounts and rates to integer minor units"""
+    with app.app_context():
+        converted = MoneyStorageMigration.run(batch_size)
+        for table, count in converted.items():
+            print(f"✓ Converted {count} {table} rows")
+        if app.config['MONEY_STORAGE_MODE'] != 'minor_units':
+            print("Set MONEY_STORAGE_MODE = 'minor_units' so new rows are stored the same way")
+
+@app.cli.command()
+def create_indexes():
+    """Create indexes added to the models since the database was created"""
+    with app.app_context():
+        created = SchemaService.ensure_indexes()
+        for name in created:
+            print(f"✓ Created index {name}")
+        if not created:
+            print("✓ All indexes are up to date")
+
+@app.cli.command()
+@click.option('--verbose', is_flag=True, help='Print the plan of every statement')
+def explain_queries(verbose):
+    """Run every service query on a scratch database and flag full table scans"""
+    from app.services.query_audit import QueryAudit
+
+    # The workload writes rows, so it never runs against the configured database
+    scratch = create_app('testing', {'QUOTE_WRITE_MODE': 'sync', 'STATELESS_QUOTES': False})
+    with scratch.app_context():
+        RateService.seed_initial_rates()
+        results = QueryAudit.run()
+
+    for result in results:
+        if not verbose and not result['full_scans']:
+            continue
+        if result['full_scans']:
+            label = 'allowed scan' if result['allowed'] else 'FULL SCAN'
+        else:
+            label = 'ok'
+        print(f"[{label}] {result['step']}: {' '.join(result['statement'].split())}")
+        for line in result['plan']:
+            print(f"    {line}")
+
+    findings = QueryAudit.findings(results)
+    print(f"{len(results)} statements explained, {len(findings)} unexpected full scans")
+    if findings:
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -6,7 +6,8 @@ from app.services.rate_service import RateService
 @pytest.fixture
 def app():
     """Create and configure a test app"""
-    app = create_app('testing')
+    # Every test request is held to its route's statement budget
+    app = create_app('testing', {'SQL_PROFILING_ENABLED': True, 'SQL_BUDGET_ENFORCE': True})
 
     with app.app_context():
         db.create_all()
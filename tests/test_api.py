@@ -1,5 +1,7 @@
 import pytest
 import json
+from decimal import Decimal
+from app.services.rate_service import RateService
 
 
 class TestAPI:
@@ -152,6 +154,25 @@ class TestAPI:
         assert data['success'] is True
         assert data['data']['rate'] == '0.93'
 
+    @pytest.mark.parametrize('rate', ['0', '-1.5', 'NaN'])
+    def test_set_unusable_rate_is_rejected_and_not_stored(self, client, app, rate):
+        """Test that a rejected rate leaves quotes and GET /rates working"""
+        client.get('/api/v1/rates')
+        response = client.post('/api/v1/rates', json={
+            'base_currency': 'USD', 'target_currency': 'KES', 'rate': rate
+        })
+
+        assert response.status_code == 400
+        assert 'Rate must be greater than zero' in response.get_json()['error']
+        with app.app_context():
+            with pytest.raises(ValueError, match='Rate must be greater than zero'):
+                RateService.set_rates({'USD': {'NGN': '780.00', 'KES': rate}})
+            assert RateService.get_rate('USD', 'NGN') == Decimal('775.00')
+        assert client.get('/api/v1/rates').status_code == 200
+        assert client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'
+        }).status_code == 201
+
     def test_get_transaction_history(self, client):
         """Test getting transaction history"""
         # Create and execute a transaction
@@ -170,4 +191,122 @@ class TestAPI:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert data['success'] is True
-        assert data['count'] > 0
\ No newline at end of file
+        assert data['count'] > 0
+
+    def test_create_quotes_batch(self, client):
+        """Test batch quote creation with a mix of valid and invalid items"""
+        response = client.post('/api/v1/quotes/batch',
+                               json={
+                                   'quotes': [
+                                       {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'},
+                                       {'from_currency': 'USD', 'to_currency': 'XXX', 'amount': '100.00'}
+                                   ]
+                               }
+                               )
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['created'] == 1
+        assert data['failed'] == 1
+        assert data['data'][0]['success'] is True
+        assert data['data'][1]['success'] is False
+
+        quote_id = data['data'][0]['data']['quote_id']
+        response = client.get(f'/api/v1/quotes/{quote_id}')
+        assert response.status_code == 200
+
+    def test_create_quotes_batch_too_large(self, client, app):
+        """Test that oversized batches are rejected"""
+        app.config['MAX_BATCH_SIZE'] = 2
+        response = client.post('/api/v1/quotes/batch',
+                               json={'quotes': [
+                                   {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '1'}
+                               ] * 3}
+                               )
+
+        assert response.status_code == 400
+
+    def test_execute_transactions_batch(self, client):
+        """Test batch transaction execution"""
+        create_response = client.post('/api/v1/quotes',
+                                      json={
+                                          'from_currency': 'USD',
+                                          'to_currency': 'KES',
+                                          'amount': '100.00'
+                                      }
+                                      )
+        quote_id = json.loads(create_response.data)['data']['quote_id']
+
+        response = client.post('/api/v1/transactions/batch',
+                               json={'quote_ids': [quote_id, 'invalid-id']}
+                               )
+
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['executed'] == 1
+        assert data['failed'] == 1
+        assert data['data'][0]['status'] == 'executed'
+        assert data['data'][1]['status'] == 'not_found'
+
+        transaction_id = data['data'][0]['data']['transaction_id']
+        response = client.get(f'/api/v1/transactions/{transaction_id}')
+        assert response.status_code == 200
+
+    def test_execute_transactions_batch_invalid_body(self, client):
+        """Test batch execution without quote IDs"""
+        response = client.post('/api/v1/transactions/batch', json={'quote_ids': []})
+        assert response.status_code == 400
+
+    def test_get_transaction_history_pagination(self, client):
+        """Test next_cursor and filters on the history endpoint"""
+        for amount in ('10.00', '20.00', '30.00'):
+            create_response = client.post('/api/v1/quotes',
+                                          json={
+                                              'from_currency': 'USD',
+                                              'to_currency': 'KES',
+                                              'amount': amount
+                                          }
+                                          )
+            quote_id = json.loads(create_response.data)['data']['quote_id']
+            client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        response = client.get('/api/v1/transactions?limit=2')
+        data = json.loads(response.data)
+        assert data['count'] == 2
+        assert data['next_cursor']
+
+        response = client.get(f"/api/v1/transactions?limit=2&cursor={data['next_cursor']}")
+        data = json.loads(response.data)
+        assert data['count'] == 1
+        assert data['next_cursor'] is None
+
+        response = client.get('/api/v1/transactions?currency=EUR')
+        assert json.loads(response.data)['count'] == 0
+
+        response = client.get('/api/v1/transactions?from=2000-01-01T00:00:00Z&to=2000-01-02')
+        assert json.loads(response.data)['count'] == 0
+
+    def test_get_transaction_history_ndjson(self, client):
+        """Test streaming history as NDJSON"""
+        create_response = client.post('/api/v1/quotes',
+                                      json={
+                                          'from_currency': 'USD',
+                                          'to_currency': 'KES',
+                                          'amount': '100.00'
+                                      }
+                                      )
+        quote_id = json.loads(create_response.data)['data']['quote_id']
+        client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        response = client.get('/api/v1/transactions?format=ndjson')
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.data.decode().strip().split('\n')
+        assert len(lines) == 1
+        assert json.loads(lines[0])['quote_id'] == quote_id
+
+    def test_get_transaction_history_invalid_params(self, client):
+        """Test that bad cursors and dates are rejected"""
+        assert client.get('/api/v1/transactions?cursor=bogus').status_code == 400
+        assert client.get('/api/v1/transactions?from=yesterday').status_code == 400
+        assert client.get('/api/v1/transactions?format=ndjson&cursor=bogus').status_code == 400
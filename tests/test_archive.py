@@ -0,0 +1,176 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.archive_index import ArchiveIndex
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+from app.services.archive_service import ArchiveService
+from app.services.fx_service import FXService
+from app.utils.segment_store import SegmentStore
+
+
+@pytest.fixture
+def archive_app(app, tmp_path):
+    """App whose archive segments are written to a temporary directory"""
+    app.config['ARCHIVE_DIR'] = str(tmp_path)
+    app.config['ARCHIVE_AFTER_SECONDS'] = 7 * 24 * 60 * 60
+    app.extensions['archive_store'] = SegmentStore(str(tmp_path), app.config['ARCHIVE_SEGMENT_MAX_BYTES'])
+    return app
+
+
+def _age_transactions(days):
+    """Backdate every transaction so it falls past ARCHIVE_AFTER_SECONDS"""
+    Transaction.query.update({'created_at': datetime.utcnow() - timedelta(days=days)})
+    db.session.commit()
+
+
+class TestSegmentStore:
+    """Test the append-only gzip segment files"""
+
+    def test_append_and_read_members(self, tmp_path):
+        """Test that each append can be read back alone and the file stays valid gzip"""
+        store = SegmentStore(str(tmp_path), max_bytes=1 << 20)
+        first = store.append([{'id': 1}, {'id': 2}])
+        second = store.append([{'id': 3}])
+
+        assert first[0] == second[0]
+        assert second[1] == first[1] + first[2]
+        assert store.read(*first) == [{'id': 1}, {'id': 2}]
+        assert store.read(*second) == [{'id': 3}]
+
+        with gzip.open(os.path.join(str(tmp_path), first[0]), 'rt') as f:
+            assert [json.loads(line)['id'] for line in f] == [1, 2, 3]
+
+    def test_separate_stores_share_a_segment(self, tmp_path):
+        """Test that appends from several processes' stores get correct offsets"""
+        stores = [SegmentStore(str(tmp_path), max_bytes=1 << 20) for _ in range(4)]
+        locations = {}
+
+        def append_many(worker, store):
+            for n in range(50):
+                locations[(worker, n)] = store.append([{'worker': worker, 'n': n}])
+
+        threads = [threading.Thread(target=append_many, args=(worker, store))
+                   for worker, store in enumerate(stores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reader = SegmentStore(str(tmp_path), max_bytes=1 << 20, cache_size=0)
+        for (worker, n), location in locations.items():
+            assert reader.read(*location) == [{'worker': worker, 'n': n}]
+
+    def test_rolls_over_segments(self, tmp_path):
+        """Test that a full segment is closed and a new one started"""
+        store = SegmentStore(str(tmp_path), max_bytes=1)
+        first = store.append([{'id': 1}])
+        second = store.append([{'id': 2}])
+
+        assert first[0] != second[0]
+        assert store.segments() == [first[0], second[0]]
+        assert store.read(*second) == [{'id': 2}]
+
+    def test_rejects_invalid_segment_name(self, tmp_path):
+        """Test that index entries cannot point outside the archive directory"""
+        store = SegmentStore(str(tmp_path), max_bytes=1 << 20)
+        with pytest.raises(ValueError, match='Invalid archive segment'):
+            store.read('../etc/passwd', 0, 10)
+
+
+class TestArchiveService:
+    """Test the expired-quote sweeper and transaction archival"""
+
+    def test_deletes_only_long_expired_unexecuted_quotes(self, archive_app):
+        """Test that executed, live and recently expired quotes survive the sweep"""
+        old = FXService.generate_quote('USD', 'KES', '100')
+        recent = FXService.generate_quote('USD', 'KES', '100')
+        executed = FXService.generate_quote('USD', 'KES', '100')
+        live = FXService.generate_quote('USD', 'KES', '100')
+        FXService.execute_quote(executed.id)
+
+        retention = archive_app.config['QUOTE_EXPIRED_RETENTION_SECONDS']
+        old.expires_at = datetime.utcnow() - timedelta(seconds=retention + 1)
+        recent.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        executed.expires_at = old.expires_at
+        db.session.commit()
+
+        assert ArchiveService.delete_expired_quotes(batch_size=1) == 1
+
+        remaining = {quote.id for quote in Quote.query.all()}
+        assert remaining == {recent.id, executed.id, live.id}
+
+    def test_archives_old_transactions_with_their_quotes(self, archive_app):
+        """Test that old rows leave the hot tables and are still found by id"""
+        quote_ids = [FXService.generate_quote('USD', 'KES', str(i + 1)).id for i in range(5)]
+        transaction_ids = [FXService.execute_quote(quote_id).id for quote_id in quote_ids]
+        _age_transactions(days=30)
+        expected = {t: FXService.get_transaction(t).to_dict() for t in transaction_ids}
+        expected_quotes = {q: FXService.get_quote(q).to_dict() for q in quote_ids}
+
+        assert ArchiveService.archive_transactions(batch_size=2) == 5
+
+        assert Transaction.query.count() == 0
+        assert Quote.query.count() == 0
+        assert ArchiveIndex.query.count() == 10
+        for transaction_id, data in expected.items():
+            assert FXService.get_transaction(transaction_id).to_dict() == data
+        for quote_id, data in expected_quotes.items():
+            assert FXService.get_quote(quote_id).to_dict() == data
+
+    def test_recent_transactions_stay_hot(self, archive_app):
+        """Test that transactions newer than ARCHIVE_AFTER_SECONDS are not archived"""
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        FXService.execute_quote(quote.id)
+
+        assert ArchiveService.sweep() == {'expired_deleted': 0, 'archived': 0}
+        assert Transaction.query.count() == 1
+        assert archive_app.extensions['archive_store'].segments() == []
+
+    def test_archiving_is_off_by_default(self, app, tmp_path):
+        """Test that old transactions stay in history unless archiving is enabled"""
+        app.extensions['archive_store'] = SegmentStore(str(tmp_path), app.config['ARCHIVE_SEGMENT_MAX_BYTES'])
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        FXService.execute_quote(quote.id)
+        _age_transactions(days=30)
+
+        assert ArchiveService.sweep()['archived'] == 0
+        assert len(FXService.get_transaction_history(10)) == 1
+        assert app.extensions['archive_store'].segments() == []
+
+    def test_reexecuting_archived_quote_returns_its_transaction(self, archive_app):
+        """Test that execution stays idempotent after the quote is archived"""
+        quote_id = FXService.generate_quote('USD', 'KES', '100').id
+        transaction_id = FXService.execute_quote(quote_id).id
+        _age_transactions(days=30)
+        ArchiveService.archive_transactions()
+
+        for mode in ('locking', 'optimistic'):
+            archive_app.config['QUOTE_EXECUTION_MODE'] = mode
+            assert FXService.execute_quote(quote_id).id == transaction_id
+
+        results = FXService.execute_quotes([quote_id, 'missing'])
+        assert results[0]['status'] == 'already_executed'
+        assert results[0]['transaction'].id == transaction_id
+        assert results[1]['status'] == 'not_found'
+
+    def test_unknown_ids_are_still_not_found(self, archive_app, client):
+        """Test that the cold path does not change 404s for ids that never existed"""
+        assert client.get('/api/v1/quotes/missing').status_code == 404
+        assert client.get('/api/v1/transactions/missing').status_code == 404
+
+    def test_archived_transaction_over_api(self, archive_app, client):
+        """Test that GET /transactions/<id> serves archived transactions"""
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        transaction_id = FXService.execute_quote(quote.id).id
+        _age_transactions(days=30)
+        ArchiveService.archive_transactions()
+
+        response = client.get(f'/api/v1/transactions/{transaction_id}')
+
+        assert response.status_code == 200
+        assert response.get_json()['data']['transaction_id'] == transaction_id
@@ -0,0 +1,100 @@
+from benchmarks.harness import compare, measure, percentile, summarize
+
+
+class TestBenchmarkHarness:
+    """Test the statistics and regression check behind benchmarks.run"""
+
+    def test_percentiles_use_nearest_rank(self):
+        """Test p50/p95/p99 on a known distribution"""
+        samples = [i / 1000 for i in range(1, 101)]
+
+        assert percentile(samples, 0.50) == 0.050
+        assert percentile(samples, 0.99) == 0.099
+        summary = summarize(samples)
+        assert summary['p95_ms'] == 95.0
+        assert summary['iterations'] == 100
+
+    def test_measure_keeps_setup_out_of_samples(self):
+        """Test that setup runs per iteration and feeds func"""
+        seen = []
+        samples = measure(seen.append, iterations=3, warmup=1, setup=lambda: len(seen))
+
+        assert seen == [0, 1, 2, 3]
+        assert len(samples) == 3
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        """Test that only slowdowns past the threshold count"""
+        def report(**p50s):
+            return {'results': {case: {'p50_ms': p50, 'ops_per_sec': 1000 / p50}
+                                for case, p50 in p50s.items()}}
+
+        rows = compare(report(fast=1.0, slow=1.0, gone=1.0), report(fast=1.1, slow=1.5, added=2.0), 0.2)
+        status = {row['case']: row['status'] for row in rows}
+
+        assert status == {'fast': 'ok', 'slow': 'REGRESSION', 'added': 'new', 'gone': 'missing'}
+
+
+class TestLoadHarness:
+    """Test the load generator's histogram and invariant checks"""
+
+    def test_histogram_percentiles_within_bucket_error(self):
+        """Test that merged histograms report percentiles within 5%"""
+        from benchmarks.load import LatencyHistogram
+
+        first, second = LatencyHistogram(), LatencyHistogram()
+        for ms in range(1, 51):
+            first.record(ms / 1000)
+        for ms in range(51, 101):
+            second.record(ms / 1000)
+        first.merge(second)
+
+        assert first.total == 100
+        assert 50 <= first.percentile(0.50) <= 50 * 1.05
+        assert 99 <= first.percentile(0.99) <= 99 * 1.05
+
+    def test_invariant_check_reports_late_execution(self, tmp_path):
+        """Test that a transaction created after its quote expired is a violation"""
+        import argparse
+        from datetime import timedelta
+        from app import db
+        from app.models.quote import Quote
+        from app.services.fx_service import FXService
+        from app.services.rate_service import RateService
+        from benchmarks.load import RunStats, check_invariants, create_load_app
+
+        args = argparse.Namespace(config='testing', database_url=f"sqlite:///{tmp_path / 'load.db'}",
+                                  quote_validity=60, execution_mode='locking')
+        app = create_load_app(args)
+        with app.app_context():
+            RateService.seed_initial_rates()
+            quote_id = FXService.generate_quote('USD', 'KES', '100').id
+            transaction = FXService.execute_quote(quote_id)
+            transaction_id, created_at = transaction.id, transaction.created_at
+            assert check_invariants(args, RunStats()) == []
+
+            db.session.get(Quote, quote_id).expires_at = created_at - timedelta(seconds=1)
+            db.session.commit()
+            db.session.remove()
+
+        stats = RunStats()
+        stats.record_execution(quote_id, transaction_id, late=False)
+        stats.record_execution(quote_id, 'another-transaction', late=False)
+        violations = check_invariants(args, stats)
+
+        assert any('after quote' in violation for violation in violations)
+        assert any('clients saw 2 transactions' in violation for violation in violations)
+
+    def test_report_counts_server_errors(self, capsys):
+        """Test that a 5xx is flagged even when every invariant holds"""
+        import argparse
+        from benchmarks.load import RunStats, report
+
+        stats = RunStats()
+        stats.record('execute', 0.002, 'ok', 0)
+        stats.record('execute', 0.003, 'error', 0)
+        args = argparse.Namespace(report_interval=5, output=None)
+
+        summary = report(args, stats, elapsed=1.0, violations=[])
+
+        assert summary['server_errors'] == 1
+        assert '1 REQUESTS FAILED WITH 5xx' in capsys.readouterr().out
@@ -0,0 +1,111 @@
+import random
+import threading
+import pytest
+from app import create_app, db
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+
+
+THREADS = 8
+QUOTES = 25
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """App backed by a SQLite file so worker threads get separate connections"""
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'fx.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 30}}
+    })
+
+    with app.app_context():
+        db.create_all()
+        RateService.seed_initial_rates()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _hammer(app, quote_ids):
+    """Execute every quote from every thread, each in its own random order"""
+    results = []
+    errors = []
+    barrier = threading.Barrier(THREADS)
+
+    def worker(seed):
+        order = list(quote_ids)
+        random.Random(seed).shuffle(order)
+        with app.app_context():
+            barrier.wait()
+            for quote_id in order:
+                try:
+                    results.append((quote_id, FXService.execute_quote(quote_id).id))
+                except Exception as e:
+                    errors.append(repr(e))
+                    db.session.rollback()
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class TestOptimisticExecution:
+    """Stress test the single-statement execution path"""
+
+    def test_no_double_execution_under_contention(self, file_app):
+        """Test that concurrent executions of the same quotes create one transaction each"""
+        file_app.config['QUOTE_EXECUTION_MODE'] = 'optimistic'
+        quote_ids = [FXService.generate_quote('USD', 'KES', str(i + 1)).id for i in range(QUOTES)]
+
+        results, errors = _hammer(file_app, quote_ids)
+
+        assert errors == []
+        assert len(results) == THREADS * QUOTES
+
+        # Every caller got the same transaction for a given quote
+        by_quote = {}
+        for quote_id, transaction_id in results:
+            by_quote.setdefault(quote_id, set()).add(transaction_id)
+        assert all(len(ids) == 1 for ids in by_quote.values())
+
+        db.session.expire_all()
+        for quote_id in quote_ids:
+            assert Transaction.query.filter_by(quote_id=quote_id).count() == 1
+
+    def test_optimistic_rejects_expired_and_missing(self, file_app):
+        """Test that a failed claim reports the reason"""
+        from datetime import datetime, timedelta
+
+        file_app.config['QUOTE_EXECUTION_MODE'] = 'optimistic'
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        quote.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        with pytest.raises(ValueError, match='expired'):
+            FXService.execute_quote(quote.id)
+        with pytest.raises(ValueError, match='not found'):
+            FXService.execute_quote('missing')
+
+    def test_locking_path_never_double_executes(self, file_app):
+        """Test that the unique quote_id stops double execution where FOR UPDATE cannot"""
+        file_app.config['QUOTE_EXECUTION_MODE'] = 'locking'
+        quote_ids = [FXService.generate_quote('USD', 'KES', str(i + 1)).id for i in range(QUOTES)]
+
+        results, errors = _hammer(file_app, quote_ids)
+
+        # SQLite ignores FOR UPDATE, so racing callers reach the commit and
+        # the loser is answered with the winner's transaction
+        assert errors == []
+        by_quote = {}
+        for quote_id, transaction_id in results:
+            by_quote.setdefault(quote_id, set()).add(transaction_id)
+        assert all(len(ids) == 1 for ids in by_quote.values())
+
+        db.session.expire_all()
+        for quote_id in quote_ids:
+            assert Transaction.query.filter_by(quote_id=quote_id).count() == 1
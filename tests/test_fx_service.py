@@ -141,4 +141,180 @@ class TestFXService:
             assert quote is not None
             assert quote.to_amount > 0
             # KES is worth less than NGN, so should get fewer NGN
-            assert quote.to_amount > Decimal('1')
\ No newline at end of file
+            assert quote.to_amount > Decimal('1')
+
+    def test_generate_quotes_batch(self, app):
+        """Test batch quote generation with per-item errors"""
+        with app.app_context():
+            results = FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100'},
+                {'from_currency': 'USD', 'to_currency': 'XXX', 'amount': '100'},
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '-5'},
+                {'from_currency': 'KES', 'to_currency': 'NGN', 'amount': '1000'},
+                {'from_currency': 'USD'},
+            ])
+
+            assert [r['index'] for r in results] == [0, 1, 2, 3, 4]
+            assert 'quote' in results[0] and 'quote' in results[3]
+            assert 'Unsupported currency' in results[1]['error']
+            assert 'greater than zero' in results[2]['error']
+            assert 'Missing required fields' in results[4]['error']
+
+            # Batch quotes are persisted and priced like single quotes
+            single = FXService.generate_quote('USD', 'KES', '100')
+            stored = FXService.get_quote(results[0]['quote'].id)
+            assert stored.to_amount == single.to_amount
+            assert stored.exchange_rate == single.exchange_rate
+            assert stored.to_dict()['to_amount'] == results[0]['quote'].to_dict()['to_amount']
+
+    def test_generate_quotes_single_insert_and_commit(self, app):
+        """Test that a batch issues one INSERT and one COMMIT"""
+        with app.app_context():
+            from sqlalchemy import event
+            from app import db
+
+            RateService.get_rate('USD', 'KES')
+            statements = []
+            commits = []
+
+            def capture(*args):
+                statements.append(args[2])
+
+            def count_commit(conn):
+                commits.append(conn)
+
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            event.listen(db.engine, 'commit', count_commit)
+            try:
+                results = FXService.generate_quotes([
+                    {'from_currency': 'USD', 'to_currency': 'KES', 'amount': str(i + 1)}
+                    for i in range(50)
+                ])
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+                event.remove(db.engine, 'commit', count_commit)
+
+            assert all('quote' in r for r in results)
+            assert len([s for s in statements if s.startswith('INSERT')]) == 1
+            assert len(commits) == 1
+
+    def test_execute_quotes_batch(self, app):
+        """Test group-commit execution with per-item status"""
+        with app.app_context():
+            from datetime import datetime, timedelta
+            from app import db
+
+            fresh = FXService.generate_quote('USD', 'KES', '100')
+            executed = FXService.generate_quote('USD', 'EUR', '50')
+            existing = FXService.execute_quote(executed.id)
+            expired = FXService.generate_quote('EUR', 'NGN', '10')
+            expired.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+
+            results = FXService.execute_quotes(
+                [fresh.id, executed.id, expired.id, 'missing', fresh.id]
+            )
+
+            assert [r['status'] for r in results] == [
+                'executed', 'already_executed', 'expired', 'not_found', 'already_executed'
+            ]
+            assert results[1]['transaction'].id == existing.id
+            assert results[4]['transaction'].id == results[0]['transaction'].id
+            assert 'expired' in results[2]['error']
+
+            # Batch executions are visible to the single-quote path
+            assert FXService.get_quote(fresh.id).is_executed
+            assert FXService.execute_quote(fresh.id).id == results[0]['transaction'].id
+            assert not FXService.get_quote(expired.id).is_executed
+
+    def test_execute_quotes_single_commit(self, app):
+        """Test that a batch execution commits once"""
+        with app.app_context():
+            from sqlalchemy import event
+            from app import db
+
+            quote_ids = [r['quote'].id for r in FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': str(i + 1)}
+                for i in range(20)
+            ])]
+            commits = []
+
+            def count_commit(conn):
+                commits.append(conn)
+
+            event.listen(db.engine, 'commit', count_commit)
+            try:
+                results = FXService.execute_quotes(quote_ids)
+            finally:
+                event.remove(db.engine, 'commit', count_commit)
+
+            assert all(r['status'] == 'executed' for r in results)
+            assert len(commits) == 1
+
+    def test_execute_quotes_gives_up_after_conflicting_commits(self, app, monkeypatch):
+        """Test that a batch still conflicting after its retries reports per-item errors"""
+        with app.app_context():
+            from sqlalchemy.exc import IntegrityError
+            from app import db
+
+            quote_ids = [r['quote'].id for r in FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '10'},
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '20'}
+            ])]
+            attempts = []
+
+            def conflicting_commit():
+                attempts.append(1)
+                raise IntegrityError('INSERT INTO transactions', {}, Exception('duplicate quote_id'))
+
+            monkeypatch.setattr(db.session, 'commit', conflicting_commit)
+            results = FXService.execute_quotes(quote_ids + ['missing'])
+
+            assert len(attempts) == app.config['BATCH_EXECUTE_ATTEMPTS']
+            assert [r['status'] for r in results] == ['conflict', 'conflict', 'not_found']
+            assert all('transaction' not in r and r['error'] for r in results)
+
+    def test_transaction_history_keyset_pagination(self, app):
+        """Test that cursors walk the full history without gaps or repeats"""
+        with app.app_context():
+            quote_ids = [r['quote'].id for r in FXService.generate_quotes(
+                [{'from_currency': 'USD', 'to_currency': 'KES', 'amount': str(i + 1)}
+                 for i in range(7)]
+                + [{'from_currency': 'EUR', 'to_currency': 'NGN', 'amount': '5'}]
+            )]
+            # One batch gives every transaction the same created_at, so the
+            # id tie-breaker is exercised
+            FXService.execute_quotes(quote_ids)
+
+            seen = []
+            cursor = None
+            while True:
+                page = FXService.get_transaction_history(limit=3, cursor=cursor)
+                seen.extend(t['transaction_id'] for t in page)
+                if len(page) < 3:
+                    break
+                cursor = FXService.history_cursor(page[-1])
+
+            assert len(seen) == 8
+            assert len(set(seen)) == 8
+            assert seen == [t['transaction_id'] for t in FXService.get_transaction_history(limit=100)]
+
+            ngn = FXService.get_transaction_history(currency='NGN')
+            assert [t['to_currency'] for t in ngn] == ['NGN']
+
+    def test_transaction_history_stream(self, app):
+        """Test that streaming yields every matching row"""
+        with app.app_context():
+            for amount in ('10', '20', '30'):
+                FXService.execute_quote(FXService.generate_quote('USD', 'KES', amount).id)
+
+            rows = list(FXService.stream_transaction_history(batch_size=2))
+
+            assert len(rows) == 3
+            assert rows == FXService.get_transaction_history()
+
+    def test_transaction_history_invalid_cursor(self, app):
+        """Test that a malformed cursor is rejected"""
+        with app.app_context():
+            with pytest.raises(ValueError, match='Invalid cursor'):
+                FXService.get_transaction_history(cursor='not-a-cursor')
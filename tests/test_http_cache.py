@@ -0,0 +1,125 @@
+import gzip
+import json
+from app.services.rate_cache import RateEntry, RateSnapshot
+from app.services.rate_service import RateService
+
+
+def execute_quote(client):
+    quote_id = client.post('/api/v1/quotes', json={
+        'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'
+    }).get_json()['data']['quote_id']
+    return client.post('/api/v1/transactions', json={'quote_id': quote_id}) \
+        .get_json()['data']['transaction_id']
+
+
+class TestConditionalRates:
+    """Test ETag and If-None-Match on GET /rates"""
+
+    def test_matching_etag_gets_304_without_queries(self, client):
+        """Test that a revalidation is answered from memory"""
+        first = client.get('/api/v1/rates')
+        etag = first.headers['ETag']
+
+        second = client.get('/api/v1/rates', headers={'If-None-Match': etag})
+
+        assert first.status_code == 200
+        assert first.headers['Cache-Control'] == 'no-cache'
+        assert second.status_code == 304
+        assert second.get_data() == b''
+        assert second.headers['ETag'] == etag
+        assert second.headers['X-SQL-Statements'] == '0'
+
+    def test_rate_change_changes_etag(self, client):
+        """Test that a stale validator gets the new rates"""
+        etag = client.get('/api/v1/rates').headers['ETag']
+        client.post('/api/v1/rates', json={
+            'base_currency': 'USD', 'target_currency': 'KES', 'rate': '131.25'
+        })
+
+        response = client.get('/api/v1/rates', headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        rates = {(row['base_currency'], row['target_currency']): row['rate']
+                 for row in response.get_json()['data']}
+        assert rates[('USD', 'KES')] == '131.25000000'
+
+    def test_payload_matches_table(self, client, app):
+        """Test that the snapshot serves the same rows as the table"""
+        response = client.get('/api/v1/rates')
+
+        assert response.get_json()['data'] == RateService.get_all_rates()
+
+    def test_etag_depends_on_content_not_version(self, app):
+        """Test that equal tables get equal tags in any process"""
+        entries = {('USD', 'KES'): RateEntry(1, 'USD', 'KES', RateService.get_rate('USD', 'KES'),
+                                             RateService.get_snapshot().get('USD', 'KES').updated_at)}
+
+        assert RateSnapshot(1, entries).etag() == RateSnapshot(7, entries).etag()
+
+
+class TestImmutableTransactions:
+    """Test caching headers on GET /transactions/<id>"""
+
+    def test_transaction_is_cacheable_and_revalidates(self, client):
+        """Test Cache-Control, ETag and 304 on a transaction"""
+        transaction_id = execute_quote(client)
+        url = f'/api/v1/transactions/{transaction_id}'
+
+        first = client.get(url)
+        second = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        wildcard = client.get(url, headers={'If-None-Match': '*'})
+
+        assert 'immutable' in first.headers['Cache-Control']
+        assert second.status_code == 304
+        assert second.get_data() == b''
+        assert wildcard.status_code == 304
+
+    def test_unknown_transaction_never_gets_304(self, client):
+        """Test that a guessed tag or * is not taken as proof the id exists"""
+        for if_none_match in ('*', '"transaction-missing"'):
+            response = client.get('/api/v1/transactions/missing',
+                                  headers={'If-None-Match': if_none_match})
+
+            assert response.status_code == 404
+            assert 'ETag' not in response.headers
+
+    def test_missing_transaction_is_not_cached(self, client):
+        """Test that a 404 carries no caching headers"""
+        response = client.get('/api/v1/transactions/missing')
+
+        assert response.status_code == 404
+        assert 'Cache-Control' not in response.headers
+        assert 'ETag' not in response.headers
+
+
+class TestGzip:
+    """Test compression of large responses"""
+
+    def test_large_list_is_gzipped_for_accepting_clients(self, client, app):
+        """Test gzip, Vary and the -gzip ETag variant"""
+        app.config['GZIP_MIN_BYTES'] = 200
+        plain = client.get('/api/v1/rates')
+
+        compressed = client.get('/api/v1/rates', headers={'Accept-Encoding': 'gzip'})
+        revalidated = client.get('/api/v1/rates', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': compressed.headers['ETag']
+        })
+
+        assert 'Content-Encoding' not in plain.headers
+        assert 'Accept-Encoding' in plain.headers['Vary']
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(compressed.get_data())) == plain.get_json()
+        assert compressed.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == compressed.headers['ETag']
+
+    def test_small_responses_and_disabled_gzip_are_left_alone(self, client, app):
+        """Test the size threshold and GZIP_MIN_BYTES = 0"""
+        headers = {'Accept-Encoding': 'gzip'}
+
+        assert 'Content-Encoding' not in client.get('/api/v1/health', headers=headers).headers
+        app.config['GZIP_MIN_BYTES'] = 0
+        response = client.get('/api/v1/rates', headers=headers)
+        assert 'Content-Encoding' not in response.headers
+        assert 'Vary' not in response.headers
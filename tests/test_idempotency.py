@@ -0,0 +1,146 @@
+import time
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.models.idempotency_key import IdempotencyKey
+from app.services.fx_service import FXService
+from app.services.idempotency_service import IdempotencyService
+from app.utils.ids import generate_id
+from app.utils.ttl_cache import TTLCache
+
+
+class TestIdempotencyKeys:
+    """Test the idempotency key store used by quote execution"""
+
+    def test_retry_is_answered_without_reading_quote(self, app):
+        """Test that a retry with a known key skips the quote row entirely"""
+        with app.app_context():
+            quote_id = FXService.generate_quote('USD', 'KES', '100').id
+            first_id = FXService.execute_quote(quote_id, 'key-1').id
+
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda *args: statements.append(args[2]))
+            second = FXService.execute_quote(quote_id, 'key-1')
+
+            assert second.id == first_id
+            assert not any('FROM quotes' in s for s in statements)
+
+    def test_key_is_persisted(self, app):
+        """Test that the key survives a cold in-memory cache"""
+        with app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            transaction = FXService.execute_quote(quote.id, 'key-2')
+            app.extensions['idempotency_cache'].clear()
+
+            assert IdempotencyService.lookup('key-2') == (quote.id, transaction.id)
+            assert FXService.execute_quote(quote.id, 'key-2').id == transaction.id
+
+    def test_lost_race_with_key_returns_winning_transaction(self, app):
+        """Test that a concurrent execution surfacing while the key is staged is not a 500"""
+        from sqlalchemy import insert
+        from app.models.transaction import Transaction
+
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        winner_id = generate_id()
+        # Another worker's transaction committed, but this session still sees the quote unexecuted
+        db.session.execute(insert(Transaction), [Transaction.storage_row({
+            'id': winner_id, 'quote_id': quote.id, 'from_currency': 'USD', 'to_currency': 'KES',
+            'from_amount': quote.from_amount, 'to_amount': quote.to_amount,
+            'exchange_rate': quote.exchange_rate, 'status': 'completed', 'created_at': datetime.utcnow()
+        })])
+        db.session.commit()
+
+        transaction = FXService.execute_quote(quote.id, idempotency_key='race-key')
+
+        assert transaction.id == winner_id
+
+    def test_key_reuse_for_different_quote_rejected(self, app):
+        """Test that one key cannot execute two different quotes"""
+        with app.app_context():
+            quote1 = FXService.generate_quote('USD', 'KES', '100')
+            quote2 = FXService.generate_quote('USD', 'KES', '200')
+            FXService.execute_quote(quote1.id, 'key-3')
+
+            with pytest.raises(ValueError, match='different quote'):
+                FXService.execute_quote(quote2.id, 'key-3')
+            assert not FXService.get_quote(quote2.id).is_executed
+
+    def test_expired_key_can_be_reused(self, app):
+        """Test that an expired key is treated as new"""
+        with app.app_context():
+            quote1 = FXService.generate_quote('USD', 'KES', '100')
+            FXService.execute_quote(quote1.id, 'key-4')
+            IdempotencyKey.query.filter_by(key='key-4').first().expires_at = \
+                datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            app.extensions['idempotency_cache'].clear()
+
+            quote2 = FXService.generate_quote('USD', 'KES', '200')
+            transaction = FXService.execute_quote(quote2.id, 'key-4')
+
+            assert transaction.quote_id == quote2.id
+            assert IdempotencyKey.query.filter_by(key='key-4').count() == 1
+
+    def test_invalid_key_rejected(self, app):
+        """Test that over-long keys are rejected"""
+        with app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            with pytest.raises(ValueError, match='at most 255'):
+                FXService.execute_quote(quote.id, 'k' * 256)
+
+    def test_sweep_expired_in_batches(self, app):
+        """Test that expired keys are deleted in batches and live keys kept"""
+        with app.app_context():
+            now = datetime.utcnow()
+            for i in range(7):
+                db.session.add(IdempotencyKey(
+                    key=f'old-{i}', quote_id=generate_id(), transaction_id=generate_id(),
+                    expires_at=now - timedelta(minutes=1)
+                ))
+            db.session.add(IdempotencyKey(
+                key='live', quote_id=generate_id(), transaction_id=generate_id(),
+                expires_at=now + timedelta(minutes=1)
+            ))
+            db.session.commit()
+
+            assert IdempotencyService.sweep_expired(batch_size=3) == 7
+            assert [k.key for k in IdempotencyKey.query.all()] == ['live']
+
+    def test_background_sweeper(self, app):
+        """Test that the periodic task runs the sweep in an app context"""
+        from app.utils.background import PeriodicTask
+
+        with app.app_context():
+            db.session.add(IdempotencyKey(
+                key='old', quote_id=generate_id(), transaction_id=generate_id(),
+                expires_at=datetime.utcnow() - timedelta(minutes=1)
+            ))
+            db.session.commit()
+
+        task = PeriodicTask(app, 'test-sweeper', 60, IdempotencyService.sweep_expired)
+        assert task.run_once() == 1
+
+
+class TestTTLCache:
+    """Test the bounded LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set('a', 1, ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert cache.get('a') is None
+        assert len(cache) == 0
@@ -0,0 +1,97 @@
+import uuid
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+from app.utils.ids import generate_id, id_to_int, ulid, ulid_to_str, uuid7
+
+
+@pytest.fixture(params=['uuid7', 'ulid'])
+def binary_app(request):
+    """App storing time-ordered ids as 16-byte binary"""
+    app = create_app('testing', {'ID_STRATEGY': request.param, 'ID_STORAGE': 'binary'})
+
+    with app.app_context():
+        db.create_all()
+        RateService.seed_initial_rates()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+class TestIdGeneration:
+    """Test the time-ordered id generators"""
+
+    def test_uuid7_is_ordered(self):
+        ids = [str(uuid7()) for _ in range(2000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+        assert uuid.UUID(ids[0]).version == 7
+
+    def test_ulid_is_ordered_and_round_trips(self):
+        ids = [ulid() for _ in range(2000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+        assert all(len(value) == 26 for value in ids)
+        assert ulid_to_str(id_to_int(ids[0])) == ids[0]
+
+    def test_invalid_ids_rejected(self):
+        for value in ('', 'not-an-id', 'Z' * 26, None):
+            with pytest.raises(ValueError):
+                id_to_int(value)
+
+    def test_strategy_from_config(self, app):
+        with app.app_context():
+            app.config['ID_STRATEGY'] = 'ulid'
+            assert len(generate_id()) == 26
+            app.config['ID_STRATEGY'] = 'uuid7'
+            assert uuid.UUID(generate_id()).version == 7
+
+
+class TestBinaryIds:
+    """Test ids stored as 16-byte binary"""
+
+    def test_ids_stored_as_bytes(self, binary_app):
+        with binary_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            transaction = FXService.execute_quote(quote.id)
+            db.session.expire_all()
+
+            stored = db.session.execute(text('SELECT typeof(id), length(id) FROM quotes')).one()
+            assert stored == ('blob', 16)
+            assert FXService.get_quote(quote.id).id == quote.id
+            assert FXService.get_transaction(transaction.id).quote_id == quote.id
+
+    def test_routes_use_text_ids(self, binary_app):
+        client = binary_app.test_client()
+        quote_id = client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': 100
+        }).get_json()['data']['quote_id']
+
+        response = client.post('/api/v1/transactions', json={'quote_id': quote_id})
+        transaction_id = response.get_json()['data']['transaction_id']
+
+        assert client.get(f'/api/v1/quotes/{quote_id}').get_json()['data']['quote_id'] == quote_id
+        assert client.get(f'/api/v1/transactions/{transaction_id}').status_code == 200
+        assert client.get('/api/v1/quotes/not-an-id').status_code == 404
+
+    def test_history_pages_with_binary_ids(self, binary_app):
+        client = binary_app.test_client()
+        for _ in range(5):
+            quote_id = client.post('/api/v1/quotes', json={
+                'from_currency': 'USD', 'to_currency': 'EUR', 'amount': 10
+            }).get_json()['data']['quote_id']
+            client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/v1/transactions?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            page = client.get(url).get_json()
+            seen.extend(t['transaction_id'] for t in page['data'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        assert len(seen) == len(set(seen)) == 5
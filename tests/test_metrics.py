@@ -0,0 +1,141 @@
+import threading
+import time
+import pytest
+from app.services.fx_service import FXService
+from app.utils.metrics import MetricsRegistry
+
+
+def sample_value(text, line_prefix):
+    """Return the value of the exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+class TestMetricsRegistry:
+    """Test the sharded counters and histograms"""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test bucket, sum and count lines for one label set"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('op',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, 'quote')
+
+        text = registry.render()
+
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{op="quote",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{op="quote",le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{op="quote",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{op="quote"} 4' in text
+        assert sample_value(text, 'latency_seconds_sum{op="quote"}') == pytest.approx(6.05)
+
+    def test_counters_from_exited_threads_are_kept(self):
+        """Test that shards of finished threads fold into the totals"""
+        registry = MetricsRegistry()
+        counter = registry.counter('events_total', 'Events', ('kind',))
+
+        def work():
+            for _ in range(1000):
+                counter.inc('a')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc('a', amount=5)
+
+        assert registry.samples()[('events_total', ('a',))] == 8005
+        assert len(registry._shards) == 1
+
+    def test_label_values_are_escaped(self):
+        """Test quoting of label values in the exposition format"""
+        registry = MetricsRegistry()
+        registry.counter('odd_total', 'Odd labels', ('path',)).inc('a"b\\c')
+
+        assert 'odd_total{path="a\\"b\\\\c"} 1' in registry.render()
+
+    def test_observe_overhead_is_small(self):
+        """Test that recording a value stays in the low microseconds"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('fast_seconds', 'Fast', ('op',))
+        histogram.observe(0.001, 'warm')
+
+        iterations = 20000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            histogram.observe(0.001, 'warm')
+        per_call = (time.perf_counter() - start) / iterations
+
+        assert per_call < 20e-6
+
+
+class TestMetricsEndpoint:
+    """Test GET /metrics and the values the app records"""
+
+    def test_metrics_endpoint_reports_requests_and_services(self, client):
+        """Test per-route, per-service and database series after a quote and execution"""
+        response = client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'
+        })
+        quote_id = response.get_json()['data']['quote_id']
+        client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        response = client.get('/metrics')
+        text = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        assert sample_value(text, 'fx_http_requests_total'
+                                  '{method="POST",endpoint="fx.create_quote",status="201"}') == 1
+        assert sample_value(text, 'fx_http_request_duration_seconds_count'
+                                  '{method="POST",endpoint="fx.execute_transaction"}') == 1
+        assert sample_value(text, 'fx_service_duration_seconds_count{operation="generate_quote"}') == 1
+        assert sample_value(text, 'fx_service_duration_seconds_count{operation="get_rate"}') == 1
+        assert sample_value(text, 'fx_quotes_generated_total') == 1
+        assert sample_value(text, 'fx_quote_executions_total{result="executed"}') == 1
+        assert sample_value(text, 'fx_db_statements_per_request_sum{endpoint="fx.create_quote"}') >= 1
+        assert sample_value(text, 'fx_rate_snapshot_pairs') > 0
+
+    def test_rejections_and_replays_are_counted(self, app):
+        """Test the rejection and replay counters"""
+        quote = FXService.generate_quote('USD', 'KES', '100.00')
+        FXService.execute_quote(quote.id)
+        FXService.execute_quote(quote.id)
+        with pytest.raises(ValueError):
+            FXService.execute_quote('missing-quote')
+
+        samples = app.extensions['metrics'].registry.samples()
+
+        assert samples[('fx_quote_executions_total', ('executed',))] == 1
+        assert samples[('fx_quote_executions_total', ('replayed',))] == 1
+        assert samples[('fx_quote_rejections_total', ('not_found',))] == 1
+
+    def test_failed_statement_does_not_skew_statement_timings(self, app):
+        """Test that a statement that raises leaves no timer on its connection"""
+        from sqlalchemy import text
+        from sqlalchemy.exc import OperationalError
+        from app import db
+
+        registry = app.extensions['metrics'].registry
+        before = sample_value(registry.render(), 'fx_db_statement_duration_seconds_count')
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        connection = db.session.connection()
+        connection.execute(text('SELECT 1'))
+
+        assert 'metrics_started' not in connection.info
+        assert sample_value(registry.render(), 'fx_db_statement_duration_seconds_count') == before + 1
+
+    def test_metrics_can_be_disabled(self):
+        """Test that METRICS_ENABLED=False removes the endpoint"""
+        from app import create_app
+
+        app = create_app('testing', {'METRICS_ENABLED': False})
+
+        assert 'metrics' not in app.extensions
+        assert app.test_client().get('/metrics').status_code == 404
@@ -0,0 +1,129 @@
+from decimal import Decimal
+from sqlalchemy import bindparam, inspect, text
+from app import db
+from app.models.quote import Quote
+from app.models.types import Identifier
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.services.storage_migration import MoneyStorageMigration
+
+LEGACY_SCHEMA = [
+    """CREATE TABLE quotes (
+        id VARCHAR(36) NOT NULL, from_currency VARCHAR(3) NOT NULL,
+        to_currency VARCHAR(3) NOT NULL, from_amount NUMERIC(18, 2) NOT NULL,
+        to_amount NUMERIC(18, 2) NOT NULL, exchange_rate NUMERIC(18, 8) NOT NULL,
+        created_at DATETIME NOT NULL, expires_at DATETIME NOT NULL,
+        is_executed BOOLEAN NOT NULL, executed_at DATETIME, PRIMARY KEY (id))""",
+    """CREATE TABLE transactions (
+        id VARCHAR(36) NOT NULL, quote_id VARCHAR(36) NOT NULL,
+        from_currency VARCHAR(3) NOT NULL, to_currency VARCHAR(3) NOT NULL,
+        from_amount NUMERIC(18, 2) NOT NULL, to_amount NUMERIC(18, 2) NOT NULL,
+        exchange_rate NUMERIC(18, 8) NOT NULL, status VARCHAR(20) NOT NULL,
+        created_at DATETIME NOT NULL, PRIMARY KEY (id),
+        FOREIGN KEY(quote_id) REFERENCES quotes (id))"""
+]
+
+
+def _raw(table, transaction_id):
+    return db.session.execute(text(
+        f'SELECT from_amount, to_amount_minor, exchange_rate_scaled FROM {table} WHERE id = :id'
+    ).bindparams(bindparam('id', type_=Identifier)), {'id': transaction_id}).one()
+
+
+class TestMinorUnitStorage:
+    """Test MONEY_STORAGE_MODE = 'minor_units'"""
+
+    def test_amounts_stored_as_integers(self, app):
+        """Test that minor-unit mode writes only the integer columns"""
+        with app.app_context():
+            app.config['MONEY_STORAGE_MODE'] = 'minor_units'
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            transaction = FXService.execute_quote(quote.id)
+
+            from_amount, to_amount_minor, rate_scaled = _raw('transactions', transaction.id)
+            assert from_amount is None
+            assert to_amount_minor == int(transaction.to_amount * 100)
+            assert rate_scaled == int(transaction.exchange_rate * 10 ** 8)
+
+    def test_to_dict_matches_numeric_mode(self, app):
+        """Test that both storage modes load identical API output"""
+        with app.app_context():
+            results = {}
+            for mode in ('numeric', 'minor_units'):
+                app.config['MONEY_STORAGE_MODE'] = mode
+                quote = FXService.generate_quotes([
+                    {'from_currency': 'KES', 'to_currency': 'NGN', 'amount': '1234.56'}
+                ])[0]['quote']
+                db.session.expire_all()
+                data = FXService.get_quote(quote.id).to_dict()
+                results[mode] = {k: data[k] for k in ('from_amount', 'to_amount', 'exchange_rate')}
+
+            assert results['numeric'] == results['minor_units']
+
+    def test_volume_sums_both_storage_modes(self, app):
+        """Test that volume totals cover rows stored either way"""
+        with app.app_context():
+            expected = Decimal('0')
+            for mode in ('numeric', 'minor_units', 'minor_units'):
+                app.config['MONEY_STORAGE_MODE'] = mode
+                quote = FXService.generate_quote('USD', 'EUR', '10.25')
+                expected += FXService.execute_quote(quote.id).to_amount
+
+            volume = FXService.get_transaction_volume()
+            assert volume == [{
+                'from_currency': 'USD',
+                'to_currency': 'EUR',
+                'count': 3,
+                'from_amount': '30.75',
+                'to_amount': str(expected)
+            }]
+
+    def test_volume_endpoint(self, client):
+        """Test GET /transactions/volume"""
+        quote_id = client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': 100
+        }).get_json()['data']['quote_id']
+        client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        response = client.get('/api/v1/transactions/volume')
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['data'][0]['from_amount'] == '100.00'
+
+
+class TestMoneyStorageMigration:
+    """Test converting a legacy Numeric schema to minor units"""
+
+    def test_migrates_legacy_rows_in_batches(self, app):
+        with app.app_context():
+            Transaction.__table__.drop(db.engine)
+            Quote.__table__.drop(db.engine)
+            for ddl in LEGACY_SCHEMA:
+                db.session.execute(text(ddl))
+            for i in range(5):
+                db.session.execute(text(
+                    "INSERT INTO quotes VALUES (:id, 'USD', 'KES', 100.5, 13014.75, 129.50000001, "
+                    "'2024-01-01 00:00:00', '2024-01-01 00:01:00', 1, '2024-01-01 00:00:30')"
+                ), {'id': f'q{i}'})
+                db.session.execute(text(
+                    "INSERT INTO transactions VALUES (:id, :quote_id, 'USD', 'KES', 100.5, "
+                    "13014.75, 129.50000001, 'completed', '2024-01-01 00:00:30')"
+                ), {'id': f't{i}', 'quote_id': f'q{i}'})
+            db.session.commit()
+
+            assert MoneyStorageMigration.run(batch_size=2) == {'quotes': 5, 'transactions': 5}
+
+            columns = {c['name']: c for c in inspect(db.engine).get_columns('quotes')}
+            assert columns['from_amount']['nullable']
+            assert _raw('quotes', 'q0') == (None, 1301475, 12950000001)
+
+            transaction = db.session.get(Transaction, 't4')
+            assert transaction.to_dict()['exchange_rate'] == '129.50000001'
+            assert transaction.to_dict()['from_amount'] == '100.50'
+
+            # New rows can now be written in either mode
+            app.config['MONEY_STORAGE_MODE'] = 'minor_units'
+            quote = FXService.generate_quote('USD', 'KES', '1')
+            assert FXService.execute_quote(quote.id).quote_id == quote.id
+
+            assert MoneyStorageMigration.run() == {'quotes': 0, 'transactions': 0}
@@ -0,0 +1,107 @@
+import random
+import pytest
+from decimal import Decimal, InvalidOperation
+from app.services.fx_service import FXService
+from app.services.pricing import DecimalPricer, FixedPointPricer, create_pricer
+from app.utils.decimal_utils import round_currency
+from app.utils.fixed_point import (
+    CURRENCY_PLACES, MINOR_UNIT_PLACES, convert_minor_units, currency_places, from_scaled,
+    multiply, quantize, round_significant, to_scaled
+)
+
+
+def _random_decimal(rnd, max_digits=30, max_places=30):
+    digits = rnd.randint(1, max_digits)
+    return Decimal(rnd.randint(1, 10 ** digits)).scaleb(-rnd.randint(0, max_places))
+
+
+def _outcome(func, *args):
+    """Return the exact result, or the exception type for inputs too wide for the context"""
+    try:
+        return func(*args).as_tuple()
+    except InvalidOperation:
+        return InvalidOperation
+
+
+class TestFixedPointPricing:
+    """Test that the fixed-point engine is bit-identical to the Decimal engine"""
+
+    def test_matches_decimal_engine(self):
+        """Property test over random amounts, rates and spreads"""
+        rnd = random.Random(20240501)
+        reference = DecimalPricer()
+        fixed = FixedPointPricer((50,))
+
+        for _ in range(5000):
+            amount = _random_decimal(rnd, max_digits=15, max_places=6)
+            rate = _random_decimal(rnd)
+            spread_bps = rnd.choice([0, 50, 125, Decimal('37.5')])
+            is_buy = rnd.random() < 0.5
+
+            expected = reference.apply_spread(rate, spread_bps, is_buy)
+            actual = fixed.apply_spread(rate, spread_bps, is_buy)
+            assert actual.as_tuple() == expected.as_tuple()
+
+            places = rnd.choice([0, 2, 3])
+            assert _outcome(fixed.convert, amount, actual, places) == \
+                _outcome(reference.convert, amount, expected, places)
+            assert _outcome(fixed.round_rate, actual) == \
+                _outcome(reference.round_rate, expected)
+
+    def test_rounding_edges(self):
+        """Test half-up ties, half-even precision rounding and carries"""
+        assert quantize(to_scaled(Decimal('0.005')), 2) == 1
+        assert quantize(to_scaled(Decimal('-0.005')), 2) == -1
+        assert quantize(to_scaled(Decimal('0.00499')), 2) == 0
+
+        # 29 nines round up to 10**28 and lose a digit
+        coefficient, exponent = round_significant(10 ** 29 - 1, 0)
+        assert from_scaled(coefficient, exponent) == Decimal(10) ** 29
+
+        # Ties at the 28th digit go to even
+        assert round_significant(10 ** 28 + 5, 0) == (10 ** 27, 1)
+        assert round_significant(10 ** 28 + 15, 0) == (10 ** 27 + 2, 1)
+
+        a, b = Decimal('1234567.891011121314151617'), Decimal('9.87654321987654321')
+        assert from_scaled(*multiply(to_scaled(a), to_scaled(b))).as_tuple() == (a * b).as_tuple()
+
+    def test_overflow_raises_like_decimal(self):
+        """Test that results too wide for the context fail as Decimal does"""
+        huge = Decimal(10) ** 27
+        with pytest.raises(InvalidOperation):
+            DecimalPricer().convert(huge, Decimal('100'))
+        with pytest.raises(InvalidOperation):
+            FixedPointPricer().convert(huge, Decimal('100'))
+
+    def test_minor_unit_conversion(self):
+        """Test the integer core against round_currency"""
+        rate = Decimal('1580.25') / Decimal('129.5')
+        expected = round_currency(Decimal('1234.56') * rate)
+        assert convert_minor_units(123456, to_scaled(rate)) == int(expected * 100)
+
+    def test_convert_uses_currency_places(self, monkeypatch):
+        """Test that conversions round to the target currency's minor unit"""
+        monkeypatch.setitem(MINOR_UNIT_PLACES, 'JPY', 0)
+        amount, rate = Decimal('10'), Decimal('1.23456789')
+
+        assert currency_places('KES') == CURRENCY_PLACES
+        for pricer in (DecimalPricer(), FixedPointPricer()):
+            assert pricer.convert(amount, rate, currency_places('KES')) == Decimal('12.35')
+            assert pricer.convert(amount, rate, currency_places('JPY')).as_tuple() == \
+                Decimal('12').as_tuple()
+
+    def test_unknown_engine_rejected(self):
+        with pytest.raises(ValueError):
+            create_pricer({'PRICING_ENGINE': 'float'})
+
+    def test_quotes_identical_across_engines(self, app):
+        """Test that switching engines does not change a quote"""
+        with app.app_context():
+            app.config['STATELESS_QUOTES'] = True
+            reference = FXService.generate_quote('KES', 'NGN', '1234.567').to_dict()
+
+            app.extensions['pricer'] = FixedPointPricer((50,))
+            fixed = FXService.generate_quote('KES', 'NGN', '1234.567').to_dict()
+
+            for field in ('from_amount', 'to_amount', 'exchange_rate'):
+                assert fixed[field] == reference[field]
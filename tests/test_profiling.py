@@ -0,0 +1,95 @@
+import threading
+from decimal import Decimal
+import pytest
+from app.utils.profiling import profile_lock
+
+TOKEN = 'test-admin-token'
+AUTH = {'Authorization': f'Bearer {TOKEN}'}
+
+
+@pytest.fixture
+def admin_client(app):
+    app.config['ADMIN_TOKEN'] = TOKEN
+    return app.test_client()
+
+
+def busy_decimal_work(stop):
+    total = Decimal('0')
+    while not stop.is_set():
+        total += Decimal('1.01') * Decimal('129.50')
+
+
+def run_in_thread(target, *args):
+    stop = threading.Event()
+    thread = threading.Thread(target=target, args=(stop,) + args, name='busy-worker')
+    thread.start()
+    return stop, thread
+
+
+class TestProfilingEndpoints:
+    """Test the admin CPU sampler and tracemalloc endpoints"""
+
+    def test_endpoints_hidden_without_token_config(self, client):
+        """Test that the endpoints answer 404 while ADMIN_TOKEN is unset"""
+        response = client.get('/api/v1/admin/profile/cpu?seconds=0.1', headers=AUTH)
+
+        assert response.status_code == 404
+
+    def test_wrong_token_is_rejected(self, admin_client):
+        """Test that a missing or wrong bearer token gets 401"""
+        assert admin_client.get('/api/v1/admin/profile/cpu?seconds=0.1').status_code == 401
+        response = admin_client.get('/api/v1/admin/profile/memory?seconds=0.1',
+                                    headers={'Authorization': 'Bearer wrong'})
+        assert response.status_code == 401
+
+    def test_cpu_profile_returns_collapsed_stacks(self, admin_client):
+        """Test that a busy thread's function shows up in the collapsed stacks"""
+        stop, thread = run_in_thread(busy_decimal_work)
+        try:
+            response = admin_client.get('/api/v1/admin/profile/cpu?seconds=0.3&interval_ms=5',
+                                        headers=AUTH)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert response.status_code == 200
+        assert int(response.headers['X-Profile-Samples']) > 0
+        lines = response.get_data(as_text=True).splitlines()
+        busy = [line for line in lines if 'busy_decimal_work' in line]
+        assert busy
+        stack, count = busy[0].rsplit(' ', 1)
+        assert stack.startswith('busy-worker;')
+        assert int(count) > 0
+
+    def test_memory_profile_reports_growth(self, admin_client):
+        """Test that memory retained during the window is reported with its location"""
+        retained = []
+
+        def allocate(stop):
+            while not stop.is_set():
+                retained.append(bytearray(10000))
+                stop.wait(0.005)
+
+        stop, thread = run_in_thread(allocate)
+        try:
+            response = admin_client.get('/api/v1/admin/profile/memory?seconds=0.3&limit=5',
+                                        headers=AUTH)
+        finally:
+            stop.set()
+            thread.join()
+
+        data = response.get_json()['data']
+        assert response.status_code == 200
+        assert len(data) <= 5
+        assert any('test_profiling.py' in entry['location'][0] and entry['size_diff'] > 0
+                   for entry in data)
+
+    def test_concurrent_and_invalid_profiles_are_refused(self, admin_client, app):
+        """Test 409 while a profile runs and 400 for an out-of-range duration"""
+        too_long = app.config['PROFILE_MAX_SECONDS'] + 1
+        response = admin_client.get(f'/api/v1/admin/profile/cpu?seconds={too_long}', headers=AUTH)
+        assert response.status_code == 400
+
+        with profile_lock:
+            response = admin_client.get('/api/v1/admin/profile/memory?seconds=0.1', headers=AUTH)
+        assert response.status_code == 409
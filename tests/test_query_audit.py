@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.exchange_rate import ExchangeRate
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.services.query_audit import QueryAudit
+from app.services.rate_service import RateService
+from app.services.schema_service import SchemaService
+
+
+class TestQueryAudit:
+    """Test that hot-path queries are answered from indexes"""
+
+    def test_no_unexpected_full_scans(self, app):
+        """Test that no service query outside the allowed bulk reads scans a table"""
+        results = QueryAudit.run()
+
+        assert results
+        findings = QueryAudit.findings(results)
+        assert findings == [], '\n'.join(
+            f"{f['step']}: {f['statement']} -> {f['plan']}" for f in findings
+        )
+
+    def test_hot_lookups_use_expected_indexes(self, app):
+        """Test the plans of the idempotent transaction lookup and the pair lookup"""
+        plans = {}
+        for result in QueryAudit.run():
+            plans.setdefault(result['step'], []).extend(result['plan'])
+
+        assert any('ix_transactions_quote_id' in line for line in plans['execute_quote_optimistic'])
+        assert any('idx_currency_pair' in line for line in plans['set_rate'])
+        assert any('idx_transactions_created_at_id' in line for line in plans['history'])
+
+    def test_flags_unindexed_query(self, app):
+        """Test that a filter on an unindexed column is reported"""
+        FXService.generate_quote('USD', 'KES', '100')
+        steps = [('by_currency', lambda: Quote.query.filter_by(to_currency='KES').all(), False)]
+
+        findings = QueryAudit.findings(QueryAudit.run(steps))
+
+        assert len(findings) == 1
+        assert findings[0]['full_scans'] == ['quotes']
+
+    def test_allowed_scan_is_not_a_finding(self, app):
+        """Test that scans in steps marked as allowed are reported but not flagged"""
+        results = QueryAudit.run([('rates', RateService._load_entries, True)])
+
+        assert results[0]['full_scans'] == ['exchange_rates']
+        assert QueryAudit.findings(results) == []
+
+
+class TestSchemaConstraints:
+    """Test the unique constraints behind the hot-path indexes"""
+
+    def test_one_rate_row_per_pair(self, app):
+        """Test that a second row for a pair is rejected"""
+        db.session.add(ExchangeRate(base_currency='USD', target_currency='KES', rate='1'))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_one_transaction_per_quote(self, app):
+        """Test that a quote cannot be executed into two transactions"""
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        transaction = FXService.execute_quote(quote.id)
+
+        db.session.add(FXService._build_transaction(quote))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+        assert Transaction.query.filter_by(quote_id=quote.id).count() == 1
+        assert FXService.get_transaction(transaction.id).quote_id == quote.id
+
+    def test_ensure_indexes_upgrades_old_schema(self, app):
+        """Test that an old non-unique pair index is deduplicated and rebuilt as unique"""
+        db.session.execute(text('DROP INDEX idx_currency_pair'))
+        db.session.execute(text('DROP INDEX ix_quotes_expires_at'))
+        db.session.execute(text(
+            'CREATE INDEX idx_currency_pair ON exchange_rates (base_currency, target_currency)'
+        ))
+        db.session.execute(text(
+            "INSERT INTO exchange_rates (base_currency, target_currency, rate, updated_at) "
+            "VALUES ('USD', 'KES', 131, CURRENT_TIMESTAMP)"
+        ))
+        db.session.commit()
+
+        created = SchemaService.ensure_indexes()
+
+        assert set(created) == {'idx_currency_pair', 'ix_quotes_expires_at'}
+        rows = ExchangeRate.query.filter_by(base_currency='USD', target_currency='KES').all()
+        assert [str(row.rate) for row in rows] == ['131.00000000']
+        assert SchemaService.ensure_indexes() == []
+
+    def test_ensure_indexes_refuses_duplicate_transactions(self, app):
+        """Test that duplicate transactions for one quote are reported, not deleted"""
+        quote = FXService.generate_quote('USD', 'KES', '100')
+        FXService.execute_quote(quote.id)
+        db.session.execute(text('DROP INDEX ix_transactions_quote_id'))
+        db.session.add(FXService._build_transaction(quote))
+        db.session.commit()
+
+        with pytest.raises(ValueError, match='ix_transactions_quote_id'):
+            SchemaService.ensure_indexes()
+        db.session.rollback()
+        assert Transaction.query.filter_by(quote_id=quote.id).count() == 2
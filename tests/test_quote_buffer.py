@@ -0,0 +1,124 @@
+import time
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models.quote import Quote
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+
+
+@pytest.fixture
+def buffered_app(app):
+    """App in write-behind mode; the flusher is driven explicitly"""
+    app.config['QUOTE_WRITE_MODE'] = 'write_behind'
+    return app
+
+
+class TestWriteBehindQuotes:
+    """Test buffered quote persistence when QUOTE_WRITE_MODE is 'write_behind'"""
+
+    def test_generate_quote_is_buffered(self, buffered_app):
+        """Test that a quote is served from the buffer before it is written"""
+        with buffered_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+
+            assert Quote.query.count() == 0
+            assert FXService.get_quote(quote.id).to_amount == quote.to_amount
+
+            assert buffered_app.extensions['quote_buffer'].flush() == 1
+            assert db.session.get(Quote, quote.id).to_amount == quote.to_amount
+            assert len(buffered_app.extensions['quote_buffer']) == 0
+
+    def test_execute_unflushed_quote(self, buffered_app):
+        """Test that executing a buffered quote writes it first"""
+        with buffered_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            transaction = FXService.execute_quote(quote.id)
+
+            assert transaction.quote_id == quote.id
+            assert db.session.get(Quote, quote.id).is_executed is True
+            assert FXService.execute_quote(quote.id).id == transaction.id
+
+    def test_batch_execute_unflushed_quotes(self, buffered_app):
+        """Test that batch execution flushes buffered quotes"""
+        with buffered_app.app_context():
+            results = FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '10'},
+                {'from_currency': 'USD', 'to_currency': 'EUR', 'amount': '20'}
+            ])
+            quote_ids = [r['quote'].id for r in results]
+
+            outcomes = FXService.execute_quotes(quote_ids)
+            assert [o['status'] for o in outcomes] == ['executed', 'executed']
+
+    def test_max_size_flushes_inline(self, buffered_app):
+        """Test that a full buffer is written by the request thread"""
+        with buffered_app.app_context():
+            buffered_app.extensions['quote_buffer'].max_size = 3
+            for _ in range(3):
+                FXService.generate_quote('USD', 'KES', '100')
+
+            assert Quote.query.count() == 3
+            assert len(buffered_app.extensions['quote_buffer']) == 0
+
+    def test_bad_row_is_dropped_and_the_rest_written(self, buffered_app):
+        """Test that one row the database rejects does not block the buffer"""
+        with buffered_app.app_context():
+            quote_buffer = buffered_app.extensions['quote_buffer']
+            written = FXService.generate_quote('USD', 'KES', '100')
+            duplicate = quote_buffer.get(written.id)
+            quote_buffer.flush()
+
+            quote = FXService.generate_quote('USD', 'KES', '200')
+            quote_buffer.add([duplicate])
+
+            assert quote_buffer.flush() == 1
+            assert db.session.get(Quote, quote.id) is not None
+            assert len(quote_buffer) == 0
+            assert quote_buffer.stats()['dropped'] == 1
+
+    def test_unreachable_database_keeps_rows(self, buffered_app, monkeypatch):
+        """Test that rows are put back when the database cannot be reached"""
+        with buffered_app.app_context():
+            quote_buffer = buffered_app.extensions['quote_buffer']
+            quote = FXService.generate_quote('USD', 'KES', '100')
+
+            def unreachable(*args, **kwargs):
+                raise OperationalError('INSERT', {}, Exception('database is locked'))
+
+            monkeypatch.setattr(db.session, 'execute', unreachable)
+            with pytest.raises(OperationalError):
+                quote_buffer.flush()
+            monkeypatch.undo()
+
+            assert quote_buffer.get(quote.id) is not None
+            assert quote_buffer.flush() == 1
+            assert quote_buffer.stats()['dropped'] == 0
+
+    def test_background_flush_and_shutdown(self, tmp_path):
+        """Test the flusher thread writes on its interval and drains on close"""
+        app = create_app('testing', {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'fx.db'}",
+            'QUOTE_WRITE_MODE': 'write_behind',
+            'QUOTE_FLUSH_INTERVAL_SECONDS': 0.05
+        })
+        quote_buffer = app.extensions['quote_buffer']
+
+        with app.app_context():
+            RateService.seed_initial_rates()
+            FXService.generate_quote('USD', 'KES', '100')
+
+            deadline = time.monotonic() + 5
+            while Quote.query.count() < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert Quote.query.count() == 1
+
+            quote_buffer.task.stop()
+            FXService.generate_quote('USD', 'KES', '200')
+            db.session.remove()
+
+        quote_buffer.close(app)
+
+        with app.app_context():
+            assert Quote.query.count() == 2
+            db.drop_all()
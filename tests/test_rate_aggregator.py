@@ -0,0 +1,124 @@
+import threading
+import time
+import pytest
+from decimal import Decimal
+from app.services.rate_aggregator import RateAggregator
+from app.services.rate_providers import RateProvider
+from app.services.rate_service import RateService
+
+
+class StaticProvider(RateProvider):
+    """Provider returning fixed rates after an optional delay"""
+
+    def __init__(self, name, rates, delay=0, weight=1, timeout_seconds=1, error=None):
+        super().__init__(name, weight, timeout_seconds)
+        self.rates = rates
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+
+    def fetch(self, base_currency, session):
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.error:
+            raise self.error
+        return self.rates
+
+
+class TestRateAggregator:
+    """Test concurrent multi-provider aggregation"""
+
+    def test_median_drops_outliers(self):
+        """Test that a provider far from the median is ignored"""
+        aggregator = RateAggregator([
+            StaticProvider('a', {'KES': '129.00', 'EUR': '0.92'}),
+            StaticProvider('b', {'KES': '129.50', 'EUR': '0.93'}),
+            StaticProvider('c', {'KES': '160.00', 'EUR': '0.925'}),
+        ], outlier_threshold_bps=200)
+
+        rates, report = aggregator.fetch('USD', session=None)
+
+        assert rates['KES'] == Decimal('129.25')
+        assert rates['EUR'] == Decimal('0.925')
+        assert report['outliers'] == [{'currency': 'KES', 'provider': 'c', 'rate': '160.00'}]
+
+    @pytest.mark.parametrize('method', RateAggregator.METHODS)
+    def test_split_providers_keep_all_values(self, method):
+        """Test that no consensus around the median keeps every value"""
+        aggregator = RateAggregator([
+            StaticProvider('a', {'EUR': '0.90'}),
+            StaticProvider('b', {'EUR': '0.90'}),
+            StaticProvider('c', {'EUR': '0.95'}),
+            StaticProvider('d', {'EUR': '0.95'}),
+        ], method=method, outlier_threshold_bps=200)
+
+        rates, report = aggregator.fetch('USD', session=None)
+
+        assert rates['EUR'] == Decimal('0.925')
+        assert report['outliers'] == []
+
+    def test_weighted_mean(self):
+        """Test weighted averaging across providers"""
+        aggregator = RateAggregator([
+            StaticProvider('a', {'KES': '129'}, weight=3),
+            StaticProvider('b', {'KES': '133'}, weight=1),
+        ], method='weighted_mean')
+
+        rates, _ = aggregator.fetch('USD', session=None)
+
+        assert rates['KES'] == Decimal('130')
+
+    def test_hung_provider_does_not_stall_refresh(self):
+        """Test that latency is bounded by the provider timeout, not the hang"""
+        hung = StaticProvider('hung', {'KES': '1'}, delay=30, timeout_seconds=0.2)
+        aggregator = RateAggregator([
+            StaticProvider('fast', {'KES': '129.50'}),
+            StaticProvider('slow', {'KES': '129.70'}, delay=0.1),
+            hung,
+        ])
+
+        started = time.monotonic()
+        rates, report = aggregator.fetch('USD', session=None)
+        elapsed = time.monotonic() - started
+        hung.release.set()
+
+        assert elapsed < 1
+        assert rates['KES'] == Decimal('129.60')
+        statuses = {r['provider']: r['status'] for r in report['providers']}
+        assert statuses == {'fast': 'ok', 'slow': 'ok', 'hung': 'timeout'}
+
+    def test_providers_run_concurrently(self):
+        """Test that latency is the slowest provider, not the sum"""
+        aggregator = RateAggregator([
+            StaticProvider(f'p{i}', {'KES': '129.50'}, delay=0.2) for i in range(5)
+        ])
+
+        started = time.monotonic()
+        aggregator.fetch('USD', session=None)
+
+        assert time.monotonic() - started < 0.6
+
+    def test_all_providers_failing(self):
+        """Test that a refresh fails when no provider answers"""
+        aggregator = RateAggregator([
+            StaticProvider('a', {}, error=RuntimeError('boom')),
+        ])
+
+        with pytest.raises(ValueError, match='a: boom'):
+            aggregator.fetch('USD', session=None)
+
+    def test_update_rates_through_rate_service(self, app):
+        """Test that aggregated rates are written through RateService"""
+        app.config['RATE_PROVIDERS'] = [
+            StaticProvider('a', {'KES': '130.00', 'JPY': '150'}),
+            StaticProvider('b', {'KES': '131.00'}),
+            StaticProvider('down', {}, error=RuntimeError('boom')),
+        ]
+
+        with app.app_context():
+            result = RateService.update_rates_from_api('USD')
+
+            assert result['rates_updated'] == 1
+            assert RateService.get_rate('USD', 'KES') == Decimal('130.5')
+            statuses = {r['provider']: r['status'] for r in result['providers']['USD']['providers']}
+            assert statuses['down'] == 'error'
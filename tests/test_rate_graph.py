@@ -0,0 +1,107 @@
+from decimal import Decimal
+from app.services.rate_graph import RateGraph
+from app.utils.decimal_utils import safe_divide
+
+
+SEED_RATES = {
+    ('USD', 'EUR'): Decimal('0.92'),
+    ('USD', 'KES'): Decimal('129.50'),
+    ('USD', 'NGN'): Decimal('775.00'),
+    ('EUR', 'USD'): Decimal('1.09'),
+    ('EUR', 'KES'): Decimal('140.76'),
+    ('EUR', 'NGN'): Decimal('842.39'),
+}
+
+
+class TestRateGraph:
+    """Test the all-pairs rate matrix"""
+
+    def test_direct_rate_preferred_over_inverse(self):
+        """Test that a stored rate wins over the inverse of the reverse pair"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+
+        assert graph.rate('USD', 'EUR') == Decimal('0.92')
+        assert graph.rate('EUR', 'USD') == Decimal('1.09')
+
+    def test_inverse_rate(self):
+        """Test that a missing reverse pair is derived as 1/rate"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+
+        assert graph.rate('KES', 'USD') == safe_divide(Decimal('1'), Decimal('129.50'))
+        assert graph.path('KES', 'USD') == ['KES', 'USD']
+
+    def test_cross_rate_prefers_pivot(self):
+        """Test that ties between paths are broken in favour of the pivot"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+
+        expected = safe_divide(Decimal('1'), Decimal('129.50')) * Decimal('775.00')
+        assert graph.path('KES', 'NGN') == ['KES', 'USD', 'NGN']
+        assert graph.rate('KES', 'NGN') == expected
+
+        graph = RateGraph.build(SEED_RATES, pivots=['EUR'])
+        assert graph.path('KES', 'NGN') == ['KES', 'EUR', 'NGN']
+
+    def test_multi_hop_without_usd(self):
+        """Test that pairs are reachable through chains that avoid USD"""
+        graph = RateGraph.build({
+            ('EUR', 'GBP'): Decimal('0.85'),
+            ('GBP', 'JPY'): Decimal('190'),
+            ('JPY', 'KRW'): Decimal('9'),
+        }, pivots=['USD'])
+
+        assert graph.path('EUR', 'KRW') == ['EUR', 'GBP', 'JPY', 'KRW']
+        assert graph.rate('EUR', 'KRW') == Decimal('0.85') * Decimal('190') * Decimal('9')
+        assert graph.rate('EUR', 'USD') is None
+
+    def test_incremental_update_matches_full_build(self):
+        """Test that changing one edge gives the same matrix as a rebuild"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+        updated = graph.with_rates({('USD', 'KES'): Decimal('131.25')})
+
+        rates = dict(SEED_RATES)
+        rates[('USD', 'KES')] = Decimal('131.25')
+        rebuilt = RateGraph.build(rates, pivots=['USD'])
+
+        assert updated.matrix == rebuilt.matrix
+        assert updated.paths is graph.paths
+        # The original graph is left untouched
+        assert graph.rate('USD', 'KES') == Decimal('129.50')
+
+    def test_new_pair_rebuilds_paths(self):
+        """Test that adding a pair changes routing"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+        updated = graph.with_rates({('KES', 'NGN'): Decimal('6.00')})
+
+        assert updated.path('KES', 'NGN') == ['KES', 'NGN']
+        assert updated.rate('KES', 'NGN') == Decimal('6.00')
+        assert updated.rate('NGN', 'KES') == safe_divide(Decimal('1'), Decimal('6.00'))
+
+    def test_non_positive_rates_are_skipped(self):
+        """Test that a zero or negative rate does not break the whole matrix"""
+        rates = dict(SEED_RATES)
+        rates[('USD', 'KES')] = Decimal('0')
+        rates[('USD', 'NGN')] = Decimal('-775.00')
+        graph = RateGraph.build(rates, pivots=['USD'])
+
+        assert graph.rate('USD', 'EUR') == Decimal('0.92')
+        assert graph.path('USD', 'KES') == ['USD', 'EUR', 'KES']
+        assert graph.rate('NGN', 'USD') != Decimal('-775.00')
+
+    def test_update_to_zero_rebuilds_without_the_edge(self):
+        """Test that with_rates drops an edge updated to zero"""
+        graph = RateGraph.build(SEED_RATES, pivots=['USD'])
+        updated = graph.with_rates({('USD', 'KES'): Decimal('0')})
+
+        rates = dict(SEED_RATES)
+        rates[('USD', 'KES')] = Decimal('0')
+        assert updated.matrix == RateGraph.build(rates, pivots=['USD']).matrix
+        assert updated.path('USD', 'KES') == ['USD', 'EUR', 'KES']
+
+    def test_full_matrix_for_large_currency_list(self):
+        """Test that every pair is resolvable for a 150 currency star topology"""
+        currencies = ['C%03d' % i for i in range(150)]
+        rates = {('USD', code): Decimal(i + 1) for i, code in enumerate(currencies)}
+        graph = RateGraph.build(rates, pivots=['USD'])
+
+        assert len(graph.matrix) == 151 * 150
+        assert graph.rate('C009', 'C004') == safe_divide(Decimal('1'), Decimal(10)) * Decimal(5)
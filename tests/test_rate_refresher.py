@@ -0,0 +1,166 @@
+import json
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app import db
+from app.models.exchange_rate import ExchangeRate
+from app.services.rate_service import RateService
+
+
+class StubProvider:
+    """Local HTTP server that serves rate payloads like the external API"""
+
+    def __init__(self):
+        self.rates = {'USD': {'USD': 1, 'EUR': 0.95, 'KES': 132.25, 'NGN': 790.5}}
+        self.delay = 0
+        self.requests = 0
+        self.client_ports = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.requests += 1
+                stub.client_ports.add(self.client_address[1])
+                time.sleep(stub.delay)
+                base = self.path.rsplit('/', 1)[-1]
+                if base not in stub.rates:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = json.dumps({'base': base, 'rates': stub.rates[base]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/latest/'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def provider(app):
+    stub = StubProvider()
+    app.config['EXCHANGE_RATE_API_URL'] = stub.url
+    yield stub
+    app.extensions['rate_refresher'].stop(timeout=5)
+    stub.close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def _age_rates(hours):
+    ExchangeRate.query.update({'updated_at': datetime.utcnow() - timedelta(hours=hours)})
+    db.session.commit()
+    RateService.get_snapshot()
+    db.session.remove()
+
+
+class TestRateRefresher:
+    """Test background rate refresh against a local stub provider"""
+
+    def test_refresh_reuses_pooled_connection(self, app, provider):
+        """Test that repeated refreshes go over one keep-alive connection"""
+        refresher = app.extensions['rate_refresher']
+
+        with app.app_context():
+            for _ in range(3):
+                assert refresher.refresh() is not None
+
+            assert provider.requests == 3
+            assert len(provider.client_ports) == 1
+            assert RateService.get_rate('USD', 'KES') == Decimal('132.25')
+            assert refresher.status()['refreshes'] == 3
+
+    def test_stale_rate_served_while_refresh_in_flight(self, app, provider):
+        """Test stale-while-revalidate on the quote path"""
+        app.config['RATE_REFRESH_ON_STALE'] = True
+        provider.delay = 0.3
+        refresher = app.extensions['rate_refresher']
+
+        with app.app_context():
+            app.extensions['rate_cache'].invalidate()
+            _age_rates(hours=48)
+            assert RateService.is_rate_stale('USD', 'KES')
+
+            started = time.monotonic()
+            rate = RateService.get_rate('USD', 'KES')
+
+            # The stale rate is returned without waiting for the provider
+            assert rate == Decimal('129.50')
+            assert time.monotonic() - started < provider.delay
+            assert _wait_for(refresher.is_refreshing)
+
+            # Further stale lookups do not start a second refresh
+            RateService.get_rate('USD', 'KES')
+
+            assert _wait_for(lambda: refresher.refreshes == 1)
+            assert provider.requests == 1
+            assert RateService.get_rate('USD', 'KES') == Decimal('132.25')
+            assert not RateService.is_rate_stale('USD', 'KES')
+
+    def test_stale_pair_outside_refreshed_bases_stops_triggering(self, app, provider, monkeypatch):
+        """Test that a stale EUR-based rate is fetched once and then stops triggering"""
+        app.config['RATE_REFRESH_ON_STALE'] = True
+        provider.rates['EUR'] = {'EUR': 1, 'USD': 1.08, 'KES': 141.5, 'NGN': 845.0}
+        refresher = app.extensions['rate_refresher']
+        assert refresher.base_currencies == ['USD']
+
+        with app.app_context():
+            app.extensions['rate_cache'].invalidate()
+            _age_rates(hours=48)
+
+            RateService.get_rate('EUR', 'KES')
+            assert _wait_for(lambda: refresher.refreshes == 1)
+            assert provider.requests == 2
+            assert RateService.get_rate('EUR', 'KES') == Decimal('141.5')
+
+            triggers = []
+            monkeypatch.setattr(refresher, 'trigger', lambda *args: triggers.append(args))
+            for _ in range(3):
+                RateService.get_rate('EUR', 'KES')
+                RateService.get_rate('KES', 'NGN')
+
+            assert triggers == []
+
+    def test_failed_refresh_keeps_last_good_rates(self, app, provider):
+        """Test that a provider error leaves the snapshot untouched"""
+        provider.rates = {}
+        refresher = app.extensions['rate_refresher']
+
+        with app.app_context():
+            assert refresher.refresh() is None
+            assert refresher.status()['failures'] == 1
+            assert RateService.get_rate('USD', 'KES') == Decimal('129.50')
+
+    def test_scheduled_refresh(self, app, provider):
+        """Test that the refresher runs on its configured schedule"""
+        refresher = app.extensions['rate_refresher']
+        refresher.task.interval_seconds = 0.05
+        refresher.interval_seconds = 0.05
+        refresher.start()
+
+        assert _wait_for(lambda: refresher.refreshes >= 2)
+        refresher.stop(timeout=5)
+        assert not refresher.status()['running']
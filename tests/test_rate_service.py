@@ -1,4 +1,5 @@
 import pytest
+from contextlib import contextmanager
 from decimal import Decimal
 from app.services.rate_service import RateService
 
@@ -72,4 +73,174 @@ class TestRateService:
         """Test getting non-existent rate"""
         with app.app_context():
             with pytest.raises(ValueError, match="No exchange rate available"):
-                RateService.get_rate('XXX', 'YYY')
\ No newline at end of file
+                RateService.get_rate('XXX', 'YYY')
+
+
+class TestRateCache:
+    """Test the in-memory rate snapshot cache"""
+
+    @staticmethod
+    @contextmanager
+    def _count_statements():
+        from sqlalchemy import event
+        from app import db
+
+        statements = []
+
+        def capture(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+    def test_warm_lookups_do_not_query_database(self, app):
+        """Test that direct, inverse and cross rates are served from the snapshot"""
+        with app.app_context():
+            RateService.get_rate('USD', 'KES')
+            with self._count_statements() as statements:
+                RateService.get_rate('USD', 'KES')
+                RateService.get_rate('KES', 'USD')
+                RateService.get_rate('KES', 'NGN')
+
+            assert statements == []
+
+    def test_publish_failure_does_not_fail_committed_write(self, app, monkeypatch):
+        """Test that a failed snapshot swap invalidates instead of raising"""
+        with app.app_context():
+            RateService.get_rate('USD', 'KES')
+            cache = app.extensions['rate_cache']
+
+            def broken_publish(entries):
+                raise RuntimeError('publish failed')
+
+            monkeypatch.setattr(cache, 'publish', broken_publish)
+
+            assert RateService.set_rate('USD', 'KES', '135.00') == Decimal('135.00')
+            assert not cache.is_loaded()
+            assert RateService.get_rate('USD', 'KES') == Decimal('135.00')
+
+    def test_hit_and_miss_counters(self, app):
+        """Test that the first lookup misses and later lookups hit"""
+        with app.app_context():
+            RateService.get_rate('USD', 'KES')
+            RateService.get_rate('USD', 'EUR')
+
+            stats = RateService.get_cache_stats()
+            assert stats['misses'] == 1
+            assert stats['hits'] == 1
+            assert stats['size'] > 0
+
+    def test_set_rate_swaps_snapshot(self, app):
+        """Test that set_rate publishes a new snapshot version"""
+        with app.app_context():
+            RateService.get_rate('USD', 'KES')
+            version = RateService.get_cache_stats()['version']
+
+            RateService.set_rate('USD', 'KES', '135.00')
+
+            assert RateService.get_cache_stats()['version'] == version + 1
+            assert RateService.get_rate('USD', 'KES') == Decimal('135.00')
+
+    def test_snapshot_is_immutable(self, app):
+        """Test that a published update does not mutate older snapshots"""
+        with app.app_context():
+            old = RateService.get_snapshot()
+            RateService.set_rate('USD', 'KES', '135.00')
+            new = RateService.get_snapshot()
+
+            assert old.get('USD', 'KES').rate == Decimal('129.50')
+            assert new.get('USD', 'KES').rate == Decimal('135.00')
+            with pytest.raises(TypeError):
+                old.rates[('USD', 'KES')] = None
+
+    def test_stale_snapshot_is_reloaded(self, app):
+        """Test that a snapshot older than the configured bound is reloaded"""
+        with app.app_context():
+            from app import db
+            from app.models.exchange_rate import ExchangeRate
+
+            RateService.get_rate('USD', 'KES')
+
+            # Simulate a write made by another worker
+            rate = ExchangeRate.query.filter_by(
+                base_currency='USD', target_currency='KES'
+            ).first()
+            rate.rate = Decimal('140.00')
+            db.session.commit()
+            assert RateService.get_rate('USD', 'KES') == Decimal('129.50')
+
+            app.extensions['rate_cache'].max_age_seconds = 0
+            assert RateService.get_rate('USD', 'KES') == Decimal('140.00')
+
+
+class TestBulkRateIngestion:
+    """Test single-transaction rate ingestion"""
+
+    def test_set_rates_single_commit(self, app):
+        """Test that a whole payload is applied with one SELECT and one commit"""
+        with app.app_context():
+            from sqlalchemy import event
+            from app import db
+
+            RateService.get_rate('USD', 'KES')
+            statements = []
+            commits = []
+
+            def capture(*args):
+                statements.append(args[2])
+
+            def count_commit(conn):
+                commits.append(conn)
+
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            event.listen(db.engine, 'commit', count_commit)
+            try:
+                stats = RateService.set_rates({
+                    'USD': {'KES': '130.00', 'NGN': '780.00', 'GBP': '0.79'},
+                    'EUR': {'KES': '141.00'},
+                })
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+                event.remove(db.engine, 'commit', count_commit)
+
+            assert stats['rates_updated'] == 4
+            assert stats['inserted'] == 1
+            assert stats['updated'] == 3
+            assert stats['duration_ms'] >= 0
+            assert len(commits) == 1
+            assert len([s for s in statements if s.startswith('SELECT')]) == 2
+            assert RateService.get_rate('USD', 'GBP') == Decimal('0.79')
+            assert RateService.get_rate('EUR', 'KES') == Decimal('141.00')
+
+    def test_update_rates_from_api_multiple_bases(self, app, monkeypatch):
+        """Test refreshing several base currencies in one run"""
+        payloads = {
+            'USD': {'rates': {'USD': 1, 'EUR': 0.9, 'KES': 128.5, 'JPY': 150}},
+            'EUR': {'rates': {'EUR': 1, 'USD': 1.11, 'NGN': 850.25}},
+        }
+
+        class FakeResponse:
+            def __init__(self, payload):
+                self.payload = payload
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return self.payload
+
+        monkeypatch.setattr(app.extensions['http_session'], 'get',
+                            lambda url, timeout: FakeResponse(payloads[url[-3:]]))
+
+        with app.app_context():
+            result = RateService.update_rates_from_api(['USD', 'EUR'])
+
+            assert result['base_currencies'] == ['USD', 'EUR']
+            # JPY is not a supported currency and is ignored
+            assert result['rates_updated'] == 4
+            assert 'fetch_ms' in result and 'write_ms' in result
+            assert RateService.get_rate('USD', 'KES') == Decimal('128.5')
+            assert RateService.get_rate('EUR', 'NGN') == Decimal('850.25')
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app import create_app, db
+from app.models.exchange_rate import ExchangeRate
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+from app.utils import json_provider
+from app.utils.json_provider import FXJSONProvider
+
+ENGINES = ['json', pytest.param('orjson', marks=pytest.mark.skipif(
+    json_provider.orjson is None, reason='orjson is not installed'))]
+
+
+class TestJSONProvider:
+    """Test the API's JSON provider on each engine"""
+
+    @pytest.mark.parametrize('engine', ENGINES)
+    def test_decimals_and_datetimes_match_to_dict(self, app, engine):
+        """Test that Decimal keeps its scale and datetimes are ISO 8601"""
+        app.config['JSON_ENGINE'] = engine
+        provider = FXJSONProvider(app)
+        value = {
+            'amount': Decimal('100.00'),
+            'rate': Decimal('129.50000000'),
+            'at': datetime(2024, 1, 2, 3, 4, 5, 600000),
+            'on_the_second': datetime(2024, 1, 2, 3, 4, 5),
+            'big': 2 ** 70,
+        }
+
+        decoded = json.loads(provider.dumps(value, separators=(',', ':')))
+
+        assert decoded == {
+            'amount': '100.00',
+            'rate': '129.50000000',
+            'at': '2024-01-02T03:04:05.600000',
+            'on_the_second': '2024-01-02T03:04:05',
+            'big': 2 ** 70,
+        }
+
+    @pytest.mark.skipif(json_provider.orjson is None, reason='orjson is not installed')
+    @pytest.mark.parametrize('kwargs', [{'separators': (',', ':')}, {'indent': 2}])
+    def test_engines_give_identical_output(self, app, kwargs):
+        """Test that both engines encode the same payload to the same text"""
+        value = {
+            'name': 'Naïra ₦',
+            'amount': Decimal('100.00'),
+            'at': datetime(2024, 1, 2, 3, 4, 5, 600000),
+            'items': [1, True, None],
+        }
+        outputs = []
+        for engine in ('json', 'orjson'):
+            app.config['JSON_ENGINE'] = engine
+            outputs.append(FXJSONProvider(app).dumps(value, **kwargs))
+
+        assert outputs[0] == outputs[1]
+        assert 'Naïra ₦' in outputs[0]
+
+    def test_unknown_engine_is_rejected(self):
+        """Test that a misconfigured JSON_ENGINE fails at startup"""
+        with pytest.raises(ValueError, match='Unknown JSON_ENGINE'):
+            create_app('testing', {'JSON_ENGINE': 'fast'})
+
+
+class TestColumnSerialization:
+    """Test that list endpoints built from column rows match to_dict()"""
+
+    @pytest.mark.parametrize('money_storage_mode', ['numeric', 'minor_units'])
+    def test_history_rows_match_to_dict(self, money_storage_mode):
+        """Test history dicts against the ORM objects in both storage modes"""
+        app = create_app('testing', {'MONEY_STORAGE_MODE': money_storage_mode})
+        with app.app_context():
+            RateService.seed_initial_rates()
+            for from_currency, to_currency in [('USD', 'KES'), ('KES', 'NGN')]:
+                quote = FXService.generate_quote(from_currency, to_currency, '1234.5')
+                FXService.execute_quote(quote.id)
+
+            history = FXService.get_transaction_history(10)
+            expected = [transaction.to_dict() for transaction in Transaction.query.order_by(
+                Transaction.created_at.desc(), Transaction.id.desc()).all()]
+
+            assert history == expected
+            assert list(FXService.stream_transaction_history()) == expected
+            db.session.remove()
+
+    def test_rates_match_to_dict(self, app):
+        """Test GET /rates dicts against the ORM objects"""
+        expected = [rate.to_dict() for rate in ExchangeRate.query.all()]
+
+        assert RateService.get_all_rates() == expected
+
+    def test_history_route_payload(self, client):
+        """Test the encoded history response"""
+        quote_id = client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': '100.00'
+        }).get_json()['data']['quote_id']
+        client.post('/api/v1/transactions', json={'quote_id': quote_id})
+
+        response = client.get('/api/v1/transactions')
+        lines = client.get('/api/v1/transactions?format=ndjson').get_data(as_text=True).splitlines()
+
+        row = response.get_json()['data'][0]
+        assert row['quote_id'] == quote_id
+        assert row['from_amount'] == '100.00'
+        assert row['exchange_rate'] == '130.14750000'
+        assert json.loads(lines[0]) == row
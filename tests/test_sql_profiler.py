@@ -0,0 +1,86 @@
+import logging
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models.quote import Quote
+from app.services.fx_service import FXService
+from app.services.rate_service import RateService
+from app.utils.sql_profiler import StatementBudgetExceeded, profile_statements
+
+
+def profiled_app(**overrides):
+    app = create_app('testing', {'SQL_PROFILING_ENABLED': True, 'SQL_BUDGET_ENFORCE': True, **overrides})
+    with app.app_context():
+        RateService.seed_initial_rates()
+    return app
+
+
+class TestSqlProfiler:
+    """Test per-request statement counts, budgets and repeated statement detection"""
+
+    def test_response_headers_report_statements(self, client):
+        """Test the statement count and database time headers"""
+        response = client.post('/api/v1/quotes', json={
+            'from_currency': 'KES', 'to_currency': 'NGN', 'amount': '2500.00'
+        })
+
+        assert response.status_code == 201
+        assert int(response.headers['X-SQL-Statements']) >= 1
+        assert float(response.headers['X-SQL-Time-Ms']) > 0
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        assert client.get('/api/v1/health').headers['X-SQL-Statements'] == '0'
+
+    def test_warm_cross_rate_quote_reads_no_rates(self, app):
+        """Test that a cross-rate quote is priced from the snapshot, not ExchangeRate queries"""
+        FXService.generate_quote('KES', 'NGN', '2500.00')
+
+        with profile_statements() as profile:
+            FXService.generate_quote('KES', 'NGN', '2500.00')
+
+        assert profile.count >= 1
+        assert not any('exchange_rates' in statement for statement in profile.shapes)
+
+    def test_failed_statement_is_not_timed(self, app):
+        """Test that timings after a failed statement go to the right statement"""
+        with profile_statements() as profile:
+            with pytest.raises(OperationalError):
+                db.session.execute(text('SELECT * FROM no_such_table'))
+            db.session.rollback()
+            connection = db.session.connection()
+            connection.execute(text('SELECT 1'))
+
+        assert profile.count == 1
+        assert [statement for _, statement in profile.slowest_statements()] == ['SELECT 1']
+        assert 'sql_profile_started' not in connection.info
+
+    def test_over_budget_request_raises_when_enforced(self):
+        """Test that SQL_BUDGET_ENFORCE fails the request"""
+        app = profiled_app(SQL_STATEMENT_BUDGETS={'fx.get_all_rates': 0})
+
+        with pytest.raises(StatementBudgetExceeded, match='fx.get_all_rates issued 1 SQL statements'):
+            app.test_client().get('/api/v1/rates')
+
+    def test_over_budget_request_is_logged_otherwise(self, caplog):
+        """Test that without enforcement the request succeeds and is logged"""
+        app = profiled_app(SQL_STATEMENT_BUDGETS={'fx.get_all_rates': 0}, SQL_BUDGET_ENFORCE=False)
+
+        with caplog.at_level(logging.WARNING):
+            response = app.test_client().get('/api/v1/rates')
+
+        assert response.status_code == 200
+        assert 'over its budget of 0' in caplog.text
+
+    def test_repeated_statement_is_reported(self, app):
+        """Test that a query issued in a loop is flagged as a possible N+1"""
+        quote_ids = [FXService.generate_quote('USD', 'KES', '100.00').id for _ in range(5)]
+        db.session.expunge_all()
+
+        with profile_statements() as profile:
+            for quote_id in quote_ids:
+                db.session.get(Quote, quote_id)
+
+        repeated = profile.repeated(threshold=5)
+        assert len(repeated) == 1
+        assert repeated[0][1] == 5
+        assert len(profile.slowest_statements()) == 5
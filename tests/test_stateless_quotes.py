@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import hmac
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import event
+from app import create_app, db
+from app.models.quote import Quote
+from app.models.transaction import Transaction
+from app.services.fx_service import FXService
+from app.utils.quote_tokens import ExecutedTokenStore, sign_quote, verify_quote
+from config import DEFAULT_SECRET_KEY
+
+
+@pytest.fixture
+def stateless_app(app):
+    app.config['STATELESS_QUOTES'] = True
+    return app
+
+
+class TestStatelessQuotes:
+    """Test signed quote tokens issued when STATELESS_QUOTES is enabled"""
+
+    def test_generate_quote_does_not_write(self, stateless_app):
+        """Test that issuing a quote runs no INSERT and stores nothing"""
+        with stateless_app.app_context():
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda *args: statements.append(args[2]))
+            quote = FXService.generate_quote('USD', 'KES', '100')
+
+            assert quote.token
+            assert not any(s.startswith('INSERT') for s in statements)
+            assert Quote.query.count() == 0
+
+    def test_token_round_trip(self, stateless_app):
+        """Test that a token carries the quote's values"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            fields = verify_quote(quote.token, stateless_app.config['SECRET_KEY'])
+
+            assert fields['id'] == quote.id
+            assert fields['to_amount'] == quote.to_amount
+            assert fields['exchange_rate'] == quote.exchange_rate
+            assert fields['expires_at'] == quote.expires_at
+
+    def test_tampered_token_rejected(self, stateless_app):
+        """Test that changing the payload invalidates the signature"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            quote.to_amount = quote.to_amount * 2
+            forged = sign_quote(quote, 'another-secret')
+
+            with pytest.raises(ValueError, match="Invalid quote token"):
+                FXService.execute_quote_token(forged)
+            with pytest.raises(ValueError, match="Invalid quote token"):
+                FXService.execute_quote_token('not-a-token')
+
+    def test_token_key_is_not_the_session_key(self, stateless_app):
+        """Test that a token signed with the raw SECRET_KEY is refused"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            body = quote.token.split('.')[0]
+            raw = hmac.new(stateless_app.config['SECRET_KEY'].encode(), body.encode(),
+                           hashlib.sha256).digest()
+            forged = f"{body}.{base64.urlsafe_b64encode(raw).decode().rstrip('=')}"
+
+            with pytest.raises(ValueError, match="Invalid quote token"):
+                FXService.execute_quote_token(forged)
+
+    @pytest.mark.parametrize('field, value, message', [
+        ('to_currency', 'GBP', 'Unsupported currency'),
+        ('from_amount', Decimal('-100'), 'greater than zero'),
+        ('exchange_rate', Decimal('0'), 'greater than zero'),
+    ])
+    def test_signed_token_fields_are_revalidated(self, stateless_app, field, value, message):
+        """Test that execution re-checks currencies and amounts in a valid token"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            setattr(quote, field, value)
+            token = sign_quote(quote, stateless_app.config['SECRET_KEY'])
+
+            with pytest.raises(ValueError, match=message):
+                FXService.execute_quote_token(token)
+            assert Transaction.query.count() == 0
+
+    def test_builtin_secret_key_refused(self):
+        """Test that stateless quotes cannot be enabled with the public fallback key"""
+        with pytest.raises(ValueError, match='STATELESS_QUOTES needs SECRET_KEY'):
+            create_app('testing', {'STATELESS_QUOTES': True, 'SECRET_KEY': DEFAULT_SECRET_KEY})
+
+    def test_execute_token_persists_quote_and_transaction(self, stateless_app):
+        """Test that execution stores the quote and transaction together"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            transaction = FXService.execute_quote_token(quote.token)
+
+            stored = db.session.get(Quote, quote.id)
+            assert stored.is_executed is True
+            assert transaction.quote_id == quote.id
+            assert transaction.to_amount == quote.to_amount
+
+    def test_replay_returns_same_transaction(self, stateless_app):
+        """Test that executing a token twice is idempotent"""
+        with stateless_app.app_context():
+            quote = FXService.generate_quote('USD', 'KES', '100')
+            first = FXService.execute_quote_token(quote.token)
+
+            # A cold replay store falls back to the quote's primary key
+            stateless_app.extensions['executed_tokens'] = ExecutedTokenStore()
+            second = FXService.execute_quote_token(quote.token)
+            third = FXService.execute_quote_token(quote.token)
+
+            assert first.id == second.id == third.id
+            assert Transaction.query.count() == 1
+
+    def test_expired_token_rejected(self, stateless_app):
+        """Test that an expired token is refused without a database read"""
+        with stateless_app.app_context():
+            stateless_app.config['QUOTE_VALIDITY_SECONDS'] = -1
+            quote = FXService.generate_quote('USD', 'KES', '100')
+
+            statements = []
+            event.listen(db.engine, 'before_cursor_execute',
+                         lambda *args: statements.append(args[2]))
+            with pytest.raises(ValueError, match="expired"):
+                FXService.execute_quote_token(quote.token)
+            assert statements == []
+
+    def test_batch_quotes_are_tokens(self, stateless_app):
+        """Test that batch generation also skips the database"""
+        with stateless_app.app_context():
+            results = FXService.generate_quotes([
+                {'from_currency': 'USD', 'to_currency': 'KES', 'amount': '10'},
+                {'from_currency': 'USD', 'to_currency': 'EUR', 'amount': '20'}
+            ])
+
+            assert all(r['quote'].token for r in results)
+            assert Quote.query.count() == 0
+
+    def test_execute_token_via_api(self, stateless_app, client):
+        """Test POST /transactions with a quote_token"""
+        response = client.post('/api/v1/quotes', json={
+            'from_currency': 'USD', 'to_currency': 'KES', 'amount': 100
+        })
+        token = response.get_json()['data']['quote_token']
+
+        response = client.post('/api/v1/transactions', json={'quote_token': token})
+        assert response.status_code == 201
+
+        response = client.post('/api/v1/transactions', json={'quote_token': token + 'x'})
+        assert response.status_code == 400
+
+
+class TestExecutedTokenStore:
+    """Test pruning of the executed-token store"""
+
+    def test_expired_ids_are_pruned(self):
+        store = ExecutedTokenStore()
+        now = datetime.utcnow()
+        store.add('old', now - timedelta(seconds=1))
+        store.add('live', now + timedelta(seconds=60))
+
+        assert 'old' not in store
+        assert 'live' in store
+        assert len(store) == 1
@@ -0,0 +1,94 @@
+import json
+from app import create_app
+from app.services.rate_service import RateService
+from app.utils.tracing import MemorySpanExporter, span
+
+TRACEPARENT = '00-' + 'a' * 32 + '-' + 'b' * 16 + '-{flags}'
+
+
+def traced_app(**overrides):
+    config = {'TRACING_ENABLED': True, 'TRACING_SAMPLE_RATE': 1.0,
+              'TRACING_EXPORTER': MemorySpanExporter()}
+    config.update(overrides)
+    app = create_app('testing', config)
+    with app.app_context():
+        RateService.seed_initial_rates()
+    return app
+
+
+def exported(app):
+    return app.extensions['tracer'].exporter.spans
+
+
+class TestTracing:
+    """Test request spans, propagation, sampling and exporters"""
+
+    def test_quote_request_records_service_and_database_spans(self):
+        """Test the span tree of a cross-rate quote"""
+        app = traced_app()
+
+        response = app.test_client().post('/api/v1/quotes', json={
+            'from_currency': 'KES', 'to_currency': 'NGN', 'amount': '2500.00'
+        })
+
+        spans = exported(app)
+        by_id = {item.span_id: item for item in spans}
+        root = spans[-1]
+        names = {item.name for item in spans}
+        assert root.name == 'POST /api/v1/quotes'
+        assert root.parent_id is None
+        assert root.attributes['http.status_code'] == 201
+        assert response.headers['traceparent'] == f'00-{root.trace_id}-{root.span_id}-01'
+        assert {'FXService.generate_quote', 'RateService.get_rate', 'RateGraph.build',
+                'pricer.apply_spread', 'generate_quote.commit', 'db.query'} <= names
+        for item in spans[:-1]:
+            assert item.trace_id == root.trace_id
+            assert item.parent_id in by_id
+
+    def test_incoming_traceparent_continues_trace(self):
+        """Test that the caller's trace id and span id become the root's parent"""
+        app = traced_app()
+
+        app.test_client().get('/api/v1/rates', headers={'traceparent': TRACEPARENT.format(flags='01')})
+
+        root = exported(app)[-1]
+        assert root.trace_id == 'a' * 32
+        assert root.parent_id == 'b' * 16
+
+    def test_sampling_decision_is_made_at_the_head(self):
+        """Test that unsampled requests create no spans"""
+        app = traced_app(TRACING_SAMPLE_RATE=0.0)
+        client = app.test_client()
+
+        response = client.get('/api/v1/rates')
+        client.get('/api/v1/rates', headers={'traceparent': TRACEPARENT.format(flags='00')})
+        client.get('/metrics')
+
+        assert 'traceparent' not in response.headers
+        assert exported(app) == []
+        with app.app_context(), span('outside-a-trace') as active:
+            assert active is None
+
+    def test_failed_service_call_marks_span_as_error(self):
+        """Test that an exception ends the span with status error"""
+        app = traced_app()
+
+        response = app.test_client().post('/api/v1/transactions', json={'quote_id': 'missing'})
+
+        assert response.status_code == 400
+        execute = next(item for item in exported(app) if item.name == 'FXService.execute_quote')
+        assert execute.status == 'error'
+        assert 'not found' in execute.attributes['error']
+
+    def test_jsonl_exporter_writes_one_line_per_span(self, tmp_path):
+        """Test the default exporter's file format"""
+        path = tmp_path / 'traces.jsonl'
+        app = traced_app(TRACING_EXPORTER='jsonl', TRACING_FILE=str(path))
+
+        app.test_client().get('/api/v1/health')
+        app.test_client().get('/api/v1/rates')
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        roots = [record for record in records if record['parent_id'] is None]
+        assert [root['name'] for root in roots] == ['GET /api/v1/health', 'GET /api/v1/rates']
+        assert all(record['duration_ms'] >= 0 for record in records)